@@ -0,0 +1,821 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the (LGPL) GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Library Lesser General Public License for more details at
+# ( http://www.gnu.org/licenses/lgpl.html ).
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+# written by: Jeff Ortel ( jortel@redhat.com )
+
+"""
+The I{benchmark} module provides (offline) benchmarks using
+synthetic documents.  The I{codex} benchmarks use a (Codex like)
+WSDL of builds and their parts, locations, metadata and file info
+and are run without a server using the L{SimClient} loopback.
+Each case is run in a (forked) child process so the peak memory
+reported is that of the case.  Run as:
+    python -m suds.benchmark [options] [name] [size,..]
+Use (--help) for the options.  The results are compared with the
+(checked in) I{benchmark.json} baseline so that regressions are visible.
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+from optparse import OptionParser
+from logging import getLogger
+from suds import *
+from suds.metrics import Timer
+from suds.options import Options
+from suds.sax.parser import Parser
+from suds.sudsobject import Factory
+from suds.xsd.schema import Schema
+from suds.transport import Transport, Reply, Buffer
+
+try:
+    import json
+except ImportError:
+    # Python 2.5 compatibility
+    json = None
+
+try:
+    import resource
+except ImportError:
+    # not supported (windows)
+    resource = None
+
+log = getLogger(__name__)
+
+baseline = os.path.join(os.path.dirname(__file__), 'benchmark.json')
+
+
+def synthetic_schema(n):
+    """
+    Get a synthetic schema of I{n} components.  Each component is a
+    global <complexType/> (3 of 4 extend the previous type) containing
+    a nested anonymous type and a reference to a global element, and the
+    global <element/> of that type.
+    @param n: The number of components.
+    @type n: int
+    @return: The schema (xml) text.
+    @rtype: str
+    """
+    s = []
+    s.append('<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"')
+    s.append(' xmlns:tns="urn:benchmark" targetNamespace="urn:benchmark"')
+    s.append(' elementFormDefault="qualified">')
+    for i in range(n):
+        extended = ( i % 4 != 0 )
+        s.append('<xs:complexType name="T%d">' % i)
+        if extended:
+            s.append('<xs:complexContent>')
+            s.append('<xs:extension base="tns:T%d">' % (i-1))
+        s.append('<xs:sequence>')
+        s.append('<xs:element name="a%d" type="xs:string"/>' % i)
+        s.append('<xs:element name="b" type="xs:int" minOccurs="0"/>')
+        s.append('<xs:element ref="tns:E0" minOccurs="0"/>')
+        s.append('<xs:element name="c"><xs:complexType><xs:sequence>')
+        s.append('<xs:element name="d" type="xs:dateTime"/>')
+        s.append('</xs:sequence></xs:complexType></xs:element>')
+        s.append('</xs:sequence>')
+        s.append('<xs:attribute name="id" type="xs:string"/>')
+        if extended:
+            s.append('</xs:extension>')
+            s.append('</xs:complexContent>')
+        s.append('</xs:complexType>')
+        s.append('<xs:element name="E%d" type="tns:T%d"/>' % (i, i))
+    s.append('</xs:schema>')
+    return ''.join(s)
+
+
+def schema(n):
+    """
+    Benchmark building (and dereferencing) a synthetic
+    schema of I{n} components.
+    @param n: The number of components.
+    @type n: int
+    @return: The timer and the number of components.
+    @rtype: (L{Timer}, int)
+    """
+    root = Parser().parse(string=synthetic_schema(n)).root()
+    timer = Timer()
+    timer.start()
+    Schema(root, 'urn:benchmark', Options())
+    timer.stop()
+    return (timer, n)
+
+
+def sobject(n, total=200000):
+    """
+    Benchmark building (and iterating) suds objects of I{n} fields.
+    The number of objects is (I{total}/I{n}) so the number of fields
+    set is the same for each size and the time is flat when setting
+    a field is constant time.  Half of the objects are built by
+    L{Factory.object()} using a dictionary and the others by setting
+    each field.
+    @param n: The number of fields.
+    @type n: int
+    @param total: The total number of fields set.
+    @type total: int
+    @return: The timer and the number of objects built.
+    @rtype: (L{Timer}, int)
+    """
+    names = ['f%d' % i for i in range(n)]
+    fields = dict([(name, 0) for name in names])
+    count = max(1, total/n/2)
+    timer = Timer()
+    timer.start()
+    for i in range(count):
+        Factory.object('T', fields)
+        sobject = Factory.object('T')
+        for name in names:
+            setattr(sobject, name, i)
+        for item in sobject:
+            pass
+    timer.stop()
+    return (timer, count*2)
+
+
+def synthetic_wsdl():
+    """
+    Get a synthetic (document/literal) WSDL modeled on the Codex service.
+    A I{Build} has parts, locations and metadata (lists) and file info.
+    The operations are:
+        - getBuild(id) returns a I{Build}.
+        - queryBuilds(product, limit) returns a list of I{Build}.
+        - addBuilds(build[]) returns the number added.
+    @return: The WSDL (xml) text.
+    @rtype: str
+    """
+    s = []
+    s.append('<definitions xmlns="http://schemas.xmlsoap.org/wsdl/"')
+    s.append(' xmlns:soap="http://schemas.xmlsoap.org/wsdl/soap/"')
+    s.append(' xmlns:xs="http://www.w3.org/2001/XMLSchema"')
+    s.append(' xmlns:tns="urn:benchmark" targetNamespace="urn:benchmark">')
+    s.append('<types><xs:schema targetNamespace="urn:benchmark"')
+    s.append(' elementFormDefault="qualified">')
+    types = (
+        ('Part', (('id','int'), ('name','string'), ('size','long'))),
+        ('Location', (('id','int'), ('server','string'), ('path','string'),
+            ('protocol','string'), ('uri','anyURI'))),
+        ('Metadata', (('key','string'), ('value','string'))),
+        ('FileInfo', (('path','string'), ('size','long'), ('md5','string'),
+            ('modified','dateTime'))),
+    )
+    for name, fields in types:
+        s.append('<xs:complexType name="%s"><xs:sequence>' % name)
+        for fn, ft in fields:
+            s.append('<xs:element name="%s" type="xs:%s"/>' % (fn, ft))
+        s.append('</xs:sequence></xs:complexType>')
+    s.append('<xs:complexType name="Build"><xs:sequence>')
+    for fn, ft in (('id','int'), ('name','string'), ('product','string'),
+            ('version','string'), ('created','dateTime'),
+            ('certified','boolean')):
+        s.append('<xs:element name="%s" type="xs:%s"/>' % (fn, ft))
+    for fn, ft in (('parts','Part'), ('locations','Location'),
+            ('metadata','Metadata')):
+        s.append('<xs:element name="%s" type="tns:%s"' % (fn, ft))
+        s.append(' minOccurs="0" maxOccurs="unbounded"/>')
+    s.append('<xs:element name="fileinfo" type="tns:FileInfo" minOccurs="0"/>')
+    s.append('</xs:sequence>')
+    s.append('<xs:attribute name="state" type="xs:string"/>')
+    s.append('</xs:complexType>')
+    operations = (
+        ('getBuild', (('id','xs:int',''),), ('tns:Build', '')),
+        ('queryBuilds', (('product','xs:string',''), ('limit','xs:int','')),
+            ('tns:Build', ' minOccurs="0" maxOccurs="unbounded"')),
+        ('addBuilds', (('builds','tns:Build',' maxOccurs="unbounded"'),),
+            ('xs:int', '')),
+    )
+    for op, params, (rt, occurs) in operations:
+        s.append('<xs:element name="%s"><xs:complexType><xs:sequence>' % op)
+        for pn, pt, po in params:
+            s.append('<xs:element name="%s" type="%s"%s/>' % (pn, pt, po))
+        s.append('</xs:sequence></xs:complexType></xs:element>')
+        s.append('<xs:element name="%sResponse">' % op)
+        s.append('<xs:complexType><xs:sequence>')
+        s.append('<xs:element name="return" type="%s"%s/>' % (rt, occurs))
+        s.append('</xs:sequence></xs:complexType></xs:element>')
+    s.append('</xs:schema></types>')
+    for op, params, returned in operations:
+        s.append('<message name="%sRequest">' % op)
+        s.append('<part name="parameters" element="tns:%s"/></message>' % op)
+        s.append('<message name="%sResponse">' % op)
+        s.append('<part name="parameters" element="tns:%sResponse"/>' % op)
+        s.append('</message>')
+    s.append('<portType name="Codex">')
+    for op, params, returned in operations:
+        s.append('<operation name="%s">' % op)
+        s.append('<input message="tns:%sRequest"/>' % op)
+        s.append('<output message="tns:%sResponse"/>' % op)
+        s.append('</operation>')
+    s.append('</portType>')
+    s.append('<binding name="CodexBinding" type="tns:Codex">')
+    s.append('<soap:binding style="document"')
+    s.append(' transport="http://schemas.xmlsoap.org/soap/http"/>')
+    for op, params, returned in operations:
+        s.append('<operation name="%s">' % op)
+        s.append('<soap:operation soapAction="%s"/>' % op)
+        s.append('<input><soap:body use="literal"/></input>')
+        s.append('<output><soap:body use="literal"/></output>')
+        s.append('</operation>')
+    s.append('</binding>')
+    s.append('<service name="CodexService"><port name="Codex"')
+    s.append(' binding="tns:CodexBinding">')
+    s.append('<soap:address location="http://localhost/codex"/>')
+    s.append('</port></service>')
+    s.append('</definitions>')
+    return ''.join(s)
+
+
+def synthetic_build(i):
+    """
+    Get the (xml) text of the I{Build} (return) element for build I{i}.
+    @param i: The build number.
+    @type i: int
+    @return: The build (xml) text.
+    @rtype: str
+    """
+    s = []
+    s.append('<ns:return state="%s">' % ('released', 'pending')[i % 2])
+    s.append('<ns:id>%d</ns:id>' % i)
+    s.append('<ns:name>build-%d &amp; co</ns:name>' % i)
+    s.append('<ns:product>product-%d</ns:product>' % (i % 10))
+    s.append('<ns:version>1.%d</ns:version>' % (i % 100))
+    s.append('<ns:created>2010-06-01T12:%.2d:00Z</ns:created>' % (i % 60))
+    s.append('<ns:certified>%s</ns:certified>' % ('true', 'false')[i % 2])
+    for p in range(3):
+        s.append('<ns:parts><ns:id>%d</ns:id>' % p)
+        s.append('<ns:name>part-%d</ns:name>' % p)
+        s.append('<ns:size>%d</ns:size></ns:parts>' % (i*1000+p))
+    for l in range(2):
+        s.append('<ns:locations><ns:id>%d</ns:id>' % l)
+        s.append('<ns:server>server%d.example.com</ns:server>' % l)
+        s.append('<ns:path>/builds/%d/%d</ns:path>' % (i, l))
+        s.append('<ns:protocol>ftp</ns:protocol>')
+        s.append('<ns:uri>ftp://server%d.example.com/builds/%d</ns:uri>' % (l, i))
+        s.append('</ns:locations>')
+    for m in range(2):
+        s.append('<ns:metadata><ns:key>key%d</ns:key>' % m)
+        s.append('<ns:value>value %d</ns:value></ns:metadata>' % i)
+    s.append('<ns:fileinfo><ns:path>/builds/%d/image.iso</ns:path>' % i)
+    s.append('<ns:size>%d</ns:size>' % (i*4096))
+    s.append('<ns:md5>%.32x</ns:md5>' % i)
+    s.append('<ns:modified>2010-06-01T12:00:00Z</ns:modified>')
+    s.append('</ns:fileinfo>')
+    s.append('</ns:return>')
+    return ''.join(s)
+
+
+def synthetic_reply(n):
+    """
+    Get a synthetic I{queryBuilds} reply of I{n} builds.
+    @param n: The number of builds.
+    @type n: int
+    @return: The reply (xml) text.
+    @rtype: str
+    """
+    s = []
+    s.append('<?xml version="1.0" encoding="UTF-8"?>')
+    s.append('<SOAP-ENV:Envelope')
+    s.append(' xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/"')
+    s.append(' xmlns:ns="urn:benchmark">')
+    s.append('<SOAP-ENV:Body><ns:queryBuildsResponse>')
+    for i in range(n):
+        s.append(synthetic_build(i))
+    s.append('</ns:queryBuildsResponse></SOAP-ENV:Body>')
+    s.append('</SOAP-ENV:Envelope>')
+    return ''.join(s)
+
+
+class Codex:
+    """
+    The synthetic (Codex like) service used by the I{codex} benchmarks.
+    The WSDL is written into a temporary directory (removed by
+    L{cleanup()}) and loaded using a I{file://} url.
+    @ivar dir: The temporary directory.
+    @type dir: str
+    @ivar url: The WSDL url.
+    @type url: str
+    """
+
+    def __init__(self):
+        self.dir = tempfile.mkdtemp(prefix='suds-benchmark-')
+        path = os.path.join(self.dir, 'codex.wsdl')
+        fp = open(path, 'w')
+        try:
+            fp.write(synthetic_wsdl())
+        finally:
+            fp.close()
+        self.url = 'file://%s' % path
+
+    def client(self, **kwargs):
+        """
+        Get a client for the service.
+        @param kwargs: The client options.
+        @type kwargs: dict
+        @return: A client.
+        @rtype: L{suds.client.Client}
+        """
+        from suds.client import Client
+        from suds.cache import NoCache
+        kwargs.setdefault('cache', NoCache())
+        return Client(self.url, **kwargs)
+
+    def cache(self):
+        """
+        Get a (pickled) object cache in the temporary directory.
+        @return: The cache.
+        @rtype: L{suds.cache.ObjectCache}
+        """
+        from suds.cache import ObjectCache
+        return ObjectCache(location=os.path.join(self.dir, 'cache'))
+
+    def builds(self, client, n):
+        """
+        Get I{n} (fully populated) build objects.
+        @param client: A client.
+        @type client: L{suds.client.Client}
+        @param n: The number of builds.
+        @type n: int
+        @return: The builds.
+        @rtype: [L{Object},..]
+        """
+        factory = client.factory
+        result = []
+        for i in range(n):
+            build = factory.create('Build')
+            build._state = 'released'
+            build.id = i
+            build.name = 'build-%d & co' % i
+            build.product = 'product-%d' % (i % 10)
+            build.version = '1.%d' % (i % 100)
+            build.created = '2010-06-01T12:00:00Z'
+            build.certified = True
+            for p in range(3):
+                part = factory.create('Part')
+                part.id = p
+                part.name = 'part-%d' % p
+                part.size = i*1000+p
+                build.parts.append(part)
+            for l in range(2):
+                location = factory.create('Location')
+                location.id = l
+                location.server = 'server%d.example.com' % l
+                location.path = '/builds/%d/%d' % (i, l)
+                location.protocol = 'ftp'
+                location.uri = 'ftp://server%d.example.com/builds/%d' % (l, i)
+                build.locations.append(location)
+            for m in range(2):
+                metadata = factory.create('Metadata')
+                metadata.key = 'key%d' % m
+                metadata.value = 'value %d' % i
+                build.metadata.append(metadata)
+            fileinfo = factory.create('FileInfo')
+            fileinfo.path = '/builds/%d/image.iso' % i
+            fileinfo.size = i*4096
+            fileinfo.md5 = '%.32x' % i
+            fileinfo.modified = '2010-06-01T12:00:00Z'
+            build.fileinfo = fileinfo
+            result.append(build)
+        return result
+
+    def cleanup(self):
+        """
+        Remove the temporary directory.
+        """
+        shutil.rmtree(self.dir, True)
+
+
+def wsdl(n):
+    """
+    Benchmark loading the (codex) WSDL I{n} times without caching.
+    @param n: The number of loads.
+    @type n: int
+    @return: The timer and the number of loads.
+    @rtype: (L{Timer}, int)
+    """
+    codex = Codex()
+    try:
+        timer = Timer()
+        timer.start()
+        for i in range(n):
+            codex.client()
+        timer.stop()
+        return (timer, n)
+    finally:
+        codex.cleanup()
+
+
+def wsdlcached(n):
+    """
+    Benchmark loading the (codex) WSDL I{n} times from the
+    (pickled) object cache.  The cache is loaded first (untimed).
+    @param n: The number of loads.
+    @type n: int
+    @return: The timer and the number of loads.
+    @rtype: (L{Timer}, int)
+    """
+    codex = Codex()
+    try:
+        cache = codex.cache()
+        codex.client(cache=cache, cachingpolicy=1)
+        timer = Timer()
+        timer.start()
+        for i in range(n):
+            codex.client(cache=cache, cachingpolicy=1)
+        timer.stop()
+        return (timer, n)
+    finally:
+        codex.cleanup()
+
+
+def envelope(n):
+    """
+    Benchmark generating (marshalling and serializing) the
+    I{addBuilds} soap envelope for I{n} builds.
+    @param n: The number of builds.
+    @type n: int
+    @return: The timer and the number of builds.
+    @rtype: (L{Timer}, int)
+    """
+    from suds.client import SoapClient
+    codex = Codex()
+    try:
+        client = codex.client()
+        builds = codex.builds(client, n)
+        method = client.service.addBuilds.method
+        binding = method.binding.input
+        timer = Timer()
+        timer.start()
+        soapenv = binding.get_message(method, (builds,), {})
+        SoapClient(client, method).request(soapenv)
+        timer.stop()
+        return (timer, n)
+    finally:
+        codex.cleanup()
+
+
+def request(n):
+    """
+    Benchmark generating (marshalling and serializing) I{n}
+    (scalar parameter) I{getBuild} soap envelopes.
+    @param n: The number of envelopes.
+    @type n: int
+    @return: The timer and the number of envelopes.
+    @rtype: (L{Timer}, int)
+    """
+    from suds.client import SoapClient
+    codex = Codex()
+    try:
+        client = codex.client()
+        method = client.service.getBuild.method
+        binding = method.binding.input
+        timer = Timer()
+        timer.start()
+        for i in xrange(n):
+            soapenv = binding.get_message(method, (i,), {})
+            SoapClient(client, method).request(soapenv)
+        timer.stop()
+        return (timer, n)
+    finally:
+        codex.cleanup()
+
+
+def parse(n):
+    """
+    Benchmark (sax) parsing a I{queryBuilds} reply of I{n} builds.
+    @param n: The number of builds.
+    @type n: int
+    @return: The timer and the number of builds.
+    @rtype: (L{Timer}, int)
+    """
+    reply = synthetic_reply(n)
+    timer = Timer()
+    timer.start()
+    Parser(Options().expat).parse(string=reply)
+    timer.stop()
+    return (timer, n)
+
+
+def reply(n):
+    """
+    Benchmark processing (parsing and unmarshalling) a I{queryBuilds}
+    reply of I{n} builds using the L{SimClient} loopback.
+    @param n: The number of builds.
+    @type n: int
+    @return: The timer and the number of builds.
+    @rtype: (L{Timer}, int)
+    """
+    codex = Codex()
+    try:
+        client = codex.client()
+        inject = dict(reply=synthetic_reply(n))
+        timer = Timer()
+        timer.start()
+        client.service.queryBuilds('product-1', n, __inject=inject)
+        timer.stop()
+        return (timer, n)
+    finally:
+        codex.cleanup()
+
+
+def stream(n):
+    """
+    Benchmark processing a I{queryBuilds} reply of I{n} builds as
+    a I{streamed} reply (using compact records) so that the builds
+    are not retained.  Suited for the largest replies.
+    @param n: The number of builds.
+    @type n: int
+    @return: The timer and the number of builds.
+    @rtype: (L{Timer}, int)
+    """
+    codex = Codex()
+    try:
+        client = codex.client(streamreply=True, records=True, expat=True)
+        inject = dict(reply=synthetic_reply(n))
+        timer = Timer()
+        timer.start()
+        for build in client.service.queryBuilds('product-1', n, __inject=inject):
+            pass
+        timer.stop()
+        return (timer, n)
+    finally:
+        codex.cleanup()
+
+
+class Loopback(Transport):
+    """
+    A transport that replies (without I/O) with a canned reply.
+    @ivar reply: The reply message.
+    @type reply: str
+    """
+
+    def __init__(self, reply):
+        """
+        @param reply: The reply message.
+        @type reply: str
+        """
+        Transport.__init__(self)
+        self.reply = reply
+
+    def send(self, request):
+        return Reply(200, {}, self.reply)
+
+
+def call(n):
+    """
+    Benchmark the per-call overhead of I{n} (scalar parameter)
+    I{getBuild} invocations using a L{Loopback} transport and an
+    empty reply so that marshalling and unmarshalling are minimal.
+    @param n: The number of invocations.
+    @type n: int
+    @return: The timer and the number of invocations.
+    @rtype: (L{Timer}, int)
+    """
+    reply = (
+        '<SOAP-ENV:Envelope'
+        ' xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/"'
+        ' xmlns:ns="urn:benchmark">'
+        '<SOAP-ENV:Body><ns:getBuildResponse/></SOAP-ENV:Body>'
+        '</SOAP-ENV:Envelope>')
+    codex = Codex()
+    try:
+        client = codex.client(expat=True)
+        client.set_options(transport=Loopback(reply))
+        timer = Timer()
+        timer.start()
+        for i in xrange(n):
+            client.service.getBuild(i)
+        timer.stop()
+        return (timer, n)
+    finally:
+        codex.cleanup()
+
+
+benchmarks = {
+    'schema' : (schema, (1000, 10000, 50000)),
+    'sobject' : (sobject, (10, 100, 1000)),
+    'wsdl' : (wsdl, (10,)),
+    'wsdlcached' : (wsdlcached, (100,)),
+    'envelope' : (envelope, (10, 100, 1000)),
+    'request' : (request, (10, 1000)),
+    'parse' : (parse, (10, 100, 1000, 10000)),
+    'reply' : (reply, (10, 100, 1000, 10000)),
+    'stream' : (stream, (10, 1000, 100000)),
+    'call' : (call, (10000,)),
+}
+
+
+def peak():
+    """
+    Get the peak memory (RSS) of the process.
+    @return: The peak memory (bytes), else None when not supported.
+    @rtype: int
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return rss
+    return rss*1024
+
+
+def measure(name, n):
+    """
+    Run a benchmark case (in this process).
+    @param name: The benchmark name.
+    @type name: str
+    @param n: The size.
+    @type n: int
+    @return: The result as: {seconds, ops, opsec, peak}.
+    @rtype: dict
+    """
+    fn, sizes = benchmarks[name]
+    timer, ops = fn(n)
+    seconds = timer.duration()
+    if seconds > 0:
+        opsec = ops/seconds
+    else:
+        opsec = None
+    return dict(seconds=seconds, ops=ops, opsec=opsec, peak=peak())
+
+
+def run(name, n):
+    """
+    Run a benchmark case in a (forked) child process so the peak
+    memory is that of the case.  The case is run in this process
+    when fork() is not supported.
+    @param name: The benchmark name.
+    @type name: str
+    @param n: The size.
+    @type n: int
+    @return: The result as: {seconds, ops, opsec, peak}.
+    @rtype: dict
+    """
+    import cPickle as pickle
+    if not hasattr(os, 'fork'):
+        return measure(name, n)
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(r)
+        status = 1
+        try:
+            try:
+                data = pickle.dumps(measure(name, n))
+                while data:
+                    data = data[os.write(w, data):]
+                status = 0
+            except:
+                log.error('%s(%d)', name, n, exc_info=1)
+        finally:
+            os._exit(status)
+    os.close(w)
+    data = []
+    while True:
+        s = os.read(r, 0x10000)
+        if not s:
+            break
+        data.append(s)
+    os.close(r)
+    os.waitpid(pid, 0)
+    if not data:
+        raise Exception('%s(%d) failed' % (name, n))
+    return pickle.loads(''.join(data))
+
+
+def load(path):
+    """
+    Load results (a baseline) from a JSON file.
+    @param path: The file path.
+    @type path: str
+    @return: The results by case, else {} when the file does not exist.
+    @rtype: {str:dict}
+    """
+    if not os.path.exists(path):
+        return {}
+    fp = open(path)
+    try:
+        return json.load(fp)
+    finally:
+        fp.close()
+
+
+def save(path, results):
+    """
+    Save results (a baseline) to a JSON file.
+    @param path: The file path.
+    @type path: str
+    @param results: The results by case.
+    @type results: {str:dict}
+    """
+    fp = open(path, 'w')
+    try:
+        json.dump(results, fp, indent=1, sort_keys=True,
+            separators=(',', ': '))
+        fp.write('\n')
+    finally:
+        fp.close()
+
+
+def report(case, result, base, tolerance):
+    """
+    Format the result of a case compared with its baseline.
+    @param case: The case as: name(size).
+    @type case: str
+    @param result: The result.
+    @type result: dict
+    @param base: The baseline result, else None.
+    @type base: dict
+    @param tolerance: The fraction of the baseline ops/sec (or peak
+        memory) that may be lost (or gained) before reporting a regression.
+    @type tolerance: float
+    @return: The report line and whether it is a regression.
+    @rtype: (str, boolean)
+    """
+    regressed = False
+    s = []
+    s.append('%-20s' % case)
+    s.append('%12.4f s' % result['seconds'])
+    if result['opsec'] is None:
+        s.append('%14s' % '-')
+    else:
+        s.append('%10.1f op/s' % result['opsec'])
+    if result['peak'] is None:
+        s.append('%10s' % '-')
+    else:
+        s.append('%7.1f MB' % (result['peak']/1048576.0))
+    if base is not None:
+        if result['opsec'] and base.get('opsec'):
+            ratio = result['opsec']/base['opsec']
+            s.append('%6.2fx' % ratio)
+            if ratio < (1-tolerance):
+                regressed = True
+        if result['peak'] and base.get('peak'):
+            if result['peak'] > base['peak']*(1+tolerance):
+                regressed = True
+        if regressed:
+            s.append('REGRESSED')
+    return (' '.join(s), regressed)
+
+
+def main(args):
+    """
+    Run the named benchmark (all when not specified) for each of the
+    specified sizes and compare the results with the baseline.
+    @param args: The command line arguments: [options] [name] [size,..]
+    @type args: [str,..]
+    @return: The exit status, 1 when a regression is reported.
+    @rtype: int
+    """
+    names = benchmarks.keys()
+    names.sort()
+    parser = OptionParser(
+        usage='%%prog [options] [name] [size,..]\nnames: %s' % \
+            ', '.join(names))
+    parser.add_option('-b', '--baseline', default=baseline,
+        help='the baseline (JSON) file [default: %default]')
+    parser.add_option('-s', '--save', action='store_true', default=False,
+        help='save the results (of the cases run) in the baseline')
+    parser.add_option('-t', '--tolerance', type='float', default=0.25,
+        help='the regression tolerance [default: %default]')
+    options, args = parser.parse_args(args)
+    if len(args):
+        names = [args[0]]
+    if json is None:
+        options.baseline = None
+    if options.baseline:
+        results = load(options.baseline)
+    else:
+        results = {}
+    regressions = 0
+    for name in names:
+        fn, sizes = benchmarks[name]
+        if len(args) > 1:
+            sizes = [int(a) for a in args[1:]]
+        for n in sizes:
+            case = '%s(%d)' % (name, n)
+            result = run(name, n)
+            line, regressed = \
+                report(case, result, results.get(case), options.tolerance)
+            print line
+            sys.stdout.flush()
+            if regressed:
+                regressions += 1
+            results[case] = result
+    if options.baseline and options.save:
+        save(options.baseline, results)
+    return int(regressions > 0)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
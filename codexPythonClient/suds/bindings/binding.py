@@ -30,11 +30,15 @@ from suds.mx.literal import Literal as MxLiteral
 from suds.umx.basic import Basic as UmxBasic
 from suds.umx.typed import Typed as UmxTyped
 from suds.bindings.multiref import MultiRef
+from suds.bindings.template import Template
 from suds.xsd.query import TypeQuery, ElementQuery
 from suds.xsd.sxbasic import Element as SchemaElement
 from suds.options import Options
+from suds.properties import Unskin
 from suds.plugin import PluginContainer
-from copy import deepcopy 
+from suds.metrics import nosample
+from copy import copy, deepcopy
+from itertools import chain
 
 log = getLogger(__name__)
 
@@ -47,15 +51,25 @@ class Binding:
     soap messages per the WSDL port binding.
     @cvar replyfilter: The reply filter function.
     @type replyfilter: (lambda s,r: r)
+    @ivar templates: The precompiled envelope templates by
+        (method name, prefixes, xstq).  Not pickled (or copied).
+    @type templates: {tuple:L{Template}}
+    @ivar plans: The compiled (typed) unmarshalling plans by return type.
+        Not pickled (or copied), the plans hold generated record classes.
+    @type plans: {L{suds.xsd.sxbase.SchemaObject}:L{suds.umx.plan.Plan}}
     @ivar wsdl: The wsdl.
     @type wsdl: L{suds.wsdl.Definitions}
     @ivar schema: The collective schema contained within the wsdl.
     @type schema: L{xsd.schema.Schema}
-    @ivar options: A dictionary options.
-    @type options: L{Options}
+    @ivar snapshot: The options (snapshot) of the invoking client.
+        See: L{bind()}.
+    @type snapshot: L{suds.properties.Snapshot}
     """
     
     replyfilter = (lambda s,r: r)
+    templates = None
+    plans = None
+    snapshot = None
 
     def __init__(self, wsdl):
         """
@@ -63,25 +77,69 @@ class Binding:
         @type wsdl: L{wsdl.Definitions}
         """
         self.wsdl = wsdl
-        self.multiref = MultiRef()
         
     def schema(self):
         return self.wsdl.schema
     
     def options(self):
-        return self.wsdl.options
+        """
+        Get the options.  These are the options of the invoking client
+        when bound (see: L{bind()}), else the options of the wsdl.
+        @return: An options snapshot.
+        @rtype: L{suds.properties.Snapshot}
+        """
+        if self.snapshot is not None:
+            return self.snapshot
+        return Unskin(self.wsdl.options).snapshot()
+    
+    def bind(self, options):
+        """
+        Get a view of the binding that uses the options of the invoking
+        client.  The binding is shared by all clients (and clones) of the
+        wsdl so the options of the wsdl may be those of another client.
+        The view shares the compiled templates and plans.
+        @param options: The options (snapshot) of the invoking client.
+        @type options: L{suds.properties.Snapshot}
+        @return: The bound view, else I{self} when I{options} is None.
+        @rtype: L{Binding}
+        """
+        if options is None:
+            return self
+        if self.templates is None:
+            self.templates = {}
+        if self.plans is None:
+            self.plans = {}
+        view = copy(self)
+        view.templates = self.templates
+        view.plans = self.plans
+        view.snapshot = options
+        return view
         
     def unmarshaller(self, typed=True):
         """
-        Get the appropriate XML decoder.
+        Get the appropriate XML decoder.  The typed unmarshaller
+        uses (shares) the binding's compiled plans unless disabled.
         @return: Either the (basic|typed) unmarshaller.
         @rtype: L{UmxTyped}
         """
         if typed:
-            return UmxTyped(self.schema())
+            options = self.options()
+            if not options.plans:
+                return UmxTyped(self.schema())
+            if self.plans is None:
+                self.plans = {}
+            return UmxTyped(self.schema(), self.plans, options.records)
         else:
             return UmxBasic()
         
+    def __getstate__(self):
+        nopickle = ('templates', 'plans')
+        state = self.__dict__.copy()
+        for k in nopickle:
+            if k in state:
+                del state[k]
+        return state
+        
     def marshaller(self):
         """
         Get the appropriate XML encoder.
@@ -101,7 +159,7 @@ class Binding:
         """
         raise Exception, 'not implemented'
 
-    def get_message(self, method, args, kwargs):
+    def get_message(self, method, args, kwargs, options=None):
         """
         Get the soap message for the specified method, args and soapheaders.
         This is the entry point for creating the outbound soap message.
@@ -111,10 +169,33 @@ class Binding:
         @type args: list
         @param kwargs: Named (keyword) args for the method invoked.
         @type kwargs: dict
+        @param options: The options of the invoking client, else None
+            to use the options of the wsdl.  See: L{bind()}.
+        @type options: L{suds.properties.Snapshot}
+        @return: The soap envelope.
+        @rtype: L{Document}
+        """
+        if options is not None:
+            return self.bind(options).get_message(method, args, kwargs)
+        template = self.template(method)
+        if template is not None:
+            result = template.render(args, kwargs)
+            if result is not None:
+                return result
+        return self.mkmessage(method, args, kwargs)
+    
+    def mkmessage(self, method, args, kwargs):
+        """
+        Build the soap message for the specified method, args and soapheaders.
+        @param method: The method being invoked.
+        @type method: I{service.Method}
+        @param args: A list of args for the method invoked.
+        @type args: list
+        @param kwargs: Named (keyword) args for the method invoked.
+        @type kwargs: dict
         @return: The soap envelope.
         @rtype: L{Document}
         """
-
         content = self.headercontent(method)
         header = self.header(content)
         content = self.bodycontent(method, args, kwargs)
@@ -127,7 +208,40 @@ class Binding:
             env.refitPrefixes()
         return Document(env)
     
-    def get_reply(self, method, reply):
+    def template(self, method):
+        """
+        Get the precompiled envelope template for the specified method.
+        Templates are compiled on first use and only used when no
+        soap headers, wsse or plugins are specified.
+        @param method: A service method.
+        @type method: I{service.Method}
+        @return: The template, else None when not templated.
+        @rtype: L{Template}
+        """
+        options = self.options()
+        if not options.templates:
+            return None
+        if options.wsse is not None or len(options.plugins):
+            return None
+        headers = options.soapheaders
+        if not isinstance(headers, (tuple,list,dict)) or len(headers):
+            return None
+        if self.templates is None:
+            self.templates = {}
+        key = (method.name, options.prefixes, options.xstq)
+        try:
+            return self.templates[key]
+        except KeyError:
+            pass
+        try:
+            template = Template.compile(self, method)
+        except Exception:
+            log.debug('%s not templated', method.name, exc_info=True)
+            template = None
+        self.templates[key] = template
+        return template
+    
+    def get_reply(self, method, reply, sample=nosample, options=None):
         """
         Process the I{reply} for the specified I{method} by sax parsing the I{reply}
         and then unmarshalling into python object(s).
@@ -135,36 +249,141 @@ class Binding:
         @type method: str
         @param reply: The reply XML received after invoking the specified method.
         @type reply: str
+        @param sample: The metrics sample for the (parse|multiref|unmarshal)
+            phases.  The phases of a I{streamed} reply are not timed.
+        @type sample: L{suds.metrics.Sample}
+        @param options: The options of the invoking client, else None
+            to use the options of the wsdl.  See: L{bind()}.
+        @type options: L{suds.properties.Snapshot}
         @return: The unmarshalled reply.  The returned value is an L{Object} for a
             I{list} depending on whether the service returns a single object or a 
             collection.
         @rtype: tuple ( L{Element}, L{Object} )
         """
+        if options is not None:
+            return self.bind(options).get_reply(method, reply, sample)
         reply = self.replyfilter(reply)
-        sax = Parser()
-        replyroot = sax.parse(string=reply)
+        if self.streamed(method):
+            return self.replystream(method, reply)
+        sample.start('parse')
+        try:
+            sax = Parser(self.options().expat)
+            replyroot = sax.parse(string=reply)
+        finally:
+            sample.stop('parse')
         plugins = PluginContainer(self.options().plugins)
         plugins.message.parsed(reply=replyroot)
         soapenv = replyroot.getChild('Envelope')
         soapenv.promotePrefixes()
         soapbody = soapenv.getChild('Body')
         self.detect_fault(soapbody)
-        soapbody = self.multiref.process(soapbody)
+        sample.start('multiref')
+        try:
+            soapbody = MultiRef().process(soapbody)
+        finally:
+            sample.stop('multiref')
         nodes = self.replycontent(method, soapbody)
         rtypes = self.returned_types(method)
-        if len(rtypes) > 1:
-            result = self.replycomposite(rtypes, nodes)
-            return (replyroot, result)
-        if len(rtypes) == 1:
-            if rtypes[0].unbounded():
-                result = self.replylist(rtypes[0], nodes)
+        sample.start('unmarshal')
+        try:
+            if len(rtypes) > 1:
+                result = self.replycomposite(rtypes, nodes)
                 return (replyroot, result)
-            if len(nodes):
-                unmarshaller = self.unmarshaller()
-                resolved = rtypes[0].resolve(nobuiltin=True)
-                result = unmarshaller.process(nodes[0], resolved)
-                return (replyroot, result)
-        return (replyroot, None)
+            if len(rtypes) == 1:
+                if rtypes[0].unbounded():
+                    result = self.replylist(rtypes[0], nodes)
+                    return (replyroot, result)
+                if len(nodes):
+                    unmarshaller = self.unmarshaller()
+                    resolved = rtypes[0].resolve(nobuiltin=True)
+                    result = unmarshaller.process(nodes[0], resolved)
+                    return (replyroot, result)
+            return (replyroot, None)
+        finally:
+            sample.stop('unmarshal')
+    
+    def streamed(self, method):
+        """
+        Get whether the reply for the specified method is to be
+        I{streamed} (generated).  Only replies that are a list are
+        streamed and only when plugins are not specified.
+        @param method: A service method.
+        @type method: I{service.Method}
+        @rtype: boolean
+        """
+        options = self.options()
+        if not options.streamreply or len(options.plugins):
+            return False
+        rtypes = self.returned_types(method)
+        return ( len(rtypes) == 1 and rtypes[0].unbounded() )
+    
+    def replystream(self, method, reply):
+        """
+        Construct a I{streamed} list reply.  The reply is incrementally
+        parsed as the returned generator is consumed.  Each reply node is
+        unmarshalled and detached from the document as it is closed.
+        The reply is parsed up to the first reply node before returning
+        so that a fault is raised here rather than hidden in an empty
+        generator.
+        @param method: The name of the invoked method.
+        @type method: str
+        @param reply: The reply XML received after invoking the specified method.
+        @type reply: str
+        @return: The (partial) reply document and a generator of the
+            I{unmarshalled} objects.
+        @rtype: tuple ( L{Element}, generator )
+        @raise WebFault: On server, regardless of the I{faults} option.
+            See: L{stream_fault()}.
+        """
+        depth = self.replydepth(method)
+        sax = Parser(self.options().expat)
+        replyroot, nodes = sax.stream(reply, depth)
+        rt = self.returned_types(method)[0]
+        resolved = rt.resolve(nobuiltin=True)
+        unmarshaller = self.unmarshaller()
+        def skipped(node):
+            body = node
+            for n in range(depth-2):
+                body = body.parent
+            return ( body.name != 'Body' or \
+                body.getChild('Fault', envns) is not None )
+        first = []
+        for node in nodes:
+            if not skipped(node):
+                first.append(node)
+                break
+        else:
+            self.stream_fault(replyroot)
+        def generate():
+            for node in chain(first, nodes):
+                if skipped(node):
+                    continue
+                sobject = unmarshaller.process(node, resolved)
+                node.detach()
+                yield sobject
+            soapenv = replyroot.getChild('Envelope')
+            soapbody = soapenv.getChild('Body')
+            self.detect_fault(soapbody)
+        return (replyroot, generate())
+    
+    def stream_fault(self, replyroot):
+        """
+        Detect a soapenv:Fault element in the soap body of a (fully parsed)
+        I{streamed} reply.  Unlike L{detect_fault()}, the fault is raised
+        regardless of the I{faults} option so the client can return the
+        result (500, fault) as it does for a fault reply.
+        @param replyroot: The reply document.
+        @type replyroot: L{Element}
+        @raise WebFault: When found.
+        """
+        soapenv = replyroot.getChild('Envelope')
+        soapbody = soapenv.getChild('Body')
+        fault = soapbody.getChild('Fault', envns)
+        if fault is None:
+            return
+        unmarshaller = self.unmarshaller(False)
+        p = unmarshaller.process(fault)
+        raise WebFault(p, replyroot)
     
     def detect_fault(self, body):
         """
@@ -243,24 +462,39 @@ class Binding:
                 value.append(sobject)          
         return composite
     
-    def get_fault(self, reply):
+    def get_fault(self, reply, sample=nosample, options=None):
         """
         Extract the fault from the specified soap reply.  If I{faults} is True, an
         exception is raised.  Otherwise, the I{unmarshalled} fault L{Object} is
         returned.  This method is called when the server raises a I{web fault}.
         @param reply: A soap reply message.
         @type reply: str
+        @param sample: The metrics sample for the (parse|unmarshal) phases.
+        @type sample: L{suds.metrics.Sample}
+        @param options: The options of the invoking client, else None
+            to use the options of the wsdl.  See: L{bind()}.
+        @type options: L{suds.properties.Snapshot}
         @return: A fault object.
         @rtype: tuple ( L{Element}, L{Object} )
         """
+        if options is not None:
+            return self.bind(options).get_fault(reply, sample)
         reply = self.replyfilter(reply)
-        sax = Parser()
-        faultroot = sax.parse(string=reply)
+        sample.start('parse')
+        try:
+            sax = Parser(self.options().expat)
+            faultroot = sax.parse(string=reply)
+        finally:
+            sample.stop('parse')
         soapenv = faultroot.getChild('Envelope')
         soapbody = soapenv.getChild('Body')
         fault = soapbody.getChild('Fault')
-        unmarshaller = self.unmarshaller(False)
-        p = unmarshaller.process(fault)
+        sample.start('unmarshal')
+        try:
+            unmarshaller = self.unmarshaller(False)
+            p = unmarshaller.process(fault)
+        finally:
+            sample.stop('unmarshal')
         if self.options().faults:
             raise WebFault(p, faultroot)
         return (faultroot, p.detail)
@@ -403,6 +637,17 @@ class Binding:
         """
         raise Exception, 'not implemented'
     
+    def replydepth(self, method):
+        """
+        Get the depth of the reply body content within the reply
+        document where the depth of the <Envelope/> is (1).
+        @param method: A service method.
+        @type method: I{service.Method}
+        @return: The depth of the body content.
+        @rtype: int
+        """
+        raise Exception, 'not implemented'
+    
     def body(self, content):
         """
         Build the B{<Body/>} for an soap outbound message.
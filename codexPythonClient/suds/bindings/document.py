@@ -76,6 +76,13 @@ class Document(Binding):
         else:
             return body.children
         
+    def replydepth(self, method):
+        wrapped = method.soap.output.body.wrapped
+        if wrapped:
+            return 4
+        else:
+            return 3
+        
     def document(self, wrapper):
         """
         Get the document root.  For I{document/literal}, this is the
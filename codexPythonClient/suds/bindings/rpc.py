@@ -61,6 +61,9 @@ class RPC(Binding):
     
     def replycontent(self, method, body):
         return body[0].children
+    
+    def replydepth(self, method):
+        return 4
         
     def method(self, method):
         """
@@ -85,6 +88,13 @@ class Encoded(RPC):
 
     def marshaller(self):
         return MxEncoded(self.schema())
+    
+    def streamed(self, method):
+        #
+        # Encoded replies may contain multiref (href) nodes
+        # which require the entire reply.
+        #
+        return False
 
     def unmarshaller(self, typed=True):
         """
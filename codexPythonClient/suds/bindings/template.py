@@ -0,0 +1,172 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the (LGPL) GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Library Lesser General Public License for more details at
+# ( http://www.gnu.org/licenses/lgpl.html ).
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+# written by: Jeff Ortel ( jortel@redhat.com )
+
+"""
+Provides classes for precompiled soap envelope I{templates}.
+"""
+
+import re
+from logging import getLogger
+from suds import *
+from suds.sax.text import Text
+from suds.sax.document import Document
+from suds.sax.parser import Parser
+
+log = getLogger(__name__)
+
+
+class Template:
+    """
+    A precompiled (plain) soap envelope for a method that has only
+    builtin (scalar) parameters.  The envelope is built (once) by the
+    binding using I{markers} as the parameter values and split into
+    the static text (namespace declarations, wrappers and header) and
+    the parameter I{slots}.  Rendering is then string assembly.
+    @cvar marker: The parameter value marker (by index).
+    @type marker: unicode
+    @cvar scalars: The python types that may be rendered.
+    @type scalars: tuple
+    @ivar pdefs: The parameter definitions as (name, resolved type).
+    @type pdefs: [(str, L{xsd.sxbase.SchemaObject}),..]
+    @ivar parts: The static text and (at odd indexes) the parameter
+        index of each slot.
+    @type parts: [(unicode|int),..]
+    """
+
+    marker = u'\x00%d\x00'
+    pattern = re.compile(u'\x00([0-9]+)\x00')
+    scalars = (basestring, int, long, float)
+
+    @classmethod
+    def compile(cls, binding, method):
+        """
+        Compile the template for the specified I{method}.
+        @param binding: The binding used to build the envelope.
+        @type binding: L{suds.bindings.binding.Binding}
+        @param method: A service method.
+        @type method: I{service.Method}
+        @return: The template, else None when the method has
+            parameters that cannot be templated.
+        @rtype: L{Template}
+        """
+        pdefs = []
+        for pd in binding.param_defs(method):
+            if not cls.templated(pd):
+                return None
+            pdefs.append((pd[0], pd[1].resolve()))
+        args = [cls.marker % n for n in range(len(pdefs))]
+        env = binding.mkmessage(method, args, {})
+        parts = cls.pattern.split(env.plain())
+        slots = []
+        for i in range(1, len(parts), 2):
+            parts[i] = int(parts[i])
+            slots.append(parts[i])
+        slots.sort()
+        if slots != range(len(pdefs)):
+            log.debug('%s: parameter slots not matched', method.name)
+            return None
+        return cls(pdefs, parts)
+
+    @classmethod
+    def templated(cls, pdef):
+        """
+        Get whether the parameter can be templated.  Only (single)
+        elements of builtin types that are not I{xs:any} can be templated.
+        @param pdef: A parameter definition.
+        @type pdef: (I{name}, L{xsd.sxbase.SchemaObject})
+        @rtype: boolean
+        """
+        name, type = pdef
+        if name is None or name.startswith('_'):
+            return False
+        if type.unbounded() or type.any():
+            return False
+        resolved = type.resolve()
+        return ( resolved.builtin() and not resolved.any() )
+
+    def __init__(self, pdefs, parts):
+        """
+        @param pdefs: The parameter definitions as (name, resolved type).
+        @type pdefs: [(str, L{xsd.sxbase.SchemaObject}),..]
+        @param parts: The static text and the parameter index of each slot.
+        @type parts: [(unicode|int),..]
+        """
+        self.pdefs = pdefs
+        self.parts = parts
+
+    def render(self, args, kwargs):
+        """
+        Render the soap envelope using the specified parameter values.
+        Values are translated and escaped exactly as done by the marshaller.
+        @param args: A list of args for the method invoked.
+        @type args: list
+        @param kwargs: Named (keyword) args for the method invoked.
+        @type kwargs: dict
+        @return: The rendered envelope, else None when a value (such
+            as None, a list or an object) cannot be rendered.
+        @rtype: L{Envelope}
+        """
+        n = 0
+        values = []
+        for name, resolved in self.pdefs:
+            if n < len(args):
+                value = args[n]
+            else:
+                value = kwargs.get(name)
+            n += 1
+            if not isinstance(value, self.scalars):
+                return None
+            value = resolved.translate(value, False)
+            if not isinstance(value, basestring):
+                return None
+            values.append(Text(value).escape())
+        s = self.parts[:]
+        for i in range(1, len(s), 2):
+            s[i] = values[s[i]]
+        return Envelope(u''.join(s))
+
+
+class Envelope(Document):
+    """
+    A soap envelope rendered by a L{Template}.  The element tree
+    is only parsed when the L{root()} is requested.
+    @ivar message: The (plain) rendered envelope.
+    @type message: unicode
+    """
+
+    def __init__(self, message):
+        """
+        @param message: The (plain) rendered envelope.
+        @type message: unicode
+        """
+        Document.__init__(self)
+        self.message = message
+
+    def root(self):
+        if not len(self.children):
+            sax = Parser()
+            document = sax.parse(string=self.message.encode('utf-8'))
+            self.append(document.root())
+        return Document.root(self)
+
+    def plain(self):
+        return self.message
+
+    def write(self, out, pretty=False):
+        if pretty:
+            Document.write(self, out, pretty)
+        else:
+            out.write(self.message.encode('utf-8'))
@@ -19,8 +19,12 @@ Contains basic caching classes.
 """
 
 import os
+import new
+import time
 import suds
+from threading import RLock
 from tempfile import gettempdir as tmp
+from tempfile import mkstemp
 from suds.transport import *
 from suds.sax.parser import Parser
 from suds.sax.element import Element
@@ -114,19 +118,228 @@ class NoCache(Cache):
         pass
 
 
+class MemCache(Cache):
+    """
+    A thread-safe, bounded (in-process) memory cache.  When full,
+    the least recently used (LRU) object is evicted.
+    @ivar size: The max number of cached objects.
+    @type size: int
+    @ivar objects: The cached objects by id.
+    @type objects: {id:object}
+    @ivar used: The (logical) time each object was last used, by id.
+    @type used: {id:int}
+    """
+    
+    def __init__(self, size=16):
+        """
+        @param size: The max number of cached objects.
+        @type size: int
+        """
+        self.size = size
+        self.objects = {}
+        self.used = {}
+        self.clock = 0
+        self.__lock = RLock()
+    
+    def get(self, id):
+        self.__lock.acquire()
+        try:
+            object = self.objects.get(id)
+            if object is not None:
+                self.clock += 1
+                self.used[id] = self.clock
+            return object
+        finally:
+            self.__lock.release()
+    
+    def getf(self, id):
+        return None
+    
+    def put(self, id, object):
+        self.__lock.acquire()
+        try:
+            self.clock += 1
+            self.objects[id] = object
+            self.used[id] = self.clock
+            while len(self.objects) > max(self.size, 0):
+                lru = min(self.used, key=self.used.get)
+                log.debug('%s evicted', lru)
+                self.purge(lru)
+            return object
+        finally:
+            self.__lock.release()
+    
+    def putf(self, id, fp):
+        pass
+    
+    def purge(self, id):
+        self.__lock.acquire()
+        try:
+            self.objects.pop(id, None)
+            self.used.pop(id, None)
+        finally:
+            self.__lock.release()
+    
+    def clear(self):
+        self.__lock.acquire()
+        try:
+            self.objects = {}
+            self.used = {}
+        finally:
+            self.__lock.release()
+            
+    def __len__(self):
+        return len(self.objects)
+    
+    def __deepcopy__(self, memo):
+        # shared by cloned clients
+        return self
+
+
+class TieredCache(Cache):
+    """
+    A two tier cache that wraps (any) L{Cache} with a (bounded)
+    in-process L{MemCache} of the I{materialized} objects such as
+    parsed documents and unpickled definitions.  The wrapped cache is
+    only consulted on a memory miss.  Documents are copied (which is much
+    cheaper than parsing) when got and put because they are modified
+    while loaded.  Other objects such as definitions are shared
+    much like a L{suds.client.Client.clone()} and their options are
+    not restored (see: L{suds.reader.DefinitionsReader.restore()}).
+    Eg: Client(url, cache=TieredCache(ObjectCache(days=1)))
+    @ivar cache: The wrapped cache.
+    @type cache: L{Cache}
+    @ivar memory: The memory tier.
+    @type memory: L{MemCache}
+    """
+    
+    def __init__(self, cache, size=64):
+        """
+        @param cache: The wrapped cache.
+        @type cache: L{Cache}
+        @param size: The max number of objects kept in memory.
+        @type size: int
+        """
+        self.cache = cache
+        self.memory = MemCache(size)
+    
+    def get(self, id):
+        object = self.memory.get(id)
+        if object is not None:
+            return self.copy(object)
+        object = self.cache.get(id)
+        if object is not None:
+            self.memory.put(id, self.copy(object))
+        return object
+    
+    def getf(self, id):
+        return self.cache.getf(id)
+    
+    def put(self, id, object):
+        self.memory.put(id, self.copy(object))
+        self.cache.put(id, object)
+        return object
+    
+    def putf(self, id, fp):
+        return self.cache.putf(id, fp)
+    
+    def purge(self, id):
+        self.memory.purge(id)
+        self.cache.purge(id)
+    
+    def clear(self):
+        self.memory.clear()
+        self.cache.clear()
+    
+    def copy(self, object):
+        """
+        Get a copy of the object when it is a document (element tree).
+        @param object: A cached object.
+        @type object: any
+        @return: A copy of the document, else the I{object}.
+        @rtype: any
+        """
+        if not isinstance(object, Element):
+            return object
+        return self.replicate(object, None)
+    
+    def replicate(self, node, parent):
+        """
+        Deep copy the element tree without calling the constructors.
+        @param node: The element to copy.
+        @type node: L{Element}
+        @param parent: The parent of the copy.
+        @type parent: L{Element}
+        @return: The copy.
+        @rtype: L{Element}
+        """
+        d = node.__dict__.copy()
+        d['parent'] = parent
+        d['nsprefixes'] = node.nsprefixes.copy()
+        result = new.instance(node.__class__, d)
+        attributes = []
+        for a in node.attributes:
+            a = new.instance(a.__class__, a.__dict__.copy())
+            a.parent = result
+            attributes.append(a)
+        result.attributes = attributes
+        result.children = \
+            [self.replicate(c, result) for c in node.children]
+        return result
+    
+    def __deepcopy__(self, memo):
+        # shared by cloned clients
+        return self
+
+
 class FileCache(Cache):
     """
-    A file-based URL cache.
+    A file-based URL cache.  Files are written atomically (renamed
+    into place) so that concurrent readers (threads and processes)
+    never see partially written files.  The total size of the cached
+    files is bounded by I{maxsize}, the least recently used files
+    are evicted first.  The total size is tracked as files are written
+    so the I{location} is only scanned when the I{maxsize} is exceeded
+    and every I{scanrate} writes.
     @cvar fnprefix: The file name prefix.
     @type fnsuffix: str
+    @cvar tmpage: The age (seconds) at which abandoned temporary
+        files are deleted.
+    @type tmpage: int
+    @cvar scanrate: The number of writes between scans of the
+        I{location} for expired, abandoned and (externally) written files.
+    @type scanrate: int
+    @cvar headroom: The fraction of I{maxsize} freed beyond the
+        I{maxsize} when files are evicted so that a full cache is not
+        scanned on every write.
+    @type headroom: float
     @ivar duration: The cached file duration which defines how
         long the file will be cached.
     @type duration: (unit, value)
     @ivar location: The directory for the cached files.
     @type location: str
+    @ivar maxsize: The max total size (bytes) of the cached files.
+    @type maxsize: int
+    @ivar size: The (estimated) total size (bytes) of the cached files
+        as of the last scan plus the files written since.  None until
+        the I{location} is first scanned.
+    @type size: int
+    @ivar writes: The number of files written.
+    @type writes: int
+    @ivar hits: The number of files found in the cache.
+    @type hits: int
+    @ivar misses: The number of files not found in the cache.
+    @type misses: int
+    @ivar evictions: The number of files evicted (or expired).
+    @type evictions: int
     """
     fnprefix = 'suds'
     units = ('months', 'weeks', 'days', 'hours', 'minutes', 'seconds')
+    tmpage = 3600
+    scanrate = 64
+    headroom = 0.1
+    __mutex = RLock()
+    __locks = {}
     
     def __init__(self, location=None, **duration):
         """
@@ -141,6 +354,12 @@ class FileCache(Cache):
             location = os.path.join(tmp(), 'suds')
         self.location = location
         self.duration = (None, 0)
+        self.maxsize = 0x4000000
+        self.size = None
+        self.writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
         self.setduration(**duration)
         self.checkversion()
         
@@ -175,6 +394,28 @@ class FileCache(Cache):
         @type location: str
         """
         self.location = location
+        self.size = None
+        
+    def setmaxsize(self, maxsize):
+        """
+        Set the max total size of the cached files.  When exceeded,
+        the least recently used files are evicted.
+        @param maxsize: The max size (bytes).  A maxsize=0 means unlimited.
+        @type maxsize: int
+        """
+        self.maxsize = maxsize
+        return self
+        
+    def stats(self):
+        """
+        Get the cache statistics.
+        @return: The number of I{hits}, I{misses} and I{evictions}.
+        @rtype: dict
+        """
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions)
             
     def mktmp(self):
         """
@@ -189,26 +430,226 @@ class FileCache(Cache):
     
     def put(self, id, bfr):
         try:
-            fn = self.__fn(id)
-            f = self.open(fn, 'w')
-            f.write(bfr)
-            f.close()
-            return bfr
+            self.write(id, bfr)
         except:
             log.debug(id, exc_info=1)
-            return bfr
+        return bfr
         
     def putf(self, id, fp):
+        bfr = fp.read()
+        fp.close()
         try:
-            fn = self.__fn(id)
-            f = self.open(fn, 'w')
-            f.write(fp.read())
-            fp.close()
-            f.close()
+            fn = self.write(id, bfr)
             return open(fn)
         except:
             log.debug(id, exc_info=1)
-            return fp
+            return StringIO(bfr)
+        
+    def write(self, id, bfr):
+        """
+        Write the cached file for I{id}.  The content is written to a
+        temporary file that is then renamed.  Files are evicted as needed
+        to keep the cache within I{maxsize}.
+        @param id: The object id.
+        @type id: str
+        @param bfr: The file content.
+        @type bfr: str
+        @return: The file name.
+        @rtype: str
+        """
+        fn = self.__fn(id)
+        self.lock(fn)
+        try:
+            self.mktmp()
+            prefix = '.%s-' % self.fnprefix
+            fd, tmpfn = mkstemp(prefix=prefix, dir=self.location)
+            try:
+                f = os.fdopen(fd, 'w')
+                try:
+                    f.write(bfr)
+                finally:
+                    f.close()
+                os.chmod(tmpfn, 0644)
+                replaced = self.getsize(fn)
+                self.rename(tmpfn, fn)
+            except:
+                self.remove(tmpfn)
+                raise
+        finally:
+            self.unlock(fn)
+        if self.written(len(bfr)-replaced):
+            self.evict()
+        return fn
+    
+    def written(self, growth):
+        """
+        Account for a written file.
+        @param growth: The change in the total size (bytes).
+        @type growth: int
+        @return: True when the I{location} needs to be scanned (evicted)
+            because the I{maxsize} is exceeded or every I{scanrate} writes.
+        @rtype: bool
+        """
+        self.__mutex.acquire()
+        try:
+            self.writes += 1
+            if self.size is None:
+                return True
+            self.size += growth
+            if self.maxsize > 0 and self.size > self.maxsize:
+                return True
+            return ( self.writes % self.scanrate == 0 )
+        finally:
+            self.__mutex.release()
+    
+    def getsize(self, fn):
+        """
+        Get the size of the file.
+        @param fn: The file name.
+        @type fn: str
+        @return: The size (bytes), 0 when the file does not exist.
+        @rtype: int
+        """
+        try:
+            return os.path.getsize(fn)
+        except OSError:
+            return 0
+    
+    def rename(self, src, dst):
+        """
+        Rename (replace) the file I{dst}.  Where rename cannot replace
+        an existing file (windows), the existing file is deleted first.
+        @param src: The (temporary) file name.
+        @type src: str
+        @param dst: The file name.
+        @type dst: str
+        """
+        try:
+            os.rename(src, dst)
+        except OSError:
+            self.remove(dst)
+            os.rename(src, dst)
+            
+    def remove(self, fn):
+        """
+        Remove the file ignoring errors.
+        @param fn: The file name.
+        @type fn: str
+        @return: True when removed.
+        @rtype: bool
+        """
+        try:
+            os.remove(fn)
+            return True
+        except OSError:
+            return False
+    
+    def evict(self):
+        """
+        Delete the least recently used files until the total size of
+        the cached files is within I{maxsize}, less the I{headroom}
+        once any file must be evicted.  Expired files and abandoned
+        temporary files are also deleted.  The (estimated) I{size} is
+        reset to the total size measured.
+        """
+        if self.maxsize < 1 and self.duration[1] < 1:
+            return
+        try:
+            names = os.listdir(self.location)
+        except OSError:
+            return
+        files = []
+        total = 0
+        now = time.time()
+        prefix = '%s-' % self.fnprefix
+        for name in names:
+            fn = os.path.join(self.location, name)
+            try:
+                st = os.stat(fn)
+            except OSError:
+                continue
+            if name.startswith('.%s' % prefix):
+                if (now - st.st_mtime) > self.tmpage:
+                    self.remove(fn)
+                continue
+            if not name.startswith(prefix):
+                continue
+            if self.expired(st.st_mtime):
+                self.delete(fn)
+                continue
+            files.append((st.st_atime, st.st_size, fn))
+            total += st.st_size
+        if self.maxsize > 0 and total > self.maxsize:
+            limit = self.maxsize - int(self.maxsize*self.headroom)
+            files.sort()
+            for used, size, fn in files:
+                if total <= limit:
+                    break
+                log.debug('%s evicted', fn)
+                self.delete(fn)
+                total -= size
+        self.size = total
+    
+    def delete(self, fn):
+        """
+        Delete (evict) the file under its lock.
+        @param fn: The file name.
+        @type fn: str
+        """
+        self.lock(fn)
+        try:
+            if self.remove(fn):
+                self.count('evictions')
+        finally:
+            self.unlock(fn)
+        
+    def lock(self, fn):
+        """
+        Acquire the (process-wide) lock for the cached file.  The locks
+        are counted and each is dropped by L{unlock()} once no longer
+        in use (held or waited on).
+        @param fn: The file name.
+        @type fn: str
+        """
+        self.__mutex.acquire()
+        try:
+            entry = self.__locks.get(fn)
+            if entry is None:
+                entry = [RLock(), 0]
+                self.__locks[fn] = entry
+            entry[1] += 1
+        finally:
+            self.__mutex.release()
+        entry[0].acquire()
+        
+    def unlock(self, fn):
+        """
+        Release the (process-wide) lock for the cached file acquired
+        by L{lock()}.  The lock is dropped once no longer in use.
+        @param fn: The file name.
+        @type fn: str
+        """
+        self.__mutex.acquire()
+        try:
+            entry = self.__locks[fn]
+            entry[0].release()
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self.__locks[fn]
+        finally:
+            self.__mutex.release()
+    
+    def count(self, name):
+        """
+        Increment the named counter.
+        @param name: The counter (hits|misses|evictions).
+        @type name: str
+        """
+        self.__mutex.acquire()
+        try:
+            setattr(self, name, getattr(self, name)+1)
+        finally:
+            self.__mutex.release()
         
     def get(self, id):
         try:
@@ -223,9 +664,13 @@ class FileCache(Cache):
         try:
             fn = self.__fn(id)
             self.validate(fn)
-            return self.open(fn)
+            fp = self.open(fn)
         except:
-            pass
+            self.count('misses')
+            return None
+        self.touch(fn)
+        self.count('hits')
+        return fp
 
     def validate(self, fn):
         """
@@ -235,12 +680,38 @@ class FileCache(Cache):
         """
         if self.duration[1] < 1:
             return
-        created = dt.fromtimestamp(os.path.getctime(fn))
+        if self.expired(os.path.getmtime(fn)):
+            log.debug('%s expired, deleted', fn)
+            self.delete(fn)
+            
+    def expired(self, written):
+        """
+        Get whether a file written at the specified time
+        has expired based on the I{duration}.
+        @param written: The time the file was written.
+        @type written: float
+        @rtype: bool
+        """
+        if self.duration[1] < 1:
+            return False
+        created = dt.fromtimestamp(written)
         d = { self.duration[0]:self.duration[1] }
         expired = created+timedelta(**d)
-        if expired < dt.now():
-            log.debug('%s expired, deleted', fn)
-            os.remove(fn)
+        return ( expired < dt.now() )
+    
+    def touch(self, fn):
+        """
+        Record the use of the file by setting its access time
+        (used for LRU eviction) leaving the modification time
+        (used for expiration) unchanged.
+        @param fn: The file name.
+        @type fn: str
+        """
+        try:
+            st = os.stat(fn)
+            os.utime(fn, (time.time(), st.st_mtime))
+        except OSError:
+            pass
  
     def clear(self):
         for fn in os.listdir(self.location):
@@ -252,10 +723,11 @@ class FileCache(Cache):
                 
     def purge(self, id):
         fn = self.__fn(id)
+        self.lock(fn)
         try:
-            os.remove(fn)
-        except:
-            pass
+            self.remove(fn)
+        finally:
+            self.unlock(fn)
                 
     def open(self, fn, *args):
         """
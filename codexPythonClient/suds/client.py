@@ -24,8 +24,9 @@ import suds.metrics as metrics
 from cookielib import CookieJar
 from suds import *
 from suds.reader import DefinitionsReader
-from suds.transport import TransportError, Request
+from suds.transport import TransportError, Request, Buffer
 from suds.transport.https import HttpAuthenticated
+from suds.transport.nonblocking import AsyncHttpTransport
 from suds.servicedefinition import ServiceDefinition
 from suds import sudsobject
 from sudsobject import Factory as InstFactory
@@ -39,8 +40,12 @@ from suds.sax.parser import Parser
 from suds.options import Options
 from suds.properties import Unskin
 from urlparse import urlparse
-from copy import deepcopy
+from copy import copy, deepcopy
 from suds.plugin import PluginContainer
+import threading
+from threading import Thread
+from time import time
+from Queue import Queue, Empty
 from logging import getLogger
 
 log = getLogger(__name__)
@@ -164,11 +169,50 @@ class Client(object):
         """
         return self.messages.get('rx')
     
-    def clone(self):
+    def batch(self, workers=4):
+        """
+        Get a new (empty) batch used to invoke methods concurrently.
+        @param workers: The (max) number of worker threads.
+        @type workers: int
+        @return: A new batch.
+        @rtype: L{Batch}
+        """
+        return Batch(self, workers)
+    
+    def map(self, method, arglist, workers=4):
+        """
+        Invoke the I{method} concurrently once for each item in I{arglist}.
+        Each item is a tuple of the (positional) arguments for one
+        invocation.  Any other item is passed as the single argument.
+        @param method: The name of a method (or the method).
+        @type method: (str|L{Method})
+        @param arglist: A list of arguments.
+        @type arglist: list
+        @param workers: The (max) number of worker threads.
+        @type workers: int
+        @return: The invocations, in the order of I{arglist}.
+        @rtype: [L{Invocation},..]
+        """
+        batch = self.batch(workers)
+        for args in arglist:
+            if not isinstance(args, tuple):
+                args = (args,)
+            batch.add(method, *args)
+        return batch.run()
+    
+    def clone(self, shared=False):
         """
         Get a shallow clone of this object.
         The clone only shares the WSDL.  All other attributes are
         unique to the cloned object including options.
+        When I{shared}, the clone's options are a (shallow) copy so the
+        option values (such as the cache and plugins) are shared and the
+        transport shares the connection state (pool) using
+        L{suds.transport.Transport.share()}.  Only the messages, options
+        and soapheaders (a deep copy) are unique to the clone.  Shared
+        clones are cheap and intended for use by (worker) threads.
+        @param shared: Share the option values and connection state.
+        @type shared: boolean
         @return: A shallow clone.
         @rtype: L{Client}
         """
@@ -179,7 +223,13 @@ class Client(object):
         clone.options = Options()
         cp = Unskin(clone.options)
         mp = Unskin(self.options)
-        cp.update(deepcopy(mp))
+        if shared:
+            values = dict(mp.defined)
+            values['transport'] = self.options.transport.share()
+            values['soapheaders'] = deepcopy(self.options.soapheaders)
+            cp.update(values)
+        else:
+            cp.update(deepcopy(mp))
         clone.wsdl = self.wsdl
         clone.factory = self.factory
         clone.service = ServiceSelector(clone, self.wsdl.services)
@@ -201,6 +251,175 @@ class Client(object):
         return ''.join(s)
 
 
+class AsyncClient(Client):
+    """
+    A lightweight web services client that also provides for invoking
+    methods asynchronously.  Methods invoked using the I{aservice} proxy
+    send the soap message without blocking and return a L{Future}.
+    The transport (by default an L{AsyncHttpTransport}) is driven by
+    L{poll()}, L{wait()} or L{Future.result()} so that a single thread
+    can have many messages in flight.
+    @ivar aservice: The service proxy used to invoke operations asynchronously.
+    @type aservice: L{ServiceSelector}
+    """
+
+    def __init__(self, url, **kwargs):
+        """
+        @param url: The URL for the WSDL.
+        @type url: str
+        @param kwargs: keyword arguments.
+        @see: L{Options}
+        """
+        if 'transport' not in kwargs:
+            kwargs['transport'] = AsyncHttpTransport()
+        Client.__init__(self, url, **kwargs)
+        self.aservice = \
+            ServiceSelector(self, self.wsdl.services, AsyncMethod)
+        
+    def poll(self, timeout=None):
+        """
+        Process transport I/O for in-flight messages.
+        @param timeout: The max time (seconds) to wait for I/O.
+        @type timeout: float
+        @return: The number of messages still in flight.
+        @rtype: int
+        """
+        return self.options.transport.poll(timeout)
+    
+    def wait(self, futures=None, timeout=None):
+        """
+        Process transport I/O until the specified I{futures} (or all
+        in-flight messages) are done.
+        @param futures: A list of futures, else all in-flight messages.
+        @type futures: [L{Future},..]
+        @param timeout: The max time (seconds) to wait.
+        @type timeout: float
+        @return: True when done, else False when the I{timeout} expired.
+        @rtype: boolean
+        """
+        if timeout is not None:
+            deadline = time()+timeout
+        while True:
+            if futures is None:
+                pending = self.poll(0)
+            else:
+                pending = len([f for f in futures if not f.done()])
+            if not pending:
+                return True
+            if timeout is None:
+                self.poll()
+                continue
+            remaining = deadline-time()
+            if remaining <= 0:
+                return False
+            self.poll(remaining)
+
+
+class ClientPool:
+    """
+    A thread-safe pool of I{shared} clones of a client.
+    See: L{Client.clone()}.  The clones share the WSDL, factory,
+    option values and connection pool of the client.  A clone is
+    either borrowed using L{get()} and returned using L{put()} or
+    bound to the calling thread using L{local()}.  The options (and
+    soapheaders) of a returned clone are reset to those of the client.
+    @ivar client: The (prototype) client.
+    @type client: L{Client}
+    @ivar size: The max number of idle clones kept, 0=unlimited.
+    @type size: int
+    @ivar idle: The idle clones.
+    @type idle: [L{Client},..]
+    """
+
+    def __init__(self, client, size=0):
+        """
+        @param client: The (prototype) client.
+        @type client: L{Client}
+        @param size: The max number of idle clones kept, 0=unlimited.
+        @type size: int
+        """
+        self.client = client
+        self.size = size
+        self.idle = []
+        self.__local = threading.local()
+        self.__lock = threading.Lock()
+
+    def get(self):
+        """
+        Get (borrow) a clone.
+        @return: An idle clone, else a new clone.
+        @rtype: L{Client}
+        """
+        self.__lock.acquire()
+        try:
+            if len(self.idle):
+                return self.idle.pop()
+        finally:
+            self.__lock.release()
+        return self.client.clone(True)
+
+    def put(self, clone):
+        """
+        Put (return) a borrowed clone.  The clone's options and
+        messages are reset.  The clone is discarded when I{size}
+        clones are already idle.
+        @param clone: A clone.
+        @type clone: L{Client}
+        """
+        self.reset(clone)
+        self.__lock.acquire()
+        try:
+            if self.size and len(self.idle) >= self.size:
+                return
+            self.idle.append(clone)
+        finally:
+            self.__lock.release()
+
+    def local(self):
+        """
+        Get the clone bound to the calling thread.
+        A clone is created on first use (by each thread).
+        @return: The thread's clone.
+        @rtype: L{Client}
+        """
+        clone = getattr(self.__local, 'client', None)
+        if clone is None:
+            clone = self.client.clone(True)
+            self.__local.client = clone
+        return clone
+
+    def reset(self, clone):
+        """
+        Reset the options and messages of a clone.  The soapheaders are
+        reset to a deep copy of the client's because the headers (objects)
+        may have been changed in place.  Empty soapheaders are kept.
+        @param clone: A clone.
+        @type clone: L{Client}
+        """
+        values = dict(Unskin(self.client.options).defined)
+        transport = clone.options.transport
+        values['transport'] = transport
+        soapheaders = clone.options.soapheaders
+        prototype = self.client.options.soapheaders
+        if not (self.empty(soapheaders) and self.empty(prototype)):
+            soapheaders = deepcopy(prototype)
+        values['soapheaders'] = soapheaders
+        Unskin(clone.options).update(values)
+        p = Unskin(self.client.options.transport.options)
+        Unskin(transport.options).update(p)
+        clone.messages = dict(tx=None, rx=None)
+        
+    def empty(self, soapheaders):
+        """
+        Get whether the soapheaders are an empty collection.
+        @param soapheaders: The soapheaders (option).
+        @type soapheaders: (list|tuple|dict|L{Element}|L{Object})
+        @rtype: bool
+        """
+        return ( isinstance(soapheaders, (list, tuple, dict)) and \
+            not len(soapheaders) )
+
+
 class Factory:
     """
     A factory for instantiating types defined in the wsdl
@@ -270,16 +489,21 @@ class ServiceSelector:
     @type __client: L{Client}
     @ivar __services: A list of I{wsdl} services.
     @type __services: list
+    @ivar __methodclass: The method I{execution wrapper} class.
+    @type __methodclass: L{Method}
     """
-    def __init__(self, client, services):
+    def __init__(self, client, services, methodclass=None):
         """
         @param client: A suds client.
         @type client: L{Client}
         @param services: A list of I{wsdl} services.
         @type services: list
+        @param methodclass: The method I{execution wrapper} class.
+        @type methodclass: L{Method}
         """
         self.__client = client
         self.__services = services
+        self.__methodclass = methodclass
     
     def __getattr__(self, name):
         """
@@ -342,7 +566,8 @@ class ServiceSelector:
                     break
         if service is None:
             raise ServiceNotFound, name
-        return PortSelector(self.__client, service.ports, name)
+        return PortSelector(
+            self.__client, service.ports, name, self.__methodclass)
     
     def __ds(self):
         """
@@ -371,8 +596,10 @@ class PortSelector:
     @type __ports: list
     @ivar __qn: The I{qualified} name of the port (used for logging).
     @type __qn: str
+    @ivar __methodclass: The method I{execution wrapper} class.
+    @type __methodclass: L{Method}
     """
-    def __init__(self, client, ports, qn):
+    def __init__(self, client, ports, qn, methodclass=None):
         """
         @param client: A suds client.
         @type client: L{Client}
@@ -380,10 +607,13 @@ class PortSelector:
         @type ports: list
         @param qn: The name of the service.
         @type qn: str
+        @param methodclass: The method I{execution wrapper} class.
+        @type methodclass: L{Method}
         """
         self.__client = client
         self.__ports = ports
         self.__qn = qn
+        self.__methodclass = methodclass
     
     def __getattr__(self, name):
         """
@@ -445,7 +675,8 @@ class PortSelector:
         if port is None:
             raise PortNotFound, qn
         qn = '.'.join((self.__qn, port.name))
-        return MethodSelector(self.__client, port.methods, qn)
+        return MethodSelector(
+            self.__client, port.methods, qn, self.__methodclass)
     
     def __dp(self):
         """
@@ -469,8 +700,10 @@ class MethodSelector:
     @type __methods: dict
     @ivar __qn: The I{qualified} name of the method (used for logging).
     @type __qn: str
+    @ivar __methodclass: The method I{execution wrapper} class.
+    @type __methodclass: L{Method}
     """
-    def __init__(self, client, methods, qn):
+    def __init__(self, client, methods, qn, methodclass=None):
         """
         @param client: A suds client.
         @type client: L{Client}
@@ -478,10 +711,13 @@ class MethodSelector:
         @type methods: dict
         @param qn: The I{qualified} name of the port.
         @type qn: str
+        @param methodclass: The method I{execution wrapper} class.
+        @type methodclass: L{Method}
         """
         self.__client = client
         self.__methods = methods
         self.__qn = qn
+        self.__methodclass = methodclass or Method
     
     def __getattr__(self, name):
         """
@@ -505,7 +741,7 @@ class MethodSelector:
         if m is None:
             qn = '.'.join((self.__qn, name))
             raise MethodNotFound, qn
-        return Method(self.__client, m)
+        return self.__methodclass(self.__client, m)
 
 
 class Method:
@@ -543,7 +779,7 @@ class Method:
         
     def faults(self):
         """ get faults option """
-        return self.client.options.faults
+        return Unskin(self.client.options).snapshot().faults
         
     def clientclass(self, kwargs):
         """ get soap client class """
@@ -553,6 +789,312 @@ class Method:
             return SoapClient
 
 
+class AsyncMethod(Method):
+    """
+    The I{method} (namespace) object used to invoke
+    the method asynchronously.
+    """
+
+    def __call__(self, *args, **kwargs):
+        """
+        Invoke the method without blocking.
+        @return: The pending result.
+        @rtype: L{Future}
+        """
+        if SimClient.simulation(kwargs):
+            future = Future(self.client.options.transport)
+            try:
+                future.set_result(Method.__call__(self, *args, **kwargs))
+            except Exception, e:
+                future.set_error(e)
+            return future
+        client = AsyncSoapClient(self.client, self.method)
+        return client.invoke(args, kwargs)
+
+
+class Future:
+    """
+    The pending result of an asynchronous method invocation.
+    @ivar transport: The transport used to send the message.
+    @type transport: L{suds.transport.Transport}
+    @ivar value: The result of the method invocation.
+    @type value: I{builtin}|I{subclass of} L{Object}
+    @ivar error: The exception raised by the invocation, else None.
+    @type error: Exception
+    @ivar messages: The sent/received messages.
+    @type messages: dict
+    @ivar callbacks: Functions called as: callback(future) when done.
+    @type callbacks: [callable,..]
+    """
+    
+    def __init__(self, transport):
+        """
+        @param transport: The transport used to send the message.
+        @type transport: L{suds.transport.Transport}
+        """
+        self.transport = transport
+        self.value = None
+        self.error = None
+        self.messages = dict(tx=None, rx=None)
+        self.callbacks = []
+        self.__done = False
+        
+    def done(self):
+        """
+        Get whether the invocation has completed.
+        @rtype: boolean
+        """
+        return self.__done
+    
+    def result(self):
+        """
+        Process transport I/O until the invocation has completed.
+        @return: The result of the method invocation.
+        @rtype: I{builtin}|I{subclass of} L{Object}
+        @raise Exception: The exception raised by the invocation.
+        """
+        while not self.__done:
+            if not self.transport.poll():
+                if not self.__done:
+                    raise Exception('not in-flight')
+        if self.error is not None:
+            raise self.error
+        return self.value
+    
+    def add_callback(self, fn):
+        """
+        Add a function to be called as: fn(future) when done.
+        Called immediately when already done.
+        @param fn: A function.
+        @type fn: callable
+        """
+        if self.__done:
+            fn(self)
+        else:
+            self.callbacks.append(fn)
+            
+    def set_result(self, value):
+        """
+        Complete the invocation with the specified result.
+        @param value: The result of the method invocation.
+        @type value: I{builtin}|I{subclass of} L{Object}
+        """
+        self.value = value
+        self.__complete()
+        
+    def set_error(self, error):
+        """
+        Complete the invocation with the specified exception.
+        @param error: The exception raised by the invocation.
+        @type error: Exception
+        """
+        self.error = error
+        self.__complete()
+        
+    def last_sent(self):
+        """
+        Get the I{soap} message sent by this invocation.
+        @return: The sent I{soap} message.
+        @rtype: L{Document}
+        """
+        return self.messages.get('tx')
+    
+    def last_received(self):
+        """
+        Get the I{soap} message received by this invocation.
+        @return: The received I{soap} message.
+        @rtype: L{Document}
+        """
+        return self.messages.get('rx')
+        
+    def __complete(self):
+        self.__done = True
+        callbacks = self.callbacks
+        self.callbacks = []
+        for fn in callbacks:
+            try:
+                fn(self)
+            except:
+                log.error('callback failed', exc_info=1)
+
+
+class Batch:
+    """
+    A batch of method invocations sent concurrently using a pool
+    of worker threads.  Each invocation has its own sent/received
+    messages so L{Client.last_sent()} and L{Client.last_received()}
+    are not updated.  Transports must be thread-safe.
+    @ivar client: A suds client.
+    @type client: L{Client}
+    @ivar workers: The (max) number of worker threads.
+    @type workers: int
+    @ivar invocations: The pending invocations.
+    @type invocations: [L{Invocation},..]
+    """
+
+    def __init__(self, client, workers=4):
+        """
+        @param client: A suds client.
+        @type client: L{Client}
+        @param workers: The (max) number of worker threads.
+        @type workers: int
+        """
+        self.client = client
+        self.workers = workers
+        self.invocations = []
+        
+    def add(self, method, *args, **kwargs):
+        """
+        Add a method invocation.
+        @param method: The name of a method (or the method).
+        @type method: (str|L{Method})
+        @param args: A list of args for the method invoked.
+        @type args: list
+        @param kwargs: Named (keyword) args for the method invoked.
+        @type kwargs: dict
+        @return: The added invocation.
+        @rtype: L{Invocation}
+        """
+        if isinstance(method, basestring):
+            method = getattr(self.client.service, method)
+        invocation = Invocation(method, args, kwargs)
+        self.invocations.append(invocation)
+        return invocation
+    
+    def run(self):
+        """
+        Send all pending invocations and wait for them to complete.
+        Faults and other errors are reported per invocation.
+        @return: The invocations, in the order they were added.
+        @rtype: [L{Invocation},..]
+        """
+        timer = metrics.Timer()
+        timer.start()
+        result = self.invocations
+        self.invocations = []
+        queue = Queue()
+        for invocation in result:
+            queue.put(invocation)
+        threads = []
+        n = max(1, min(self.workers, len(result)))
+        for i in range(n):
+            t = Thread(target=self.worker, args=(queue,))
+            t.setDaemon(True)
+            t.start()
+            threads.append(t)
+        for t in threads:
+            t.join()
+        timer.stop()
+        metrics.log.debug(
+                '%d invocation(s) (%d worker(s)) completed: %s',
+                len(result),
+                n,
+                timer)
+        return result
+    
+    def worker(self, queue):
+        """
+        Worker thread main loop.  Invocations are taken
+        from the I{queue} until empty.
+        @param queue: The pending invocations.
+        @type queue: Queue
+        """
+        while True:
+            try:
+                invocation = queue.get_nowait()
+            except Empty:
+                break
+            invocation()
+            
+    def __len__(self):
+        return len(self.invocations)
+
+
+class Invocation:
+    """
+    A single method invocation within a L{Batch}.
+    @ivar method: The method invoked.
+    @type method: L{Method}
+    @ivar args: A list of args for the method invoked.
+    @type args: list
+    @ivar kwargs: Named (keyword) args for the method invoked.
+    @type kwargs: dict
+    @ivar result: The result of the method invocation.
+    @type result: I{builtin}|I{subclass of} L{Object}
+    @ivar error: The exception raised by the invocation, else None.
+    @type error: Exception
+    @ivar messages: The sent/received messages.
+    @type messages: dict
+    """
+    
+    def __init__(self, method, args, kwargs):
+        """
+        @param method: The method invoked.
+        @type method: L{Method}
+        @param args: A list of args for the method invoked.
+        @type args: list
+        @param kwargs: Named (keyword) args for the method invoked.
+        @type kwargs: dict
+        """
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+        self.result = None
+        self.error = None
+        self.messages = dict(tx=None, rx=None)
+        
+    def __call__(self):
+        """
+        Invoke the method.  A L{WebFault} is returned as the
+        result (500, fault) when the I{faults} option is False,
+        else it is stored as the error, as are all other exceptions.
+        """
+        method = self.method
+        clientclass = method.clientclass(self.kwargs)
+        client = clientclass(method.client, method.method)
+        client.messages = self.messages
+        try:
+            self.result = client.invoke(self.args, self.kwargs)
+        except WebFault, e:
+            if method.faults():
+                self.error = e
+            else:
+                self.result = (500, e)
+        except Exception, e:
+            log.debug(method.method.name, exc_info=1)
+            self.error = e
+            
+    def succeeded(self):
+        """
+        Get whether the invocation succeeded.
+        @return: True when no exception was raised.
+        @rtype: boolean
+        """
+        return ( self.error is None )
+    
+    def last_sent(self):
+        """
+        Get the I{soap} message sent by this invocation.
+        @return: The sent I{soap} message.
+        @rtype: L{Document}
+        """
+        return self.messages.get('tx')
+    
+    def last_received(self):
+        """
+        Get the I{soap} message received by this invocation.
+        @return: The received I{soap} message.
+        @rtype: L{Document}
+        """
+        return self.messages.get('rx')
+    
+    def __str__(self):
+        if self.succeeded():
+            return '%s: %s' % (self.method.method.name, self.result)
+        else:
+            return '%s: (failed) %s' % (self.method.method.name, self.error)
+
+
 class SoapClient:
     """
     A lightweight soap based web client B{**not intended for external use}
@@ -562,8 +1104,12 @@ class SoapClient:
     @type method: L{Method}
     @ivar options: A dictonary of options.
     @type options: dict
+    @ivar messages: The sent/received messages.
+    @type messages: dict
     @ivar cookiejar: A cookie jar.
     @type cookiejar: libcookie.CookieJar
+    @ivar sample: The metrics sample for the invocation.
+    @type sample: L{metrics.Sample}
     """
 
     def __init__(self, client, method):
@@ -575,8 +1121,10 @@ class SoapClient:
         """
         self.client = client
         self.method = method
-        self.options = client.options
+        self.options = Unskin(client.options).snapshot()
+        self.messages = client.messages
         self.cookiejar = CookieJar()
+        self.sample = metrics.nosample
         
     def invoke(self, args, kwargs):
         """
@@ -591,15 +1139,28 @@ class SoapClient:
         timer = metrics.Timer()
         timer.start()
         result = None
-        binding = self.method.binding.input
-        soapenv = binding.get_message(self.method, args, kwargs)
-        timer.stop()
-        metrics.log.debug(
-                "message for '%s' created: %s",
-                self.method.name,
-                timer)
-        timer.start()
-        result = self.send(soapenv)
+        sample = self.start()
+        try:
+            try:
+                binding = self.method.binding.input
+                sample.start('marshal')
+                try:
+                    soapenv = binding.get_message(
+                        self.method, args, kwargs, self.options)
+                finally:
+                    sample.stop('marshal')
+                timer.stop()
+                metrics.log.debug(
+                        "message for '%s' created: %s",
+                        self.method.name,
+                        timer)
+                timer.start()
+                result = self.send(soapenv)
+            except:
+                sample.fail()
+                raise
+        finally:
+            self.record()
         timer.stop()
         metrics.log.debug(
                 "method '%s' invoked: %s",
@@ -607,6 +1168,33 @@ class SoapClient:
                 timer)
         return result
     
+    def start(self):
+        """
+        Start collecting the metrics sample for the invocation
+        when a metrics registry is specified.  A profiled sample is
+        used when the invocation is sampled by the profiler.
+        @return: The sample.
+        @rtype: L{metrics.Sample}
+        """
+        name = self.method.name
+        profiler = self.options.profiler
+        if profiler is not None and profiler.sampled(name):
+            self.sample = profiler.sample(name)
+        elif self.options.metrics is not None:
+            self.sample = metrics.Sample(name)
+        self.sample.start('total')
+        return self.sample
+    
+    def record(self):
+        """
+        Record the metrics sample for the (completed) invocation.
+        """
+        self.sample.stop('total')
+        registry = self.options.metrics
+        if registry is not None:
+            registry.record(self.sample)
+        self.sample.done()
+    
     def send(self, soapenv):
         """
         Send soap message.
@@ -616,39 +1204,73 @@ class SoapClient:
         @rtype: I{builtin} or I{subclass of} L{Object}
         """
         result = None
-        location = self.location()
         binding = self.method.binding.input
         transport = self.options.transport
-        retxml = self.options.retxml
-        prettyxml = self.options.prettyxml
-        log.debug('sending to (%s)\nmessage:\n%s', location, soapenv)
         try:
-            self.last_sent(soapenv)
-            plugins = PluginContainer(self.options.plugins)
-            plugins.message.marshalled(envelope=soapenv.root())
-            if prettyxml:
-                soapenv = soapenv.str()
-            else:
-                soapenv = soapenv.plain()
-            soapenv = soapenv.encode('utf-8')
-            plugins.message.sending(envelope=soapenv)
-            request = Request(location, soapenv)
-            request.headers = self.headers()
-            reply = transport.send(request)
-            ctx = plugins.message.received(reply=reply.message)
-            reply.message = ctx.reply
-            if retxml:
-                result = reply.message
-            else:
-                result = self.succeeded(binding, reply.message)
+            request = self.request(soapenv)
+            self.sample.start('send')
+            try:
+                reply = transport.send(request)
+            finally:
+                self.sample.stop('send')
+            result = self.process(binding, reply)
         except TransportError, e:
-            if e.httpcode in (202,204):
-                result = None
-            else:
-                log.error(self.last_sent())
-                result = self.failed(binding, e)
+            result = self.failed(binding, e)
         return result
     
+    def request(self, soapenv):
+        """
+        Get the transport request used to send the soap message.
+        @param soapenv: A soap envelope to send.
+        @type soapenv: L{Document}
+        @return: A transport request.
+        @rtype: L{Request}
+        """
+        location = self.location()
+        prettyxml = self.options.prettyxml
+        log.debug('sending to (%s)\nmessage:\n%s', location, soapenv)
+        self.last_sent(soapenv)
+        plugins = PluginContainer(self.options.plugins)
+        if len(self.options.plugins):
+            plugins.message.marshalled(envelope=soapenv.root())
+        self.sample.start('serialize')
+        try:
+            message = Buffer()
+            soapenv.write(message, prettyxml)
+        finally:
+            self.sample.stop('serialize')
+        if len(self.options.plugins):
+            plugins.message.sending(envelope=str(message))
+        self.sample.set('request', len(message))
+        if not self.options.transport.buffered:
+            message = str(message)
+        request = Request(location, message)
+        request.headers = self.headers()
+        request.sample = self.sample
+        return request
+    
+    def process(self, binding, reply):
+        """
+        Process the transport reply.
+        @param binding: The binding to be used to process the reply.
+        @type binding: L{bindings.binding.Binding}
+        @param reply: The transport reply.
+        @type reply: L{suds.transport.Reply}
+        @return: The method result.
+        @rtype: I{builtin}, L{Object}
+        @raise WebFault: On server.
+        """
+        if reply is None:
+            return None
+        self.sample.set('reply', len(reply.message))
+        plugins = PluginContainer(self.options.plugins)
+        ctx = plugins.message.received(reply=reply.message)
+        reply.message = ctx.reply
+        if self.options.retxml:
+            return reply.message
+        else:
+            return self.succeeded(binding, reply.message)
+    
     def headers(self):
         """
         Get http headers or the http/https request.
@@ -668,14 +1290,24 @@ class SoapClient:
         @type binding: L{bindings.binding.Binding}
         @param reply: The raw reply text.
         @type reply: str
-        @return: The method result.
+        @return: The method result.  When the I{faults} option is False,
+            a fault in a I{streamed} reply is returned as (500, fault)
+            as it is for a fault reply.  See: L{failed()}.
         @rtype: I{builtin}, L{Object}
         @raise WebFault: On server.
         """
         log.debug('http succeeded:\n%s', reply)
         plugins = PluginContainer(self.options.plugins)
         if len(reply) > 0:
-            reply, result = binding.get_reply(self.method, reply)
+            try:
+                reply, result = binding.get_reply(
+                    self.method, reply, self.sample, self.options)
+            except WebFault, e:
+                if self.options.faults:
+                    raise
+                self.sample.fail()
+                self.last_received(e.document)
+                return (500, getattr(e.fault, 'detail', None))
             self.last_received(reply)
         else:
             result = None
@@ -695,11 +1327,16 @@ class SoapClient:
         @type error: L{transport.TransportError}
         """
         status, reason = (error.httpcode, tostr(error))
+        if status in (202,204):
+            return None
+        self.sample.fail()
+        log.error(self.last_sent())
         reply = error.fp.read()
+        self.sample.set('reply', len(reply))
         log.debug('http failed:\n%s', reply)
         if status == 500:
             if len(reply) > 0:
-                r, p = binding.get_fault(reply)
+                r, p = binding.get_fault(reply, self.sample, self.options)
                 self.last_received(r)
                 return (status, p)
             else:
@@ -710,12 +1347,14 @@ class SoapClient:
             return (status, None)
 
     def location(self):
-        p = Unskin(self.options)
-        return p.get('location', self.method.location)
+        location = self.options.location
+        if location is None:
+            return self.method.location
+        return location
     
     def last_sent(self, d=None):
         key = 'tx'
-        messages = self.client.messages
+        messages = self.messages
         if d is None:
             return messages.get(key)
         else:
@@ -723,13 +1362,87 @@ class SoapClient:
         
     def last_received(self, d=None):
         key = 'rx'
-        messages = self.client.messages
+        messages = self.messages
         if d is None:
             return messages.get(key)
         else:
             messages[key] = d
 
 
+class AsyncSoapClient(SoapClient):
+    """
+    A lightweight soap based web client that sends the soap message
+    without blocking using L{suds.transport.Transport.submit()}.
+    B{**not intended for external use}
+    """
+        
+    def invoke(self, args, kwargs):
+        """
+        Send the required soap message to invoke the specified method
+        @param args: A list of args for the method invoked.
+        @type args: list
+        @param kwargs: Named (keyword) args for the method invoked.
+        @type kwargs: dict
+        @return: The pending result of the method invocation.
+        @rtype: L{Future}
+        """
+        transport = self.options.transport
+        future = Future(transport)
+        self.messages = future.messages
+        sample = self.start()
+        try:
+            binding = self.method.binding.input
+            sample.start('marshal')
+            try:
+                soapenv = binding.get_message(
+                    self.method, args, kwargs, self.options)
+            finally:
+                sample.stop('marshal')
+            request = self.request(soapenv)
+        except:
+            sample.fail()
+            self.record()
+            raise
+        def callback(reply, error):
+            self.completed(future, reply, error)
+        transport.submit(request, callback)
+        return future
+    
+    def completed(self, future, reply, error):
+        """
+        The soap message has been sent and the reply (or error)
+        received.  Process the reply and complete the I{future}.
+        @param future: The pending result.
+        @type future: L{Future}
+        @param reply: The transport reply.
+        @type reply: L{suds.transport.Reply}
+        @param error: The exception raised by the transport, else None.
+        @type error: Exception
+        """
+        binding = self.method.binding.input
+        try:
+            if isinstance(error, TransportError):
+                result = self.failed(binding, error)
+            elif error is None:
+                result = self.process(binding, reply)
+            else:
+                raise error
+        except WebFault, e:
+            self.sample.fail()
+            self.record()
+            if self.options.faults:
+                future.set_error(e)
+            else:
+                future.set_result((500, e))
+        except Exception, e:
+            self.sample.fail()
+            self.record()
+            future.set_error(e)
+        else:
+            self.record()
+            future.set_result(result)
+
+
 class SimClient(SoapClient):
     """
     Loopback client used for message/reply simulation.
@@ -762,14 +1475,14 @@ class SimClient(SoapClient):
             if fault is not None:
                 return self.__fault(fault)
             raise Exception('(reply|fault) expected when msg=None')
-        sax = Parser()
+        sax = Parser(self.options.expat)
         msg = sax.parse(string=msg)
         return self.send(msg)
     
     def __reply(self, reply, args, kwargs):
         """ simulate the reply """
         binding = self.method.binding.input
-        msg = binding.get_message(self.method, args, kwargs)
+        msg = binding.get_message(self.method, args, kwargs, self.options)
         log.debug('inject (simulated) send message:\n%s', msg)
         binding = self.method.binding.output
         return self.succeeded(binding, reply)
@@ -778,7 +1491,7 @@ class SimClient(SoapClient):
         """ simulate the (fault) reply """
         binding = self.method.binding.output
         if self.options.faults:
-            r, p = binding.get_fault(reply)
+            r, p = binding.get_fault(reply, options=self.options)
             self.last_received(r)
             return (500, p)
         else:
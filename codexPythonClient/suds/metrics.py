@@ -19,13 +19,16 @@ The I{metrics} module defines classes and other resources
 designed for collecting and reporting performance metrics.
 """
 
+import os
 import time
+import threading
 from logging import getLogger
 from suds import *
 from math import modf
 
 log = getLogger(__name__)
 
+
 class Timer:
 
     def __init__(self):
@@ -60,3 +63,513 @@ class Timer:
             return '%d.%.3d (seconds)' % jmod(m)
         m = modf(duration/60)
         return '%d.%.3d (minutes)' % jmod(m)
+
+
+class Histogram:
+    """
+    A (cumulative) histogram of observed values.
+    @cvar seconds: The default bucket (upper) bounds for durations.
+    @type seconds: (float,..)
+    @cvar bytes: The default bucket (upper) bounds for sizes.
+    @type bytes: (int,..)
+    @ivar bounds: The bucket (upper) bounds.
+    @type bounds: (float,..)
+    @ivar buckets: The number of values observed in each bucket.
+        The last bucket is (+Inf).
+    @type buckets: [int,..]
+    @ivar count: The number of values observed.
+    @type count: int
+    @ivar sum: The sum of the values observed.
+    @type sum: float
+    @ivar min: The smallest value observed.
+    @type min: float
+    @ivar max: The largest value observed.
+    @type max: float
+    """
+
+    seconds = (
+        0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+        0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    bytes = (
+        0x100, 0x400, 0x1000, 0x4000, 0x10000,
+        0x40000, 0x100000, 0x400000, 0x1000000)
+
+    def __init__(self, bounds=seconds):
+        """
+        @param bounds: The bucket (upper) bounds.
+        @type bounds: (float,..)
+        """
+        self.bounds = bounds
+        self.buckets = [0]*(len(bounds)+1)
+        self.count = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        """
+        Observe (add) a value.
+        @param value: A value.
+        @type value: (int|float)
+        """
+        i = 0
+        for bound in self.bounds:
+            if value <= bound:
+                break
+            i += 1
+        self.buckets[i] += 1
+        self.count += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def mean(self):
+        """
+        Get the mean of the values observed.
+        @return: The mean, else None when nothing observed.
+        @rtype: float
+        """
+        if self.count:
+            return float(self.sum)/self.count
+        return None
+
+    def cumulative(self):
+        """
+        Get the cumulative bucket counts.
+        @return: A list of (bound, count) where the bound of
+            the last bucket is (+Inf).
+        @rtype: [(str, int),..]
+        """
+        result = []
+        total = 0
+        bounds = [self.label(b) for b in self.bounds]
+        bounds.append('+Inf')
+        for bound, n in zip(bounds, self.buckets):
+            total += n
+            result.append((bound, total))
+        return result
+
+    @classmethod
+    def label(cls, bound):
+        """
+        Get the exact (text) representation of a bucket bound.
+        Whole numbers (such as byte sizes) are not rounded
+        to (or written in) exponent notation.
+        @param bound: A bucket bound.
+        @type bound: (int|float)
+        @return: The bound as text.
+        @rtype: str
+        """
+        bound = float(bound)
+        if bound == int(bound):
+            return str(int(bound))
+        return repr(bound)
+
+    def dict(self):
+        """
+        Get a dictionary representation.
+        @rtype: dict
+        """
+        return dict(
+            count=self.count,
+            sum=self.sum,
+            min=self.min,
+            max=self.max,
+            mean=self.mean(),
+            buckets=self.cumulative())
+
+    def __str__(self):
+        return 'count=%d sum=%g min=%s max=%s' % \
+            (self.count, self.sum, self.min, self.max)
+
+
+class Sample:
+    """
+    The metrics collected for a single (soap) method invocation.
+    Phases are timed using L{start()} and L{stop()} and the time
+    of a phase is accumulated when timed more than once.
+    @ivar operation: The (method) name.
+    @type operation: str
+    @ivar values: The measured values by metric name.
+    @type values: {str:(int|float)}
+    @ivar started: The start time of running phases by name.
+    @type started: {str:float}
+    @ivar failed: Indicates the invocation failed.
+    @type failed: boolean
+    """
+
+    def __init__(self, operation):
+        """
+        @param operation: The (method) name.
+        @type operation: str
+        """
+        self.operation = operation
+        self.values = {}
+        self.started = {}
+        self.failed = False
+
+    def start(self, phase):
+        """
+        Start timing a phase.
+        @param phase: The phase (metric) name.
+        @type phase: str
+        """
+        self.started[phase] = time.time()
+
+    def stop(self, phase):
+        """
+        Stop timing a phase.  Ignored when the phase is not running.
+        @param phase: The phase (metric) name.
+        @type phase: str
+        """
+        started = self.started.pop(phase, None)
+        if started is not None:
+            self.add(phase, time.time()-started)
+
+    def add(self, name, value):
+        """
+        Add to a measured value.
+        @param name: The metric name.
+        @type name: str
+        @param value: The value added.
+        @type value: (int|float)
+        """
+        self.values[name] = self.values.get(name, 0)+value
+
+    def set(self, name, value):
+        """
+        Set a measured value.
+        @param name: The metric name.
+        @type name: str
+        @param value: The value.
+        @type value: (int|float)
+        """
+        self.values[name] = value
+
+    def fail(self):
+        """
+        Mark the invocation as failed.
+        """
+        self.failed = True
+
+    def done(self):
+        """
+        The invocation has completed (and the sample recorded).
+        """
+        pass
+
+    def __str__(self):
+        return '%s: %s' % (self.operation, self.values)
+
+
+class NoSample(Sample):
+    """
+    The I{null} sample used when metrics are not collected.
+    """
+
+    def __init__(self):
+        Sample.__init__(self, None)
+
+    def start(self, phase):
+        pass
+
+    def stop(self, phase):
+        pass
+
+    def add(self, name, value):
+        pass
+
+    def set(self, name, value):
+        pass
+
+    def fail(self):
+        pass
+
+
+nosample = NoSample()
+
+
+class Registry:
+    """
+    A thread-safe registry of (per operation) metrics.  Each metric
+    of a recorded L{Sample} is observed by a L{Histogram} for the
+    operation.  The metrics recorded for a soap method invocation are:
+        - B{marshal} - Building the soap envelope (seconds).
+        - B{serialize} - Rendering the envelope as XML (seconds).
+        - B{send} - Sending the request and receiving the reply using the
+            transport (seconds).  Not measured for asynchronous invocations.
+        - B{connect} - Opening the connection (seconds).
+        - B{wait} - Sending the request until the reply (headers)
+            is received (seconds).
+        - B{transfer} - Reading the reply content (seconds).
+        - B{parse} - Parsing the reply (seconds).
+        - B{multiref} - Resolving the reply multirefs (seconds).
+        - B{unmarshal} - Building the reply objects (seconds).
+        - B{total} - The whole invocation (seconds).
+        - B{request} - The size of the request message (bytes).
+        - B{reply} - The size of the reply message (bytes).
+    The I{connect} time is only measured when a (new) connection is
+    opened separately from sending the request.  Metrics that are not
+    measured for an invocation are not observed.
+    @cvar units: The unit by metric name.  Metrics not listed are seconds.
+    @type units: {str:str}
+    @cvar prefix: The metric name prefix used by L{prometheus()}.
+    @type prefix: str
+    @ivar histograms: The histograms by (operation, metric).
+    @type histograms: {(str, str):L{Histogram}}
+    @ivar errors: The number of failed invocations by operation.
+    @type errors: {str:int}
+    """
+
+    units = {
+        'request' : 'bytes',
+        'reply' : 'bytes',
+    }
+
+    prefix = 'suds_'
+
+    def __init__(self):
+        self.histograms = {}
+        self.errors = {}
+        self.__lock = threading.Lock()
+
+    def record(self, sample):
+        """
+        Record the values measured by a sample.
+        @param sample: A sample.
+        @type sample: L{Sample}
+        """
+        self.__lock.acquire()
+        try:
+            for name, value in sample.values.items():
+                self.__observe(sample.operation, name, value)
+            if sample.failed:
+                n = self.errors.get(sample.operation, 0)
+                self.errors[sample.operation] = n+1
+        finally:
+            self.__lock.release()
+
+    def observe(self, operation, name, value):
+        """
+        Observe a value.
+        @param operation: The operation (method) name.
+        @type operation: str
+        @param name: The metric name.
+        @type name: str
+        @param value: The observed value.
+        @type value: (int|float)
+        """
+        self.__lock.acquire()
+        try:
+            self.__observe(operation, name, value)
+        finally:
+            self.__lock.release()
+
+    def histogram(self, operation, name):
+        """
+        Get the histogram for an operation's metric.
+        @param operation: The operation (method) name.
+        @type operation: str
+        @param name: The metric name.
+        @type name: str
+        @return: The histogram, else None when nothing observed.
+        @rtype: L{Histogram}
+        """
+        return self.histograms.get((operation, name))
+
+    def operations(self):
+        """
+        Get the names of the operations recorded.
+        @return: A sorted list of operation names.
+        @rtype: [str,..]
+        """
+        result = set([op for op, name in self.histograms.keys()])
+        result.update(self.errors.keys())
+        result = list(result)
+        result.sort()
+        return result
+
+    def snapshot(self):
+        """
+        Get a snapshot of the recorded metrics.
+        @return: {operation:{metric:L{Histogram.dict()}, 'errors':int}}
+        @rtype: dict
+        """
+        result = {}
+        self.__lock.acquire()
+        try:
+            for (op, name), h in self.histograms.items():
+                metrics = result.setdefault(op, {})
+                metrics[name] = h.dict()
+            for op, n in self.errors.items():
+                metrics = result.setdefault(op, {})
+                metrics['errors'] = n
+        finally:
+            self.__lock.release()
+        return result
+
+    def reset(self):
+        """
+        Discard the recorded metrics.
+        """
+        self.__lock.acquire()
+        try:
+            self.histograms = {}
+            self.errors = {}
+        finally:
+            self.__lock.release()
+
+    def prometheus(self):
+        """
+        Get the recorded metrics in the I{Prometheus} text format.
+        @return: The metrics text.
+        @rtype: str
+        """
+        s = []
+        snapshot = self.snapshot()
+        names = set()
+        for metrics in snapshot.values():
+            names.update([n for n in metrics.keys() if n != 'errors'])
+        names = list(names)
+        names.sort()
+        for name in names:
+            metric = '%s%s_%s' % \
+                (self.prefix, name, self.units.get(name, 'seconds'))
+            s.append('# TYPE %s histogram' % metric)
+            for op in sorted(snapshot.keys()):
+                d = snapshot[op].get(name)
+                if d is None:
+                    continue
+                label = 'operation="%s"' % self.escaped(op)
+                for bound, n in d['buckets']:
+                    s.append('%s_bucket{%s,le="%s"} %d' % \
+                        (metric, label, bound, n))
+                s.append('%s_sum{%s} %r' % (metric, label, float(d['sum'])))
+                s.append('%s_count{%s} %d' % (metric, label, d['count']))
+        metric = '%serrors_total' % self.prefix
+        s.append('# TYPE %s counter' % metric)
+        for op in sorted(snapshot.keys()):
+            n = snapshot[op].get('errors', 0)
+            label = 'operation="%s"' % self.escaped(op)
+            s.append('%s{%s} %d' % (metric, label, n))
+        s.append('')
+        return '\n'.join(s)
+
+    def json(self):
+        """
+        Get the recorded metrics in JSON format.
+        @return: The JSON text of the L{snapshot()}.
+        @rtype: str
+        """
+        import json
+        return json.dumps(self.snapshot(), sort_keys=True)
+
+    def dump(self, fp, format='prometheus'):
+        """
+        Write the recorded metrics.
+        @param fp: A file-like object open for writing.
+        @type fp: I{file-like} object
+        @param format: The format (prometheus|json).
+        @type format: str
+        """
+        if format == 'json':
+            fp.write(self.json())
+            fp.write('\n')
+        else:
+            fp.write(self.prometheus())
+
+    def escaped(self, value):
+        """
+        Escape a (prometheus) label value.
+        @param value: A label value.
+        @type value: str
+        @rtype: str
+        """
+        value = str(value)
+        for a, b in (('\\', '\\\\'), ('"', '\\"'), ('\n', '\\n')):
+            value = value.replace(a, b)
+        return value
+
+    def __observe(self, operation, name, value):
+        key = (operation, name)
+        h = self.histograms.get(key)
+        if h is None:
+            if self.units.get(name) == 'bytes':
+                h = Histogram(Histogram.bytes)
+            else:
+                h = Histogram(Histogram.seconds)
+            self.histograms[key] = h
+        h.observe(value)
+
+    def __deepcopy__(self, memo={}):
+        return self
+
+
+class Reporter(threading.Thread):
+    """
+    A (daemon) thread that periodically dumps the metrics of a L{Registry}.
+    The file is (re)written each time so it always contains a complete
+    report.
+    @ivar registry: The registry reported.
+    @type registry: L{Registry}
+    @ivar path: The path of the file written.
+    @type path: str
+    @ivar interval: The number of seconds between reports.
+    @type interval: float
+    @ivar format: The format (prometheus|json).
+    @type format: str
+    """
+
+    def __init__(self, registry, path, interval=60, format='prometheus'):
+        """
+        @param registry: The registry reported.
+        @type registry: L{Registry}
+        @param path: The path of the file written.
+        @type path: str
+        @param interval: The number of seconds between reports.
+        @type interval: float
+        @param format: The format (prometheus|json).
+        @type format: str
+        """
+        threading.Thread.__init__(self, name='suds-metrics')
+        self.setDaemon(True)
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self.format = format
+        self.__stopped = threading.Event()
+
+    def run(self):
+        while True:
+            self.__stopped.wait(self.interval)
+            if self.__stopped.isSet():
+                break
+            self.report()
+
+    def report(self):
+        """
+        Write the report file.  The report is written to a temporary
+        file which is then renamed so readers never see a partial report.
+        """
+        tmp = '%s.tmp' % self.path
+        try:
+            fp = open(tmp, 'w')
+            try:
+                self.registry.dump(fp, self.format)
+            finally:
+                fp.close()
+            os.rename(tmp, self.path)
+        except Exception, e:
+            log.warn('metrics report (%s) failed: %s', self.path, e)
+
+    def stop(self):
+        """
+        Stop the reporter.  The final report is written.
+        """
+        self.__stopped.set()
+        if self.isAlive():
+            self.join()
+        self.report()
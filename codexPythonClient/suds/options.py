@@ -23,6 +23,8 @@ from suds.wsse import Security
 from suds.xsd.doctor import Doctor
 from suds.transport import Transport
 from suds.cache import Cache, NoCache
+from suds.metrics import Registry
+from suds.profiler import Profiler
 
 
 class TpLinker(AutoLinker):
@@ -99,6 +101,56 @@ class Options(Skin):
                 - default: 0
         - B{plugins} - A plugin container.
                 - type: I{list}
+        - B{templates} - Flag that enables precompiled (per method) soap envelope
+            templates.  Used only for methods with builtin (scalar) parameters
+            when no soap headers, wsse or plugins are specified.
+                - type: I{bool}
+                - default: True
+        - B{plans} - Flag that enables compiled (per return type) unmarshalling
+            plans.  The schema lookups for each reply node are done once and
+            reused.  Not used for I{rpc/encoded}.
+                - type: I{bool}
+                - default: True
+        - B{records} - Flag that causes (planned) replies to be unmarshalled into
+            compact (slotted) record objects generated per schema type instead of
+            L{sudsobject.Object}.  Requires I{plans}.  The object overhead is
+            about 10x smaller but the values are not, a reply of short strings
+            retains ~1.4x less memory.  See: L{sudsobject.Record}.
+                - type: I{bool}
+                - default: False
+        - B{streamreply} - Flag that causes methods that return a list to return
+            a generator.  Each object is generated as the reply is (incrementally)
+            parsed and is not retained.  Not supported for I{rpc/encoded}.
+                - type: I{bool}
+                - default: False
+        - B{expat} - Flag that causes XML documents (and replies) to be parsed
+            using the I{pyexpat} backend instead of the I{xml.sax} backend.
+            Attributes are kept in document order (the order of the I{xml.sax}
+            backend is arbitrary).  Documents (and I{streamed} replies) that
+            use undeclared prefixes are parsed using the I{xml.sax} backend.
+                - type: I{bool}
+                - default: False
+        - B{memcache} - Flag that causes loaded WSDL definitions to be kept in a
+            (process-wide) memory cache and shared by clients created for the
+            same URL with the same (definition affecting) options.  Note that
+            clients share definitions much like a L{Client.clone()}.
+                - type: I{bool}
+                - default: False
+        - B{lazy} - Flag that causes the contents of (top level) schema
+            components to be built and dereferenced when first used instead
+            of when the WSDL is loaded.
+                - type: I{bool}
+                - default: False
+        - B{metrics} - The metrics registry.  When specified, the time of each
+            phase of a method invocation (and the message sizes) are recorded
+            per method.  Clones share the registry.
+                - type: L{metrics.Registry}
+                - default: None
+        - B{profiler} - The (sampling) profiler.  When specified, the phases
+            of every I{Nth} invocation of each method are profiled (cProfile)
+            and aggregated reports written per method.  Clones share the profiler.
+                - type: L{profiler.Profiler}
+                - default: None
     """    
     def __init__(self, **kwargs):
         domain = __name__
@@ -119,5 +171,14 @@ class Options(Skin):
             Definition('autoblend', bool, False),
             Definition('cachingpolicy', int, 0),
             Definition('plugins', (list, tuple), []),
+            Definition('templates', bool, True),
+            Definition('plans', bool, True),
+            Definition('records', bool, False),
+            Definition('streamreply', bool, False),
+            Definition('expat', bool, False),
+            Definition('memcache', bool, False),
+            Definition('lazy', bool, False),
+            Definition('metrics', Registry, None),
+            Definition('profiler', Profiler, None),
         ]
         Skin.__init__(self, domain, definitions, kwargs)
@@ -0,0 +1,270 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the (LGPL) GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Library Lesser General Public License for more details at
+# ( http://www.gnu.org/licenses/lgpl.html ).
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+# written by: Jeff Ortel ( jortel@redhat.com )
+
+"""
+The I{profiler} module provides sampled (cProfile) profiling of
+the phases of soap method invocations.
+"""
+
+import os
+import threading
+from logging import getLogger
+from suds import *
+from suds.metrics import Sample
+
+try:
+    import cProfile
+    import pstats
+except ImportError:
+    # not installed (some distributions package it separately)
+    cProfile = None
+
+log = getLogger(__name__)
+
+
+class Profiler:
+    """
+    Profiles (using cProfile) the selected phases of every I{Nth}
+    invocation of each operation (method).  The phases are those timed
+    by the L{Sample} (see: L{suds.metrics.Registry}) and the profile
+    of each is aggregated by (operation, phase).  Selected phases must
+    not enclose each other.  Note: the I{send} phase encloses the
+    transport (connect|wait|transfer) phases.  Phases that start and
+    stop on different threads (such as the transport phases of an
+    asynchronous invocation) are not profiled.
+    @cvar default: The default phases.
+    @type default: (str,..)
+    @ivar every: Every I{Nth} invocation is profiled.
+    @type every: int
+    @ivar phases: The profiled phases.
+    @type phases: (str,..)
+    @ivar path: The directory where the aggregated reports are written
+        (after each profiled invocation), else None.
+    @type path: str
+    @ivar sort: The report sort key.
+    @type sort: str
+    @ivar limit: The number of functions listed in the report.
+    @type limit: int
+    @ivar calls: The number of invocations by operation.
+    @type calls: {str:int}
+    @ivar stats: The aggregated stats by (operation, phase).
+    @type stats: {(str, str):I{pstats.Stats}}
+    """
+
+    default = ('marshal', 'serialize', 'send', 'parse', 'unmarshal')
+
+    def __init__(self, every=100, phases=default, path=None,
+            sort='cumulative', limit=30):
+        """
+        @param every: Every I{Nth} invocation is profiled.
+        @type every: int
+        @param phases: The profiled phases.
+        @type phases: (str,..)
+        @param path: The directory where reports are written, else None.
+        @type path: str
+        @param sort: The report sort key.
+        @type sort: str
+        @param limit: The number of functions listed in the report.
+        @type limit: int
+        """
+        if cProfile is None:
+            raise Exception('cProfile not supported')
+        self.every = max(1, every)
+        self.phases = phases
+        self.path = path
+        self.sort = sort
+        self.limit = limit
+        self.calls = {}
+        self.stats = {}
+        self.__lock = threading.Lock()
+
+    def sampled(self, operation):
+        """
+        Count an invocation of the operation.
+        @param operation: The operation (method) name.
+        @type operation: str
+        @return: True when the invocation is to be profiled.
+        @rtype: boolean
+        """
+        self.__lock.acquire()
+        try:
+            n = self.calls.get(operation, 0)+1
+            self.calls[operation] = n
+            return ( n % self.every == 0 )
+        finally:
+            self.__lock.release()
+
+    def sample(self, operation):
+        """
+        Get a (profiled) sample for an invocation of the operation.
+        @param operation: The operation (method) name.
+        @type operation: str
+        @return: A profiled sample.
+        @rtype: L{ProfiledSample}
+        """
+        return ProfiledSample(self, operation)
+
+    def add(self, operation, phase, profile):
+        """
+        Add (aggregate) the profile of a phase.
+        @param operation: The operation (method) name.
+        @type operation: str
+        @param phase: The phase name.
+        @type phase: str
+        @param profile: A (stopped) profile.
+        @type profile: I{cProfile.Profile}
+        """
+        key = (operation, phase)
+        self.__lock.acquire()
+        try:
+            stats = self.stats.get(key)
+            if stats is None:
+                self.stats[key] = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+        finally:
+            self.__lock.release()
+
+    def operations(self):
+        """
+        Get the names of the profiled operations.
+        @return: A sorted list of operation names.
+        @rtype: [str,..]
+        """
+        result = list(set([op for op, phase in self.stats.keys()]))
+        result.sort()
+        return result
+
+    def report(self, operation, fp):
+        """
+        Write the (text) report of the aggregated profile of
+        each phase of the operation.
+        @param operation: The operation (method) name.
+        @type operation: str
+        @param fp: A file-like object open for writing.
+        @type fp: I{file-like} object
+        """
+        self.__lock.acquire()
+        try:
+            fp.write('operation: %s (%d calls, every %d profiled)\n' % \
+                (operation, self.calls.get(operation, 0), self.every))
+            for phase in self.phases:
+                stats = self.stats.get((operation, phase))
+                if stats is None:
+                    continue
+                fp.write('\nphase: %s\n' % phase)
+                stream = stats.stream
+                stats.stream = fp
+                try:
+                    stats.sort_stats(self.sort).print_stats(self.limit)
+                finally:
+                    stats.stream = stream
+        finally:
+            self.__lock.release()
+
+    def write(self, operation):
+        """
+        Write the aggregated profile of the operation into the I{path}
+        directory as: the <operation>.txt report and a <operation>.<phase>.prof
+        (pstats) file for each phase.
+        @param operation: The operation (method) name.
+        @type operation: str
+        """
+        if self.path is None:
+            return
+        try:
+            fn = os.path.join(self.path, '%s.txt' % operation)
+            fp = open(fn, 'w')
+            try:
+                self.report(operation, fp)
+            finally:
+                fp.close()
+            self.__lock.acquire()
+            try:
+                for phase in self.phases:
+                    stats = self.stats.get((operation, phase))
+                    if stats is None:
+                        continue
+                    fn = '%s.%s.prof' % (operation, phase)
+                    stats.dump_stats(os.path.join(self.path, fn))
+            finally:
+                self.__lock.release()
+        except Exception, e:
+            log.warn('profile (%s) not written: %s', operation, e)
+
+    def reset(self):
+        """
+        Discard the aggregated profiles and invocation counts.
+        """
+        self.__lock.acquire()
+        try:
+            self.calls = {}
+            self.stats = {}
+        finally:
+            self.__lock.release()
+
+    def __deepcopy__(self, memo={}):
+        return self
+
+
+class ProfiledSample(Sample):
+    """
+    A sample that profiles the selected phases as they are timed.
+    The aggregated profile is written by L{done()}.
+    @ivar profiler: The profiler.
+    @type profiler: L{Profiler}
+    @ivar profiles: The running profiles by phase as: (thread, profile).
+    @type profiles: {str:(int, I{cProfile.Profile})}
+    """
+
+    def __init__(self, profiler, operation):
+        """
+        @param profiler: The profiler.
+        @type profiler: L{Profiler}
+        @param operation: The operation (method) name.
+        @type operation: str
+        """
+        Sample.__init__(self, operation)
+        self.profiler = profiler
+        self.profiles = {}
+
+    def start(self, phase):
+        Sample.start(self, phase)
+        if phase not in self.profiler.phases:
+            return
+        profile = cProfile.Profile()
+        self.profiles[phase] = (thread(), profile)
+        profile.enable()
+
+    def stop(self, phase):
+        running = self.profiles.pop(phase, None)
+        if running is not None:
+            started, profile = running
+            if started == thread():
+                profile.disable()
+                self.profiler.add(self.operation, phase, profile)
+        Sample.stop(self, phase)
+
+    def done(self):
+        self.profiler.write(self.operation)
+
+
+def thread():
+    """
+    Get the current thread identifier.
+    @rtype: int
+    """
+    return threading.currentThread().ident
@@ -18,10 +18,13 @@
 Properties classes.
 """
 
+from itertools import count
 from logging import getLogger
 
 log = getLogger(__name__)
 
+serials = count(1)
+
 
 class AutoLinker(object):
     """
@@ -58,6 +61,8 @@ class Link(object):
         self.validate(a, b)
         a.links.append(pB)
         b.links.append(pA)
+        a.touch()
+        b.touch()
             
     def validate(self, pA, pB):
         """
@@ -102,6 +107,8 @@ class Link(object):
             pB.links.remove(pA)
         if pB in pA.links:
             pA.links.remove(pB)
+        pA.touch()
+        pB.touch()
         return self
 
 
@@ -211,6 +218,12 @@ class Properties:
     @type links: [L{Property},..]
     @ivar defined: A dict of property values.
     @type defined: dict 
+    @ivar frozen: The last snapshot taken.
+    @type frozen: L{Snapshot}
+    @ivar serial: The serial number, changed when a property of this
+        object is set or when this object is linked (or unlinked).
+        Used to validate the snapshots of the network.
+    @type serial: int
     """
     def __init__(self, domain, definitions, kwargs):
         """
@@ -228,8 +241,54 @@ class Properties:
         self.links = []
         self.defined = {}
         self.modified = set()
+        self.frozen = None
+        self.serial = 0
         self.prime()
         self.update(kwargs)
+    
+    def touch(self):
+        """
+        Change the serial number so that the snapshots
+        of the network (of linked properties) are rebuilt.
+        """
+        self.serial = serials.next()
+    
+    def snapshot(self):
+        """
+        Get a (frozen) snapshot of the values of I{all} properties
+        (including linked properties).  The snapshot is kept and rebuilt
+        only after a property in the network is set (changed) or the
+        network is linked (or unlinked).  Reading a snapshot attribute is
+        a plain attribute lookup.  Note: values are not copied so changes
+        made to (mutable) values are seen.
+        @return: The snapshot.
+        @rtype: L{Snapshot}
+        """
+        frozen = getattr(self, 'frozen', None)
+        if frozen is not None and frozen.current():
+            return frozen
+        taken = [(p, p.serial) for p in self.network()]
+        frozen = Snapshot(self, taken)
+        self.frozen = frozen
+        return frozen
+    
+    def network(self, result=None):
+        """
+        Get I{all} the properties objects in the network (including
+        this object).
+        @param result: The objects already found.
+        @type result: [L{Properties},..]
+        @return: A list of properties objects.
+        @rtype: [L{Properties},..]
+        """
+        if result is None:
+            result = []
+        result.append(self)
+        for x in self.links:
+            if x in result:
+                continue
+            x.network(result)
+        return result
         
     def definition(self, name):
         """
@@ -426,7 +485,10 @@ class Properties:
         prev = self.defined[name]
         self.defined[name] = value
         self.modified.add(name)
+        if value is prev:
+            return
         d.linker.updated(self, prev, value)
+        self.touch()
         
     def __get(self, name, *df):
         d = self.definition(name)
@@ -451,6 +513,11 @@ class Properties:
             history.remove(self)
         return '\n'.join(s)
             
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['frozen'] = None
+        return state
+            
     def __repr__(self):
         return str(self)
             
@@ -458,6 +525,52 @@ class Properties:
         return self.str([])
 
 
+class Snapshot(object):
+    """
+    A frozen snapshot of the values of a network of properties.
+    The values are plain (read-only) attributes.
+    @ivar __serials__: The serial number of each properties object
+        in the network when taken.
+    @type __serials__: [(L{Properties}, int),..]
+    """
+    
+    def __init__(self, properties, serials):
+        """
+        @param properties: The properties.
+        @type properties: L{Properties}
+        @param serials: The serial number of each properties
+            object in the network (read before the values).
+        @type serials: [(L{Properties}, int),..]
+        """
+        d = self.__dict__
+        for name in properties.keys():
+            d[name] = properties.get(name)
+        d['__serials__'] = serials
+    
+    def current(self):
+        """
+        Get whether the snapshot is current.  That is: no property in
+        the network has been set and the network has not been linked
+        (or unlinked) since the snapshot was taken.
+        @rtype: bool
+        """
+        for p, serial in self.__serials__:
+            if p.serial != serial:
+                return False
+        return True
+        
+    def __setattr__(self, name, value):
+        raise AttributeError('%s: snapshot is read-only' % name)
+    
+    def __str__(self):
+        s = []
+        for item in self.__dict__.items():
+            if item[0] != '__serials__':
+                s.append('%s=%s' % item)
+        s.sort()
+        return '\n'.join(s)
+
+
 class Skin(object):
     """
     The meta-programming I{skin} around the L{Properties} object.
@@ -18,13 +18,21 @@
 Contains xml document reader classes.
 """
 
-
+import os
+import suds
+from hashlib import sha1
+from urlparse import urlparse
+from urllib import url2pathname
 from suds.sax.parser import Parser
 from suds.transport import Request
-from suds.cache import Cache, NoCache
+from suds.cache import Cache, NoCache, MemCache
 from suds.store import DocumentStore
 from suds.plugin import PluginContainer
 from logging import getLogger
+try:
+    import cPickle as pickle
+except:
+    import pickle
 
 
 log = getLogger(__name__)
@@ -33,9 +41,14 @@ log = getLogger(__name__)
 class Reader:
     """
     The reader provides integration with cache.
+    @cvar keyed: The names of options that affect the object that is
+        cached and are part of the cache key.
+    @type keyed: (str,..)
     @ivar options: An options object.
     @type options: I{Options}
     """
+    
+    keyed = ('plugins',)
 
     def __init__(self, options):
         """
@@ -47,11 +60,67 @@ class Reader:
 
     def mangle(self, name, x):
         """
-        Mangle the name by hashing the I{name} and appending I{x}.
+        Mangle the name into a (stable) content addressed cache key by
+        hashing (SHA-1) the suds version, I{name}, the I{validator} of the
+        document and the values of the L{keyed} options and appending I{x}.
+        @param name: A document url.
+        @type name: str
+        @param x: The type of cached object.
+        @type x: str
         @return: the mangled name.
         """
-        h = abs(hash(name))
+        if isinstance(name, unicode):
+            name = name.encode('utf-8')
+        key = (
+            suds.__version__,
+            name,
+            x,
+            self.validator(name),
+            self.fingerprint(self.keyed),)
+        h = sha1(repr(key)).hexdigest()
         return '%s-%s' % (h, x)
+    
+    def validator(self, url):
+        """
+        Get the validator for the document at the specified I{url}.  It
+        changes when the document is changed.  Only local (file:) documents
+        are validated (modification time and size), others are only
+        validated by the cache I{duration}.
+        @param url: A document url.
+        @type url: str
+        @return: The validator, else None.
+        @rtype: str
+        """
+        scheme, netloc, path = urlparse(url)[:3]
+        if scheme != 'file':
+            return None
+        try:
+            st = os.stat(url2pathname(path))
+            return '%d-%d' % (st.st_mtime, st.st_size)
+        except OSError:
+            return None
+    
+    def fingerprint(self, names):
+        """
+        Get a fingerprint of the values of the specified options.  Values
+        are compared by content (pickled) when possible, else by identity
+        which (safely) never matches in another process.
+        @param names: A list of option names.
+        @type names: [str,..]
+        @return: The fingerprint.
+        @rtype: tuple
+        """
+        result = []
+        for name in names:
+            value = getattr(self.options, name)
+            if not isinstance(value, (bool, int, long, basestring)) \
+                and value is not None:
+                    try:
+                        value = pickle.dumps(value, 2)
+                    except:
+                        value = (value.__class__.__name__, id(value))
+            result.append((name, value))
+        return tuple(result)
 
 
 class DocumentReader(Reader):
@@ -97,7 +166,7 @@ class DocumentReader(Reader):
         fp.close()
         ctx = self.plugins.document.loaded(url=url, document=content)
         content = ctx.document 
-        sax = Parser()
+        sax = Parser(self.options.expat)
         return sax.parse(string=content)
     
     def cache(self):
@@ -116,11 +185,43 @@ class DefinitionsReader(Reader):
     """
     The WSDL definitions reader provides an integration
     between the Definitions and the object cache.
+    @cvar memory: The (process-wide) memory cache used
+        when the I{memcache} option is set.
+    @type memory: L{MemCache}
+    @cvar fingerprinted: The names of options that affect the
+        definitions (and bindings) and that are part of the key
+        used for the I{memory} cache.
+    @type fingerprinted: (str,..)
+    @cvar keyed: The names of options that affect the (pickled)
+        definitions and are part of the cache key.
+    @type keyed: (str,..)
     @ivar fn: A factory function (constructor) used to
         create the object not found in the cache.
     @type fn: I{Constructor}
     """
     
+    memory = MemCache(16)
+    
+    fingerprinted = (
+        'faults',
+        'doctor',
+        'xstq',
+        'prefixes',
+        'autoblend',
+        'plugins',
+        'templates',
+        'streamreply',
+        'expat',
+        'lazy',
+    )
+    
+    keyed = (
+        'doctor',
+        'plugins',
+        'autoblend',
+        'lazy',
+    )
+    
     def __init__(self, options, fn):
         """
         @param options: An options object.
@@ -140,11 +241,20 @@ class DefinitionsReader(Reader):
         I{options} attribute is restored.
         If not found, it is downloaded and instantiated using the 
         I{fn} constructor and added to the cache for the next open().
+        Definitions found in the (process-wide) I{memory} cache are
+        shared and returned unchanged.  Their options are those of the
+        client that loaded them, the bindings use the options of the
+        invoking client.
         @param url: A WSDL url.
         @type url: str.
         @return: The WSDL object.
         @rtype: I{Definitions}
         """
+        if self.options.memcache:
+            key = (url, self.fingerprint(self.fingerprinted))
+            d = self.memory.get(key)
+            if d is not None:
+                return d
         cache = self.cache()
         id = self.mangle(url, 'wsdl')
         d = cache.get(id)
@@ -152,10 +262,25 @@ class DefinitionsReader(Reader):
             d = self.fn(url, self.options)
             cache.put(id, d)
         else:
-            d.options = self.options
-            for imp in d.imports:
-                imp.imported.options = self.options
+            self.restore(d)
+        if self.options.memcache:
+            self.memory.put(key, d)
         return d
+    
+    def restore(self, d):
+        """
+        Restore the I{options} of cached (unpickled) definitions.
+        Definitions that have options are shared (such as those kept
+        in the memory tier of a L{suds.cache.TieredCache}) and are
+        not changed.
+        @param d: The cached definitions.
+        @type d: I{Definitions}
+        """
+        if getattr(d, 'options', None) is not None:
+            return
+        d.options = self.options
+        for imp in d.imports:
+            imp.imported.options = self.options
 
     def cache(self):
         """
@@ -54,6 +54,21 @@ class Document(Element):
         s.append(self.root().plain())
         return ''.join(s)
 
+    def write(self, out, pretty=False):
+        """
+        Write (serialize) the document into a file-like I{out} sink
+        as UTF-8 encoded text.
+        @param out: A file-like sink.
+        @type out: I{file-like} object
+        @param pretty: Write the I{pretty} (indented) text.
+        @type pretty: boolean
+        @see: L{Element.write()}
+        """
+        out.write(self.DECL)
+        if pretty:
+            out.write('\n')
+        self.root().write(out, pretty)
+
     def __str__(self):
         return unicode(self).encode('utf-8')
     
@@ -791,6 +791,48 @@ class Element:
         result = ''.join(result)
         return result
 
+    def write(self, out, pretty=False, indent=0):
+        """
+        Write (serialize) this XML fragment into a file-like I{out} sink
+        as UTF-8 encoded text.  The tree is walked once and the text is
+        written as it is produced so that the fragment is never built
+        (joined) as a whole.  The text written is the same as the
+        (encoded) L{plain()} or L{str()}.
+        @param out: A file-like sink.
+        @type out: I{file-like} object
+        @param pretty: Write the I{pretty} (indented) text.
+        @type pretty: boolean
+        @param indent: The indent used when I{pretty}.
+        @type indent: int
+        """
+        if pretty:
+            tab = '%*s'%(indent*3,'')
+        else:
+            tab = ''
+        qname = self.qname()
+        start = [tab, '<', qname, self.nsdeclarations()]
+        for a in self.attributes:
+            start.append(' ')
+            start.append(unicode(a))
+        if self.isempty():
+            start.append('/>')
+            out.write(u''.join(start).encode('utf-8'))
+            return
+        start.append('>')
+        out.write(u''.join(start).encode('utf-8'))
+        if self.hasText():
+            text = self.text
+            if not text.escaped:
+                text = sax.encoder.encode(text)
+            out.write(text.encode('utf-8'))
+        for c in self.children:
+            if pretty:
+                out.write('\n')
+            c.write(out, pretty, indent+1)
+        if pretty and len(self.children):
+            out.write('\n%s' % tab)
+        out.write(('</%s>' % qname).encode('utf-8'))
+        
     def nsdeclarations(self):
         """
         Get a string representation for all namespace declarations
@@ -22,13 +22,27 @@ import re
 
 class Encoder:
     """
-    An XML special character encoder/decoder.
+    An XML special character encoder/decoder.  Strings that contain no
+    special characters (or encodings) are returned unchanged.  Otherwise,
+    an I{&} is encoded using a precompiled pattern (an I{&} that begins an
+    encoding is not encoded again) and each of the other special
+    characters found is replaced.
+        >>> encoder = Encoder()
+        >>> encoder.encode('a < b & c')
+        'a &lt; b &amp; c'
+        >>> encoder.encode('&amp; &lt; &gt; &quot; &apos; &#38; &')
+        '&amp; &lt; &gt; &quot; &apos; &amp;#38; &amp;'
+        >>> encoder.decode('&lt;a href=&quot;x&quot;&gt; &amp;lt;')
+        '<a href="x"> &lt;'
+
     @cvar encodings: A mapping of special characters encoding.
     @type encodings: [(str,str)]
     @cvar decodings: A mapping of special characters decoding.
     @type decodings: [(str,str)]
     @cvar special: A list of special characters
     @type special: [char]
+    @cvar amp: Matches an I{&} to be encoded.
+    @type amp: I{re.Pattern}
     """
     
     encodings = \
@@ -37,6 +51,7 @@ class Encoder:
         (( '&lt;', '<' ),( '&gt;', '>' ),( '&quot;', '"' ),( '&apos;', "'" ),( '&amp;', '&' ))
     special = \
         ('&', '<', '>', '"', "'")
+    amp = re.compile(encodings[0][0])
     
     def needsEncoding(self, s):
         """
@@ -60,9 +75,17 @@ class Encoder:
         @return: The encoded string.
         @rtype: str
         """
-        if isinstance(s, basestring) and self.needsEncoding(s):
-            for x in self.encodings:
-                s = re.sub(x[0], x[1], s)
+        if isinstance(s, basestring):
+            if '&' in s:
+                s = self.amp.sub('&amp;', s)
+            if '<' in s:
+                s = s.replace('<', '&lt;')
+            if '>' in s:
+                s = s.replace('>', '&gt;')
+            if '"' in s:
+                s = s.replace('"', '&quot;')
+            if "'" in s:
+                s = s.replace("'", '&apos;')
         return s
     
     def decode(self, s):
@@ -74,6 +97,7 @@ class Encoder:
         @rtype: str
         """
         if isinstance(s, basestring) and '&' in s:
-            for x in self.decodings:
-                s = s.replace(x[0], x[1])
+            for encoded, c in self.decodings:
+                if encoded in s:
+                    s = s.replace(encoded, c)
         return s
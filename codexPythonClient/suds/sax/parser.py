@@ -27,6 +27,7 @@ containing the prefix and the URI.  Eg: I{('tns', 'http://myns')}
 """
 
 from logging import getLogger
+import new
 import suds.metrics
 from suds import *
 from suds.sax import *
@@ -36,6 +37,7 @@ from suds.sax.text import Text
 from suds.sax.attribute import Attribute
 from xml.sax import make_parser, InputSource, ContentHandler
 from xml.sax.handler import feature_external_ges
+from xml.parsers import expat
 from cStringIO import StringIO
 
 log = getLogger(__name__)
@@ -103,8 +105,166 @@ class Handler(ContentHandler):
         return self.nodes[len(self.nodes)-1]
 
 
+class StreamHandler(Handler):
+    """
+    sax handler that collects the elements at the specified
+    I{depth} as they are closed.
+    @ivar depth: The depth of collected elements (root=1).
+    @type depth: int
+    @ivar closed: The collected (closed) elements.
+    @type closed: [L{Element},..]
+    """
+    
+    def __init__(self, depth):
+        Handler.__init__(self)
+        self.depth = depth
+        self.closed = []
+        
+    def endElement(self, name):
+        current = self.top()
+        Handler.endElement(self, name)
+        if len(self.nodes) == self.depth:
+            self.closed.append(current)
+
+
+class ExpatHandler:
+    """
+    I{pyexpat} handler that builds the same L{Document} as the sax L{Handler}.
+    Namespace declarations are reported by expat separately from the
+    attributes and character data is buffered by expat.  Well-formedness
+    (such as matched end tags) is checked by expat.  Nodes are created
+    with their state (instead of by __init__) so the prefix is only split
+    once per distinct name.
+    @cvar separator: The expat namespace separator.
+    @type separator: unicode
+    @ivar nodes: The stack of open elements.
+    @type nodes: [L{Element},..]
+    @ivar texts: The stack of character data for the open elements.
+    @type texts: [[unicode,..],..]
+    @ivar prefixes: The pending namespace declarations as (prefix, uri).
+    @type prefixes: [(unicode, unicode),..]
+    @ivar names: The cache of (prefix, name) by expat name.
+    @type names: {unicode:(unicode, unicode)}
+    @ivar depth: The depth of collected elements (root=1), 0=none.
+    @type depth: int
+    @ivar closed: The collected (closed) elements.
+    @type closed: [L{Element},..]
+    """
+    
+    separator = u' '
+    
+    def __init__(self, depth=0):
+        self.nodes = [Document()]
+        self.texts = [None]
+        self.prefixes = []
+        self.names = {}
+        self.depth = depth
+        self.closed = []
+        
+    def parser(self):
+        """
+        Create the expat parser.
+        @return: An expat parser with this object's handlers.
+        @rtype: I{xmlparser}
+        """
+        p = expat.ParserCreate(namespace_separator=self.separator)
+        p.namespace_prefixes = True
+        p.ordered_attributes = True
+        p.buffer_text = True
+        p.buffer_size = 0x10000
+        p.StartNamespaceDeclHandler = self.startNamespace
+        p.StartElementHandler = self.startElement
+        p.EndElementHandler = self.endElement
+        p.CharacterDataHandler = self.characters
+        return p
+        
+    def qname(self, name):
+        """
+        Get the (prefix, name) for the expat (uri name prefix) name.
+        @param name: An expat name.
+        @type name: unicode
+        @return: The (prefix, name), the prefix is None when not qualified.
+        @rtype: (unicode, unicode)
+        """
+        qname = self.names.get(name)
+        if qname is None:
+            parts = name.split(self.separator)
+            if len(parts) == 3:
+                qname = (parts[2], parts[1])
+            else:
+                qname = (None, parts[-1])
+            self.names[name] = qname
+        return qname
+    
+    def startNamespace(self, prefix, uri):
+        self.prefixes.append((prefix, uri))
+        
+    def startElement(self, name, attrs):
+        top = self.nodes[-1]
+        prefix, name = self.qname(name)
+        node = new.instance(Element, dict(
+            prefix=prefix,
+            name=name,
+            expns=None,
+            nsprefixes={},
+            attributes=[],
+            text=None,
+            parent=top,
+            children=[]))
+        if len(self.prefixes):
+            for prefix, uri in self.prefixes:
+                if prefix is None:
+                    if uri:
+                        node.expns = uri
+                else:
+                    node.nsprefixes[prefix] = uri
+            self.prefixes = []
+        for i in xrange(0, len(attrs), 2):
+            prefix, name = self.qname(attrs[i])
+            attribute = new.instance(Attribute, dict(
+                parent=node,
+                prefix=prefix,
+                name=name,
+                value=Text(attrs[i+1])))
+            node.attributes.append(attribute)
+        top.children.append(node)
+        self.nodes.append(node)
+        self.texts.append(None)
+        
+    def endElement(self, name):
+        current = self.nodes.pop()
+        text = self.texts.pop()
+        if text is not None:
+            current.text = Text(u''.join(text))
+            if len(current.children):
+                current.trim()
+        if len(self.nodes) == self.depth:
+            self.closed.append(current)
+            
+    def characters(self, content):
+        text = self.texts[-1]
+        if text is None:
+            self.texts[-1] = [content]
+        else:
+            text.append(content)
+
+
 class Parser:
-    """ SAX Parser """
+    """
+    SAX Parser
+    @ivar expat: Use the I{pyexpat} (L{ExpatHandler}) backend
+        instead of the I{xml.sax} (L{Handler}) backend.  Documents that
+        use undeclared (unbound) prefixes are not namespace well-formed
+        and are parsed (or streamed) using the I{xml.sax} backend.
+    @type expat: bool
+    """
+    
+    def __init__(self, expat=False):
+        """
+        @param expat: Use the I{pyexpat} backend.
+        @type expat: bool
+        """
+        self.expat = expat
     
     @classmethod
     def saxparser(cls):
@@ -114,6 +274,85 @@ class Parser:
         p.setContentHandler(h)
         return (p, h)
         
+    def stream(self, string, depth, size=0x10000):
+        """
+        Incrementally SAX parse XML text.  The elements at the specified
+        I{depth} are generated as they are closed.  The document is built
+        as the generator is consumed and elements that are detached from
+        their parent (after being generated) are not retained.  When expat
+        rejects an unbound prefix, the document is streamed again (into the
+        same document) using the I{xml.sax} backend and the elements already
+        generated are skipped.
+        @param string: Parse string XML.
+        @type string: str
+        @param depth: The depth of generated elements (root=1).
+        @type depth: int
+        @param size: The number of bytes parsed at a time.
+        @type size: int
+        @return: A tuple of: (document, generator).
+        @rtype: (L{Document}, generator)
+        """
+        if self.expat:
+            handler = ExpatHandler(depth)
+        else:
+            handler = StreamHandler(depth)
+        root = handler.nodes[0]
+        def generate():
+            timer = metrics.Timer()
+            timer.start()
+            generated = 0
+            try:
+                for node in self.feed(handler, string, size):
+                    generated += 1
+                    yield node
+            except expat.ExpatError, e:
+                if not self.unbound(e):
+                    raise
+                log.debug('expat: %s, streamed using sax', e)
+                root.children = []
+                sax = StreamHandler(depth)
+                sax.nodes[0] = root
+                for node in self.feed(sax, string, size):
+                    if generated:
+                        generated -= 1
+                        node.detach()
+                        continue
+                    yield node
+            timer.stop()
+            metrics.log.debug('sax (streamed) duration: %s', timer)
+        return (root, generate())
+    
+    def feed(self, handler, string, size):
+        """
+        Incrementally parse XML text using the backend of the handler.
+        @param handler: A (streaming) handler.
+        @type handler: (L{ExpatHandler}|L{StreamHandler})
+        @param string: Parse string XML.
+        @type string: str
+        @param size: The number of bytes parsed at a time.
+        @type size: int
+        @return: A generator of the elements closed at the
+            I{depth} of the handler.
+        @rtype: generator
+        """
+        if isinstance(handler, ExpatHandler):
+            p = handler.parser()
+            feed = (lambda s: p.Parse(s, False))
+            close = (lambda: p.Parse('', True))
+        else:
+            sax = make_parser()
+            sax.setFeature(feature_external_ges, 0)
+            sax.setContentHandler(handler)
+            feed = sax.feed
+            close = sax.close
+        for i in xrange(0, len(string), size):
+            feed(string[i:i+size])
+            while len(handler.closed):
+                yield handler.closed.pop(0)
+        close()
+        while len(handler.closed):
+            yield handler.closed.pop(0)
+        
     def parse(self, file=None, string=None):
         """
         SAX parse XML text.
@@ -122,6 +361,8 @@ class Parser:
         @param string: Parse string XML.
         @type string: str
         """
+        if self.expat:
+            return self.expatparse(file, string)
         timer = metrics.Timer()
         timer.start()
         sax, handler = self.saxparser()
@@ -136,4 +377,44 @@ class Parser:
             sax.parse(source)
             timer.stop()
             metrics.log.debug('%s\nsax duration: %s', string, timer)
-            return handler.nodes[0]
\ No newline at end of file
+            return handler.nodes[0]
+
+    def expatparse(self, file=None, string=None):
+        """
+        Parse XML text using the I{pyexpat} backend.  Documents with unbound
+        prefixes (rejected by expat) are parsed using the I{xml.sax} backend.
+        @param file: Parse a python I{file-like} object.
+        @type file: I{file-like} object.
+        @param string: Parse string XML.
+        @type string: str
+        """
+        if file is not None:
+            string = file.read()
+        if string is None:
+            return None
+        timer = metrics.Timer()
+        timer.start()
+        handler = ExpatHandler()
+        p = handler.parser()
+        try:
+            p.Parse(string, True)
+        except expat.ExpatError, e:
+            if not self.unbound(e):
+                raise
+            log.debug('expat: %s, parsed using sax', e)
+            handler = None
+        if handler is None:
+            return Parser().parse(string=string)
+        timer.stop()
+        metrics.log.debug('%s\nexpat duration: %s', string, timer)
+        return handler.nodes[0]
+    
+    def unbound(self, error):
+        """
+        Get whether an expat error is caused by an unbound prefix.
+        @param error: An expat error.
+        @type error: I{expat.ExpatError}
+        @rtype: bool
+        """
+        return ( expat.ErrorString(error.code) == \
+            expat.errors.XML_ERROR_UNBOUND_PREFIX )
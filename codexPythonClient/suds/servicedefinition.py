@@ -140,8 +140,6 @@ class ServiceDefinition:
     def publictypes(self):
         """ get all public types """
         for t in self.wsdl.schema.types.values():
-            if t in self.params: continue
-            if t in self.types: continue
             item = (t, t)
             self.types.append(item)
         tc = lambda x,y: cmp(x[0].name, y[0].name)
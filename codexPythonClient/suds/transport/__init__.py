@@ -18,6 +18,11 @@
 Contains transport interface (classes).
 """
 
+from cStringIO import StringIO
+from copy import copy
+from suds.properties import Unskin
+from suds.metrics import nosample
+
 
 class TransportError(Exception):
     def __init__(self, reason, httpcode, fp=None):
@@ -31,9 +36,12 @@ class Request:
     @ivar url: The url for the request.
     @type url: str
     @ivar message: The message to be sent in a POST request.
-    @type message: str
+    @type message: (str|L{Buffer})
     @ivar headers: The http headers to be used for the request.
     @type headers: dict
+    @ivar sample: The metrics sample for the phases timed by the transport
+        (connect|wait|transfer).
+    @type sample: L{suds.metrics.Sample}
     """
 
     def __init__(self, url, message=None):
@@ -41,21 +49,89 @@ class Request:
         @param url: The url for the request.
         @type url: str
         @param message: The (optional) message to be send in the request.
-        @type message: str
+        @type message: (str|L{Buffer})
         """
         self.url = url
         self.headers = {}
         self.message = message
+        self.sample = nosample
         
     def __str__(self):
         s = []
         s.append('URL:%s' % self.url)
         s.append('HEADERS: %s' % self.headers)
         s.append('MESSAGE:')
-        s.append(self.message)
+        s.append(str(self.message))
         return '\n'.join(s)
 
 
+class Buffer:
+    """
+    A growable (encoded) message buffer.  The message is written (once)
+    into the buffer by the serializer and then read (file-like) by the
+    transport so that it may be sent without being copied.  The buffer
+    is rewound when it has been read to the end so it may be sent again.
+    @ivar data: The buffered data.
+    @type data: I{cStringIO.StringIO}
+    @ivar size: The number of bytes written.
+    @type size: int
+    @ivar pos: The position of the next L{read()}.
+    @type pos: int
+    """
+    
+    def __init__(self):
+        self.data = StringIO()
+        self.size = 0
+        self.pos = 0
+        
+    def write(self, s):
+        """
+        Write (append) data to the buffer.
+        @param s: The (encoded) data.
+        @type s: str
+        """
+        self.data.write(s)
+        self.size += len(s)
+        
+    def seek(self, pos):
+        """
+        Set the position of the next L{read()}.
+        @param pos: A position.
+        @type pos: int
+        """
+        self.pos = pos
+        
+    def read(self, size=-1):
+        """
+        Read data from the buffer.
+        @param size: The number of bytes to read, -1=all.
+        @type size: int
+        @return: The data read, empty when at the end.
+        @rtype: str
+        """
+        self.data.seek(self.pos)
+        s = self.data.read(size)
+        if len(s):
+            self.pos += len(s)
+        else:
+            self.pos = 0
+        return s
+    
+    def getvalue(self):
+        """
+        Get the buffered data.
+        @return: A (copy) of the data.
+        @rtype: str
+        """
+        return self.data.getvalue()
+        
+    def __len__(self):
+        return self.size
+    
+    def __str__(self):
+        return self.getvalue()
+
+
 class Reply:
     """
     A transport reply
@@ -92,8 +168,13 @@ class Reply:
 class Transport:
     """
     The transport I{interface}.
+    @cvar buffered: The transport sends a L{Buffer} request
+        message (instead of a str).
+    @type buffered: boolean
     """
     
+    buffered = False
+    
     def __init__(self):
         """
         Constructor.
@@ -128,3 +209,54 @@ class Transport:
         @raise TransportError: On all transport errors.
         """
         raise Exception('not-implemented')
+
+    def submit(self, request, callback):
+        """
+        Submit a soap message to be sent asynchronously.  The I{callback}
+        is called as: callback(reply, error) when the reply has been
+        received (or the send failed) while the transport is L{poll()}ed.
+        The I{reply} is a L{Reply} (or None) and the I{error} is the
+        exception raised, else None.  The default implementation
+        sends the message (blocking) using L{send()} and calls
+        the I{callback} before returning.
+        @param request: A transport request.
+        @type request: L{Request}
+        @param callback: A callback function.
+        @type callback: callable
+        """
+        try:
+            reply = self.send(request)
+        except Exception, e:
+            callback(None, e)
+        else:
+            callback(reply, None)
+
+    def poll(self, timeout=None):
+        """
+        Process I/O for submitted soap messages and call the
+        callbacks for those completed.  Blocks for up to I{timeout}
+        seconds waiting for I/O.
+        @param timeout: The max time (seconds) to wait.
+        @type timeout: float
+        @return: The number of soap messages still pending.
+        @rtype: int
+        """
+        return 0
+
+    def share(self):
+        """
+        Get a transport that shares the connection state of this
+        transport but has its own options.  Used by I{shared} client
+        clones.  The default is a (shallow) copy with a copy of the
+        options, all other attributes (such as a cookie jar or buffers)
+        are shared with this transport.  Transports with other
+        per-clone state must override this method, as the
+        L{http.HttpTransport} does to give each clone its own cookies.
+        @return: A transport.
+        @rtype: L{Transport}
+        """
+        from suds.transport.options import Options
+        clone = copy(self)
+        clone.options = Options()
+        Unskin(clone.options).update(Unskin(self.options))
+        return clone
@@ -0,0 +1,190 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the (LGPL) GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Library Lesser General Public License for more details at
+# ( http://www.gnu.org/licenses/lgpl.html ).
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+# written by: Jeff Ortel ( jortel@redhat.com )
+
+"""
+Provides http (gzip|deflate) content encoding classes.
+"""
+
+import zlib
+from suds.transport import *
+from cStringIO import StringIO
+from logging import getLogger
+
+log = getLogger(__name__)
+
+
+class Decompressor:
+    """
+    An incremental (gzip|deflate) decompressor.  The I{deflate} encoding
+    is expected to be zlib wrapped (per the http spec) but raw deflate
+    data (sent by some servers) is also accepted.
+    @ivar encoding: The content encoding.
+    @type encoding: str
+    @ivar zobj: The zlib decompression object.
+    @type zobj: I{zlib.Decompress}
+    @ivar started: Indicates that data has been decompressed.
+    @type started: bool
+    """
+
+    def __init__(self, encoding):
+        """
+        @param encoding: The content encoding (gzip|x-gzip|deflate).
+        @type encoding: str
+        """
+        self.encoding = encoding
+        if encoding == 'deflate':
+            self.zobj = zlib.decompressobj()
+        else:
+            self.zobj = zlib.decompressobj(16+zlib.MAX_WBITS)
+        self.started = False
+
+    def feed(self, data):
+        """
+        Decompress (the next block of) data.
+        @param data: Compressed data.
+        @type data: str
+        @return: The decompressed data.
+        @rtype: str
+        """
+        try:
+            result = self.zobj.decompress(data)
+        except zlib.error:
+            if self.started or self.encoding != 'deflate':
+                raise
+            log.debug('raw deflate data')
+            self.zobj = zlib.decompressobj(-zlib.MAX_WBITS)
+            result = self.zobj.decompress(data)
+        self.started = True
+        return result
+
+    def flush(self):
+        """
+        Get the remaining decompressed data.
+        @return: The decompressed data.
+        @rtype: str
+        """
+        return self.zobj.flush()
+
+
+class Compression:
+    """
+    HTTP content encoding.  Replies are decompressed incrementally as
+    they are read so the (whole) compressed content is not kept.
+    Request messages are gzip compressed.
+    @cvar accepted: The (Accept-Encoding) supported encodings.
+    @type accepted: str
+    @cvar encodings: The supported encodings.
+    @type encodings: (str,..)
+    @cvar blocksize: The number of bytes read (or compressed) at a time.
+    @type blocksize: int
+    """
+
+    accepted = 'gzip, deflate'
+    encodings = ('gzip', 'x-gzip', 'deflate')
+    blocksize = 0x10000
+
+    @classmethod
+    def encoding(cls, value):
+        """
+        Get the supported content encoding.
+        @param value: A I{Content-Encoding} header value.
+        @type value: str
+        @return: The encoding, else None when not supported (or identity).
+        @rtype: str
+        """
+        if value is None:
+            return None
+        value = value.strip().lower()
+        if value in cls.encodings:
+            return value
+        return None
+
+    @classmethod
+    def decompress(cls, encoding, fp):
+        """
+        Read and decompress the content of a file-like object.
+        @param encoding: A supported content encoding.
+        @type encoding: str
+        @param fp: A file-like object open for reading.
+        @type fp: I{file-like} object
+        @return: The decompressed content.
+        @rtype: str
+        """
+        decompressor = Decompressor(encoding)
+        result = []
+        while True:
+            data = fp.read(cls.blocksize)
+            if not data:
+                break
+            result.append(decompressor.feed(data))
+        result.append(decompressor.flush())
+        return ''.join(result)
+
+    @classmethod
+    def read(cls, value, fp):
+        """
+        Read the (decoded) content of a file-like object.
+        @param value: The I{Content-Encoding} header value.
+        @type value: str
+        @param fp: A file-like object open for reading.
+        @type fp: I{file-like} object
+        @return: The (decompressed) content.
+        @rtype: str
+        """
+        encoding = cls.encoding(value)
+        if encoding is None:
+            return fp.read()
+        return cls.decompress(encoding, fp)
+
+    @classmethod
+    def decoded(cls, value, content):
+        """
+        Get the decoded content.
+        @param value: The I{Content-Encoding} header value.
+        @type value: str
+        @param content: The (received) content.
+        @type content: str
+        @return: The (decompressed) content.
+        @rtype: str
+        """
+        encoding = cls.encoding(value)
+        if encoding is None or not content:
+            return content
+        return cls.decompress(encoding, StringIO(content))
+
+    @classmethod
+    def compress(cls, message):
+        """
+        Gzip compress a request message.
+        @param message: A request message.
+        @type message: (str|L{Buffer})
+        @return: The compressed message.
+        @rtype: L{Buffer}
+        """
+        zobj = zlib.compressobj(6, zlib.DEFLATED, 16+zlib.MAX_WBITS)
+        if isinstance(message, Buffer):
+            fp = message
+            message.seek(0)
+        else:
+            fp = StringIO(message)
+        result = Buffer()
+        while True:
+            data = fp.read(cls.blocksize)
+            if not data:
+                break
+            result.write(zobj.compress(data))
+        result.write(zobj.flush())
+        return result
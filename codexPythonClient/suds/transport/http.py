@@ -22,8 +22,11 @@ import urllib2 as u2
 import base64
 import socket
 from suds.transport import *
+from copy import deepcopy
+from suds.transport.compression import Compression
 from suds.properties import Unskin
 from urlparse import urlparse
+from cStringIO import StringIO
 from cookielib import CookieJar
 from logging import getLogger
 
@@ -34,8 +37,11 @@ class HttpTransport(Transport):
     """
     HTTP transport using urllib2.  Provided basic http transport
     that provides for cookies, proxies but no authentication.
+    Messages are sent by urllib2 (httplib) from the request L{Buffer}.
     """
     
+    buffered = True
+    
     def __init__(self, **kwargs):
         """
         @param kwargs: Keyword arguments.
@@ -65,26 +71,63 @@ class HttpTransport(Transport):
 
     def send(self, request):
         result = None
+        self.negotiate(request)
         url = request.url
         msg = request.message
         headers = request.headers
+        sample = request.sample
         try:
             u2request = u2.Request(url, msg, headers)
             self.addcookies(u2request)
             self.proxy = self.options.proxy
             request.headers.update(u2request.headers)
             log.debug('sending:\n%s', request)
-            fp = self.u2open(u2request)
+            sample.start('wait')
+            try:
+                fp = self.u2open(u2request)
+            finally:
+                sample.stop('wait')
             self.getcookies(fp, u2request)
-            result = Reply(200, fp.headers.dict, fp.read())
+            encoding = fp.headers.get('content-encoding')
+            sample.start('transfer')
+            try:
+                content = Compression.read(encoding, fp)
+            finally:
+                sample.stop('transfer')
+            result = Reply(200, fp.headers.dict, content)
             log.debug('received:\n%s', result)
         except u2.HTTPError, e:
             if e.code in (202,204):
                 result = None
             else:
-                raise TransportError(e.msg, e.code, e.fp)
+                fp = e.fp
+                encoding = e.hdrs.get('content-encoding')
+                if fp is not None and Compression.encoding(encoding):
+                    fp = StringIO(Compression.read(encoding, fp))
+                raise TransportError(e.msg, e.code, fp)
         return result
 
+    def negotiate(self, request):
+        """
+        Negotiate the content encoding of the request and reply.  When
+        I{compression} is enabled, compressed (gzip|deflate) replies are
+        accepted.  Messages of at least I{compressmin} bytes are sent
+        gzip compressed.
+        @param request: A transport request.
+        @type request: L{Request}
+        """
+        if self.options.compression:
+            request.headers['Accept-Encoding'] = Compression.accepted
+        minsize = self.options.compressmin
+        if not minsize or request.message is None:
+            return
+        if 'Content-Encoding' in request.headers:
+            return
+        if len(request.message) < minsize:
+            return
+        request.message = Compression.compress(request.message)
+        request.headers['Content-Encoding'] = 'gzip'
+
     def addcookies(self, u2request):
         """
         Add cookies in the cookiejar to the request.
@@ -152,6 +195,9 @@ class HttpTransport(Transport):
             log.exception(e)
             return 0
         
+    def share(self):
+        return deepcopy(self)
+        
     def __deepcopy__(self, memo={}):
         clone = self.__class__()
         p = Unskin(self.options)
@@ -0,0 +1,281 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the (LGPL) GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Library Lesser General Public License for more details at
+# ( http://www.gnu.org/licenses/lgpl.html ).
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+# written by: Jeff Ortel ( jortel@redhat.com )
+
+"""
+Contains classes for non-blocking (asyncore) HTTP transport implementations.
+"""
+
+import asyncore
+import httplib
+import socket
+import sys
+import time
+import urllib2 as u2
+from suds.transport import *
+from suds.transport.pool import PooledHttpTransport, Response
+from suds.transport.compression import Compression
+from urlparse import urlparse
+from cStringIO import StringIO
+from logging import getLogger
+
+log = getLogger(__name__)
+
+
+class Received:
+    """
+    Adapts the (complete) received data to the socket
+    interface expected by the httplib response parser.
+    @ivar fp: The received data.
+    @type fp: I{StringIO}
+    """
+
+    def __init__(self, data):
+        self.fp = StringIO(data)
+
+    def makefile(self, *args, **kwargs):
+        return self.fp
+
+
+class Exchange(asyncore.dispatcher):
+    """
+    A single non-blocking http request/response exchange.
+    The request is sent with (Connection: close) so the response
+    is complete when the server closes the connection.
+    @ivar transport: The transport that submitted the request.
+    @type transport: L{AsyncHttpTransport}
+    @ivar u2request: The urllib2 request (used for cookies).
+    @type u2request: I{urllib2.Request}
+    @ivar callback: The callback: callback(reply, error).
+    @type callback: callable
+    @ivar outbuf: The data to be sent.
+    @type outbuf: str
+    @ivar offset: The number of bytes already sent.
+    @type offset: int
+    @ivar inbuf: The data received.
+    @type inbuf: [str,..]
+    @ivar started: The time the exchange was started.
+    @type started: float
+    @ivar completed: Indicates the callback has been called.
+    @type completed: bool
+    @ivar sample: The metrics sample for the (connect|wait|transfer) phases.
+    @type sample: L{suds.metrics.Sample}
+    """
+
+    bufsize = 0x10000
+
+    def __init__(self, transport, address, data, u2request, callback,
+            sample=nosample):
+        """
+        @param transport: The transport that submitted the request.
+        @type transport: L{AsyncHttpTransport}
+        @param address: The address as (host, port).
+        @type address: tuple
+        @param data: The data to be sent.
+        @type data: str
+        @param u2request: The urllib2 request (used for cookies).
+        @type u2request: I{urllib2.Request}
+        @param callback: The callback: callback(reply, error).
+        @type callback: callable
+        @param sample: The metrics sample.
+        @type sample: L{suds.metrics.Sample}
+        """
+        asyncore.dispatcher.__init__(self, map=transport.channels)
+        self.transport = transport
+        self.u2request = u2request
+        self.callback = callback
+        self.outbuf = data
+        self.offset = 0
+        self.inbuf = []
+        self.started = time.time()
+        self.completed = False
+        self.sample = sample
+        sample.start('connect')
+        host, port = address
+        info = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        family, type, proto, cn, sockaddr = info[0]
+        self.create_socket(family, type)
+        try:
+            self.connect(sockaddr)
+        except:
+            self.close()
+            raise
+
+    def writable(self):
+        return ( self.offset < len(self.outbuf) or not self.connected )
+
+    def handle_connect(self):
+        self.sample.stop('connect')
+        self.sample.start('wait')
+
+    def handle_write(self):
+        sent = self.send(buffer(self.outbuf, self.offset))
+        self.offset += sent
+
+    def handle_read(self):
+        data = self.recv(self.bufsize)
+        if data:
+            if not self.inbuf:
+                self.sample.stop('wait')
+                self.sample.start('transfer')
+            self.inbuf.append(data)
+
+    def handle_close(self):
+        self.close()
+        self.sample.stop('wait')
+        self.sample.stop('transfer')
+        data = ''.join(self.inbuf)
+        self.inbuf = []
+        try:
+            response = httplib.HTTPResponse(Received(data), method='POST')
+            response.begin()
+            content = response.read()
+            reply = self.transport.received(self, response, content)
+        except Exception, e:
+            self.done(None, e)
+        else:
+            self.done(reply, None)
+
+    def handle_error(self):
+        e = sys.exc_info()[1]
+        self.close()
+        self.done(None, e)
+
+    def expired(self, timeout):
+        """
+        Get whether the exchange has been running longer than I{timeout}.
+        @param timeout: The max time (seconds).
+        @type timeout: float
+        @rtype: bool
+        """
+        return ( (time.time() - self.started) > timeout )
+
+    def done(self, reply, error):
+        """
+        Call the callback (once).
+        @param reply: The reply.
+        @type reply: L{Reply}
+        @param error: The exception raised, else None.
+        @type error: Exception
+        """
+        if self.completed:
+            return
+        self.completed = True
+        try:
+            self.callback(reply, error)
+        except:
+            log.error('callback failed', exc_info=1)
+
+
+class AsyncHttpTransport(PooledHttpTransport):
+    """
+    HTTP transport that sends soap messages without blocking so that
+    a single thread can have many messages in flight.  Messages are
+    L{submit()}ed and the I{asyncore} event loop is driven by L{poll()}.
+    Provides for cookies, (http) proxies and basic http authentication.
+    Messages for schemes other than http (such as https) and those
+    sent using L{send()} are sent (blocking) on pooled connections.
+    @ivar channels: The in-flight exchanges (an I{asyncore} socket map).
+    @type channels: {fd:L{Exchange}}
+    """
+
+    def __init__(self, **kwargs):
+        """
+        @param kwargs: Keyword arguments.
+        @see: L{PooledHttpTransport}
+        """
+        PooledHttpTransport.__init__(self, **kwargs)
+        self.channels = {}
+
+    def submit(self, request, callback):
+        scheme = urlparse(request.url)[0]
+        if scheme != 'http':
+            PooledHttpTransport.submit(self, request, callback)
+            return
+        self.addcredentials(request)
+        self.negotiate(request)
+        log.debug('submitting:\n%s', request)
+        try:
+            address, data, u2request = self.encode(request)
+            Exchange(self, address, data, u2request, callback, request.sample)
+        except Exception, e:
+            callback(None, e)
+
+    def poll(self, timeout=None):
+        if not self.channels:
+            return 0
+        tm = self.options.timeout
+        started = min([x.started for x in self.channels.values()])
+        wait = max(0, (started + tm) - time.time())
+        if timeout is not None:
+            wait = min(wait, timeout)
+        asyncore.loop(wait, True, self.channels, 1)
+        for x in self.channels.values():
+            if x.expired(tm):
+                log.debug('(%s) timed out', x.u2request.get_full_url())
+                x.close()
+                x.done(None, socket.timeout('timed out'))
+        return len(self.channels)
+
+    def encode(self, request):
+        """
+        Encode the I{request} as the http (POST) data to be sent.
+        @param request: A transport request.
+        @type request: L{Request}
+        @return: A tuple of (address, data, u2request) where the address
+            is the (host, port) connected to.
+        @rtype: ((str, int), str, I{urllib2.Request})
+        """
+        url = request.url
+        message = request.message
+        u2request = u2.Request(url, message, request.headers)
+        self.addcookies(u2request)
+        key, path = self.target(url)
+        scheme, host, port = key
+        proxy = self.options.proxy.get(scheme)
+        if proxy is None:
+            address = (host, port)
+        else:
+            address = self.hostport(proxy)
+        netloc = urlparse(url)[1].split('@')[-1]
+        headers = dict(u2request.header_items())
+        headers['Host'] = netloc
+        headers['Content-Length'] = str(len(message))
+        headers['Connection'] = 'close'
+        s = ['POST %s HTTP/1.1' % path]
+        for h in headers.items():
+            s.append('%s: %s' % h)
+        s.append('')
+        s.append('')
+        data = ''.join((str('\r\n'.join(s)), str(message)))
+        return (address, data, u2request)
+
+    def received(self, exchange, response, content):
+        """
+        Process the http response received by an L{Exchange}.
+        @param exchange: The completed exchange.
+        @type exchange: L{Exchange}
+        @param response: The http response.
+        @type response: I{httplib.HTTPResponse}
+        @param content: The response content.
+        @type content: str
+        @return: The reply, else None when no content (202|204).
+        @rtype: L{Reply}
+        @raise TransportError: When the status is not (200|202|204).
+        """
+        self.getcookies(Response(response), exchange.u2request)
+        encoding = response.getheader('content-encoding')
+        content = Compression.decoded(encoding, content)
+        return self.reply(response.status, response.msg.dict, content)
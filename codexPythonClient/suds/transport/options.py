@@ -44,6 +44,27 @@ class Options(Skin):
         - B{password} - The password used for http authentication.
                 - type: I{str}
                 - default: None
+        - B{poolsize} - The maximum number of idle persistent connections
+            kept per (scheme, host, port) by pooling transports.
+                - type: I{int}
+                - default: 4
+        - B{idletimeout} - The number of seconds an idle persistent
+            connection may be kept before it is closed.
+                - type: I{float}
+                - default: 60
+        - B{maxrequests} - The number of requests sent on a persistent
+            connection before it is retired.  A value of 0 means unlimited.
+                - type: I{int}
+                - default: 100
+        - B{compression} - Flag that enables compressed replies.  The
+            (gzip|deflate) encodings are accepted and replies are decompressed
+            as they are read.
+                - type: I{bool}
+                - default: False
+        - B{compressmin} - The size (bytes) of request messages that are sent
+            gzip compressed.  A value of 0 means never.
+                - type: I{int}
+                - default: 0
     """    
     def __init__(self, **kwargs):
         domain = __name__
@@ -53,5 +74,10 @@ class Options(Skin):
             Definition('headers', dict, {}),
             Definition('username', basestring, None),
             Definition('password', basestring, None),
+            Definition('poolsize', int, 4),
+            Definition('idletimeout', (int,float), 60),
+            Definition('maxrequests', int, 100),
+            Definition('compression', bool, False),
+            Definition('compressmin', int, 0),
         ]
         Skin.__init__(self, domain, definitions, kwargs)
\ No newline at end of file
@@ -0,0 +1,466 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the (LGPL) GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Library Lesser General Public License for more details at
+# ( http://www.gnu.org/licenses/lgpl.html ).
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+# written by: Jeff Ortel ( jortel@redhat.com )
+
+"""
+Contains classes for persistent (keep-alive) HTTP transport implementations.
+"""
+
+import httplib
+import base64
+import errno
+import socket
+import time
+import threading
+import urllib2 as u2
+from suds.transport import *
+from suds.transport.http import HttpTransport
+from suds.transport.compression import Compression
+from urlparse import urlparse
+from copy import deepcopy
+from cStringIO import StringIO
+from logging import getLogger
+
+log = getLogger(__name__)
+
+
+class Connection:
+    """
+    A persistent HTTP/1.1 connection.
+    @ivar key: The pool key as (scheme, host, port).
+    @type key: tuple
+    @ivar http: The underlying httplib connection.
+    @type http: I{httplib.HTTPConnection}
+    @ivar requests: The number of requests sent on this connection.
+    @type requests: int
+    @ivar used: The time this connection was last used.
+    @type used: float
+    """
+
+    def __init__(self, key, http):
+        """
+        @param key: The pool key as (scheme, host, port).
+        @type key: tuple
+        @param http: The underlying httplib connection.
+        @type http: I{httplib.HTTPConnection}
+        """
+        self.key = key
+        self.http = http
+        self.requests = 0
+        self.used = time.time()
+
+    def idle(self):
+        """
+        Get the number of seconds since this connection was last used.
+        @return: The idle time (seconds).
+        @rtype: float
+        """
+        return ( time.time() - self.used )
+
+    def close(self):
+        """
+        Close the underlying connection.
+        """
+        try:
+            self.http.close()
+        except:
+            log.debug(self.key, exc_info=1)
+
+    def __str__(self):
+        return '%s://%s:%s (requests=%d)' % \
+            (self.key[0], self.key[1], self.key[2], self.requests)
+
+
+class ConnectionPool:
+    """
+    A thread-safe pool of I{idle} persistent connections keyed
+    by (scheme, host, port).  A connection is owned by exactly one
+    caller between L{get()} and L{put()}.
+    @ivar idle: The idle connections by key.
+    @type idle: {key:[L{Connection},..]}
+    """
+
+    def __init__(self):
+        self.idle = {}
+        self.__lock = threading.Lock()
+
+    def get(self, key, idletimeout):
+        """
+        Get (check out) the most recently used idle connection for I{key}.
+        Connections that have been idle longer than I{idletimeout} are closed.
+        @param key: The pool key as (scheme, host, port).
+        @type key: tuple
+        @param idletimeout: The max idle time (seconds).
+        @type idletimeout: float
+        @return: A connection, else None when no usable connection is idle.
+        @rtype: L{Connection}
+        """
+        expired = []
+        result = None
+        self.__lock.acquire()
+        try:
+            idle = self.idle.get(key, [])
+            while len(idle):
+                conn = idle.pop()
+                if conn.idle() > idletimeout:
+                    expired.append(conn)
+                    continue
+                result = conn
+                break
+        finally:
+            self.__lock.release()
+        for conn in expired:
+            log.debug('%s expired, closed', conn)
+            conn.close()
+        return result
+
+    def put(self, conn, poolsize):
+        """
+        Put (check in) a connection.  The connection is closed
+        when I{poolsize} idle connections are already pooled for its key.
+        @param conn: A connection.
+        @type conn: L{Connection}
+        @param poolsize: The max number of idle connections per key.
+        @type poolsize: int
+        @return: True when pooled, else False.
+        @rtype: bool
+        """
+        conn.used = time.time()
+        self.__lock.acquire()
+        try:
+            idle = self.idle.setdefault(conn.key, [])
+            if len(idle) < poolsize:
+                idle.append(conn)
+                return True
+        finally:
+            self.__lock.release()
+        conn.close()
+        return False
+
+    def clear(self):
+        """
+        Close all idle connections.
+        """
+        self.__lock.acquire()
+        try:
+            idle = self.idle
+            self.idle = {}
+        finally:
+            self.__lock.release()
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def __len__(self):
+        self.__lock.acquire()
+        try:
+            n = 0
+            for conns in self.idle.values():
+                n += len(conns)
+            return n
+        finally:
+            self.__lock.release()
+
+
+class Response:
+    """
+    Adapts an httplib response to the interface expected by
+    the cookielib cookie jar.
+    @ivar response: An httplib response.
+    @type response: I{httplib.HTTPResponse}
+    """
+
+    def __init__(self, response):
+        self.response = response
+
+    def info(self):
+        return self.response.msg
+
+
+class PooledHttpTransport(HttpTransport):
+    """
+    HTTP/1.1 transport that keeps persistent connections in a L{ConnectionPool}
+    so that each soap message does not pay for a new TCP connect
+    (and TLS handshake for https).  Provides for cookies, proxies and
+    basic http authentication appended on every request.
+    Documents referenced by schemes other than http/https are
+    opened using the urllib2 based L{HttpTransport}.
+    @ivar pool: The connection pool.
+    @type pool: L{ConnectionPool}
+    """
+
+    schemes = ('http', 'https')
+
+    def __init__(self, **kwargs):
+        """
+        @param kwargs: Keyword arguments.
+            - B{proxy} - An http proxy to be specified on requests.
+                 The proxy is defined as {protocol:proxy,}
+                    - type: I{dict}
+                    - default: {}
+            - B{timeout} - Set the url open timeout (seconds).
+                    - type: I{float}
+                    - default: 90
+            - B{username} - The username used for http authentication.
+                    - type: I{str}
+                    - default: None
+            - B{password} - The password used for http authentication.
+                    - type: I{str}
+                    - default: None
+            - B{poolsize} - The max number of idle connections kept
+                per (scheme, host, port).
+                    - type: I{int}
+                    - default: 4
+            - B{idletimeout} - The max idle time (seconds) of a pooled connection.
+                    - type: I{float}
+                    - default: 60
+            - B{maxrequests} - The number of requests sent on a connection
+                before it is retired.  A value of 0 means unlimited.
+                    - type: I{int}
+                    - default: 100
+        """
+        HttpTransport.__init__(self, **kwargs)
+        self.pool = ConnectionPool()
+
+    def open(self, request):
+        scheme = urlparse(request.url)[0]
+        if scheme not in self.schemes:
+            return HttpTransport.open(self, request)
+        log.debug('opening (%s)', request.url)
+        self.addcredentials(request)
+        code, headers, content = self.urlopen('GET', request)
+        if code != 200:
+            raise TransportError(str(code), code, StringIO(content))
+        return StringIO(content)
+
+    def share(self):
+        clone = deepcopy(self)
+        clone.pool = self.pool
+        return clone
+
+    def send(self, request):
+        self.addcredentials(request)
+        self.negotiate(request)
+        log.debug('sending:\n%s', request)
+        code, headers, content = self.urlopen('POST', request)
+        return self.reply(code, headers, content)
+
+    def reply(self, code, headers, content):
+        """
+        Get the reply for a received http response.
+        @param code: The http status code.
+        @type code: int
+        @param headers: The http headers.
+        @type headers: dict
+        @param content: The response content.
+        @type content: str
+        @return: The reply, else None when no content (202|204).
+        @rtype: L{Reply}
+        @raise TransportError: When the status is not (200|202|204).
+        """
+        if code in (202,204):
+            return None
+        if code != 200:
+            raise TransportError(self.reason(code), code, StringIO(content))
+        result = Reply(code, headers, content)
+        log.debug('received:\n%s', result)
+        return result
+
+    def urlopen(self, method, request):
+        """
+        Send the request on a pooled connection and read the response.
+        A connection taken from the pool may have been closed by the server
+        while idle, so the request is retried on a new connection when a
+        pooled connection is found to be L{stale()}.  Other failures (such
+        as a timeout waiting for the response) are never retried because
+        the server may have processed the request.
+        @param method: The http method.
+        @type method: str
+        @param request: A transport request.
+        @type request: L{Request}
+        @return: A tuple of (code, headers, content).
+        @rtype: (int, dict, str)
+        """
+        url = request.url
+        u2request = u2.Request(url, request.message, request.headers)
+        self.addcookies(u2request)
+        headers = dict(u2request.header_items())
+        key, path = self.target(url)
+        sample = request.sample
+        conn = self.pool.get(key, self.options.idletimeout)
+        while True:
+            reused = ( conn is not None )
+            if not reused:
+                conn = self.connect(key)
+            if isinstance(request.message, Buffer):
+                request.message.seek(0)
+            sent = False
+            try:
+                if conn.http.sock is None:
+                    sample.start('connect')
+                    conn.http.connect()
+                    sample.stop('connect')
+                sample.start('wait')
+                conn.http.request(method, path, request.message, headers)
+                sent = True
+                response = conn.http.getresponse()
+                sample.stop('wait')
+                encoding = response.getheader('content-encoding')
+                sample.start('transfer')
+                content = Compression.read(encoding, response)
+                sample.stop('transfer')
+                break
+            except (httplib.HTTPException, socket.error), e:
+                sample.stop('connect')
+                sample.stop('wait')
+                sample.stop('transfer')
+                conn.close()
+                if reused and self.stale(e, sent):
+                    log.debug('%s, stale - reconnecting', conn)
+                    conn = None
+                    continue
+                raise
+        conn.requests += 1
+        self.getcookies(Response(response), u2request)
+        self.release(conn, response)
+        return (response.status, response.msg.dict, content)
+
+    def stale(self, error, sent):
+        """
+        Get whether the failure of a pooled connection indicates that
+        the connection was closed by the server while idle (before the
+        request was processed).  That is: the connection was closed
+        before the status line was received (BadStatusLine) or was
+        reset (ECONNRESET|EPIPE) while the request was being sent.
+        @param error: The raised exception.
+        @type error: (I{httplib.HTTPException}|I{socket.error})
+        @param sent: The request has been sent.
+        @type sent: bool
+        @return: True when stale.
+        @rtype: bool
+        """
+        if isinstance(error, socket.timeout):
+            return False
+        if isinstance(error, httplib.BadStatusLine):
+            return True
+        if sent or not isinstance(error, socket.error):
+            return False
+        code = getattr(error, 'errno', None)
+        return ( code in (errno.ECONNRESET, errno.EPIPE) )
+
+    def connect(self, key):
+        """
+        Open a new connection for the specified I{key}.
+        When a proxy is defined for the scheme, the connection is
+        made to the proxy and https is tunneled using (CONNECT).
+        @param key: The pool key as (scheme, host, port).
+        @type key: tuple
+        @return: A new connection.
+        @rtype: L{Connection}
+        """
+        scheme, host, port = key
+        tm = self.options.timeout
+        proxy = self.options.proxy.get(scheme)
+        if scheme == 'https':
+            fn = httplib.HTTPSConnection
+        else:
+            fn = httplib.HTTPConnection
+        if proxy is None:
+            http = fn(host, port, timeout=tm)
+        else:
+            phost, pport = self.hostport(proxy)
+            http = fn(phost, pport, timeout=tm)
+            if scheme == 'https':
+                http.set_tunnel(host, port)
+        log.debug('connecting: %s://%s:%s', scheme, host, port)
+        return Connection(key, http)
+
+    def release(self, conn, response):
+        """
+        Return the connection to the pool unless the server
+        asked for it to be closed or it has been retired.
+        @param conn: A connection.
+        @type conn: L{Connection}
+        @param response: The response read from the connection.
+        @type response: I{httplib.HTTPResponse}
+        """
+        max = self.options.maxrequests
+        if response.will_close or \
+            ( max > 0 and conn.requests >= max ):
+                log.debug('%s, retired', conn)
+                conn.close()
+                return
+        self.pool.put(conn, self.options.poolsize)
+
+    def target(self, url):
+        """
+        Get the pool key and request path for the I{url}.  When sent
+        through a (non-tunneled) proxy, the path is the absolute url.
+        @param url: A url.
+        @type url: str
+        @return: A tuple of (key, path).
+        @rtype: ((scheme, host, port), str)
+        """
+        scheme, netloc, path, params, query, fragment = urlparse(url)
+        host, port = self.hostport(netloc, scheme)
+        key = (scheme, host, port)
+        if scheme == 'http' and self.options.proxy.get(scheme):
+            return (key, url)
+        if not path:
+            path = '/'
+        if params:
+            path = ';'.join((path, params))
+        if query:
+            path = '?'.join((path, query))
+        return (key, path)
+
+    def hostport(self, netloc, scheme='http'):
+        """
+        Split the I{netloc} into (host, port) using the
+        default port for the scheme when not specified.
+        @param netloc: A network location (host[:port]).
+        @type netloc: str
+        @param scheme: A url scheme.
+        @type scheme: str
+        @return: A tuple of (host, port).
+        @rtype: (str, int)
+        """
+        if '://' in netloc:
+            netloc = urlparse(netloc)[1]
+        netloc = netloc.split('@')[-1]
+        if scheme == 'https':
+            port = httplib.HTTPS_PORT
+        else:
+            port = httplib.HTTP_PORT
+        host = netloc
+        i = netloc.rfind(':')
+        if i > netloc.rfind(']'):
+            host = netloc[:i]
+            port = int(netloc[i+1:])
+        return (host.strip('[]'), port)
+
+    def reason(self, code):
+        """ get the reason phrase for the http code """
+        return httplib.responses.get(code, str(code))
+
+    def addcredentials(self, request):
+        credentials = self.credentials()
+        if not (None in credentials):
+            encoded = base64.encodestring(':'.join(credentials))
+            basic = 'Basic %s' % encoded[:-1]
+            request.headers['Authorization'] = basic
+
+    def credentials(self):
+        return (self.options.username, self.options.password)
@@ -0,0 +1,242 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the (LGPL) GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Library Lesser General Public License for more details at
+# ( http://www.gnu.org/licenses/lgpl.html ).
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+# written by: Jeff Ortel ( jortel@redhat.com )
+
+"""
+Provides compiled (typed) unmarshalling I{plans}.
+"""
+
+from logging import getLogger
+from suds import *
+from suds.umx import *
+from suds.umx.core import reserved
+from suds.umx.attrlist import AttrList
+from suds.sax import Namespace
+from suds.sax.text import Text
+from suds.sudsobject import Factory, merge
+
+log = getLogger(__name__)
+
+
+class Plan:
+    """
+    A compiled unmarshalling plan for a schema type.  The schema lookups
+    done by the L{Typed} unmarshaller for each node (resolving the type,
+    finding the child and attribute types, boundedness and nillability)
+    are done once and kept in the plan.  Child plans are compiled on first
+    use (by tag) so recursive types are supported.  Nodes that cannot be
+    planned (those with an I{xsi:type}, mixed content or unknown children)
+    are unmarshalled by the L{Typed} unmarshaller.  The result is the same.
+    @ivar type: The schema type (as passed to L{Typed.process()}).
+    @type type: L{xsd.sxbase.SchemaObject}
+    @ivar real: The I{true} (resolved) type.
+    @type real: L{xsd.sxbase.SchemaObject}
+    @ivar unbounded: The type is unbounded (a list).
+    @type unbounded: boolean
+    @ivar nillable: The type is nillable.
+    @type nillable: boolean
+    @ivar children: The child plans by tag, None=unknown.
+    @type children: {str:L{Plan}}
+    @ivar attributes: The (resolved) attribute types by name, None=unknown.
+    @type attributes: {str:L{xsd.sxbase.SchemaObject}}
+    @ivar records: The generated record classes by name.
+    @type records: {str:L{suds.sudsobject.Record}}
+    """
+
+    def __init__(self, type):
+        """
+        @param type: The schema type.
+        @type type: L{xsd.sxbase.SchemaObject}
+        """
+        resolved = type.resolve()
+        self.type = type
+        self.real = resolved.resolve()
+        self.translator = self.real.resolve()
+        self.unbounded = type.unbounded()
+        self.nillable = ( type.nillable or \
+            (resolved.builtin() and resolved.nillable) )
+        self.children = {}
+        self.attributes = {}
+        self.records = {}
+
+    def child(self, name):
+        """
+        Get the plan for a child by tag.
+        @param name: A child (node) name.
+        @type name: str
+        @return: The child plan, else None when not found.
+        @rtype: L{Plan}
+        """
+        try:
+            return self.children[name]
+        except KeyError:
+            pass
+        type = self.real.get_child(name)[0]
+        if type is None:
+            plan = None
+        else:
+            plan = Plan(type)
+        self.children[name] = plan
+        return plan
+
+    def attribute(self, name):
+        """
+        Get the (resolved) type of an attribute by name.
+        @param name: An attribute name.
+        @type name: str
+        @return: The attribute type, else None when not found.
+        @rtype: L{xsd.sxbase.SchemaObject}
+        """
+        try:
+            return self.attributes[name]
+        except KeyError:
+            pass
+        type = self.real.get_attribute(name)[0]
+        if type is not None:
+            type = type.resolve().resolve()
+        self.attributes[name] = type
+        return type
+
+    def record(self, name):
+        """
+        Get the compact record class for the type by name.  The class
+        has a slot for each attribute and child defined by the type.
+        @param name: The class name.
+        @type name: str
+        @return: The record class.
+        @rtype: L{suds.sudsobject.Record}
+        """
+        try:
+            return self.records[name]
+        except KeyError:
+            pass
+        keys = []
+        for a, ancestry in self.real.attributes():
+            keys.append('_%s' % reserved.get(a.name, a.name))
+        for c, ancestry in self.real.children():
+            if c.name is not None:
+                keys.append(reserved.get(c.name, c.name))
+        record = Factory.record(name, keys, self.real)
+        self.records[name] = record
+        return record
+
+    def process(self, node, umx):
+        """
+        Unmarshal the specified node using the plan.
+        @param node: An XML node.
+        @type node: L{sax.element.Element}
+        @param umx: The typed unmarshaller used for unplanned nodes.
+        @type umx: L{Typed}
+        @return: A suds object (a L{suds.sudsobject.Record} when
+            I{records} are specified by the unmarshaller).
+        @rtype: L{Object}
+        """
+        children = node.children
+        if len(node.attributes) and \
+            node.get('type', Namespace.xsins) is not None:
+                return umx.unmarshal(node, self.type)
+        if len(children) and node.hasText():
+            return umx.unmarshal(node, self.type)
+        plans = []
+        for child in children:
+            plan = self.child(child.name)
+            if plan is None:
+                return umx.unmarshal(node, self.type)
+            plans.append(plan)
+        keys = set()
+        attributes = AttrList(node.attributes)
+        if not len(node.attributes) and not len(children):
+            data = None
+        else:
+            cls_name = self.real.name
+            if cls_name is None:
+                cls_name = node.name
+            if umx.records:
+                data = self.record(cls_name)()
+            else:
+                data = Factory.object(cls_name)
+                data.__metadata__.sxtype = self.real
+        for attr in attributes.real():
+            name = attr.name
+            value = attr.value
+            type = self.attribute(name)
+            if type is None:
+                log.warn('attribute (%s) type, not-found', name)
+            elif value is not None:
+                value = type.translate(value)
+            key = '_%s' % reserved.get(name, name)
+            setattr(data, key, value)
+            keys.add(key)
+        for child, plan in zip(children, plans):
+            cval = plan.process(child, umx)
+            key = reserved.get(child.name, child.name)
+            if key in keys:
+                v = getattr(data, key)
+                if isinstance(v, list):
+                    v.append(cval)
+                else:
+                    setattr(data, key, [v, cval])
+                continue
+            if plan.unbounded:
+                if cval is None:
+                    setattr(data, key, [])
+                else:
+                    setattr(data, key, [cval,])
+            else:
+                setattr(data, key, cval)
+            keys.add(key)
+        text = node.getText()
+        if text is not None:
+            text = self.translator.translate(text)
+        return self.postprocess(node, attributes, data, keys, text)
+
+    def postprocess(self, node, attributes, data, keys, text):
+        """
+        Perform the final processing as done by L{Core.postprocess()}.
+        Mixed content is never planned and the (empty) object is not
+        built for nodes without attributes and children.
+        @param node: The unmarshalled XML node.
+        @type node: L{sax.element.Element}
+        @param attributes: The node's attributes.
+        @type attributes: L{AttrList}
+        @param data: The unmarshalled object.
+        @type data: L{Object}
+        @param keys: The keys set in the object.
+        @type keys: set
+        @param text: The (translated) node text.
+        @type text: I{any}
+        @return: The post-processed result.
+        @rtype: I{any}
+        """
+        if len(node.attributes) and \
+            attributes.rlen() and \
+            not len(node.children) and \
+            node.hasText():
+                p = Factory.property(node.name, node.getText())
+                return merge(data, p)
+        if len(keys):
+            return data
+        lang = attributes.lang()
+        if node.isnil():
+            return None
+        if not len(node.children) and text is None:
+            if self.nillable:
+                return None
+            else:
+                return Text('', lang=lang)
+        if isinstance(text, basestring):
+            return Text(text, lang=lang)
+        else:
+            return text
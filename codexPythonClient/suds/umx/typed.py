@@ -22,6 +22,7 @@ from logging import getLogger
 from suds import *
 from suds.umx import *
 from suds.umx.core import Core
+from suds.umx.plan import Plan
 from suds.resolver import NodeResolver, Frame
 from suds.sudsobject import Factory
 
@@ -42,18 +43,52 @@ class Typed(Core):
     A I{typed} XML unmarshaller
     @ivar resolver: A schema type resolver.
     @type resolver: L{NodeResolver}
+    @ivar plans: The (shared) compiled plans by schema type.
+        None=not used.
+    @type plans: {L{xsd.sxbase.SchemaObject}:L{Plan}}
+    @ivar records: Planned nodes are unmarshalled into compact
+        L{suds.sudsobject.Record} objects.
+    @type records: boolean
     """
     
-    def __init__(self, schema):
+    def __init__(self, schema, plans=None, records=False):
         """
         @param schema: A schema object.
         @type schema: L{xsd.schema.Schema}
+        @param plans: The (optional) compiled plans by schema type.
+            Plans are compiled (and added) on first use.
+        @type plans: dict
+        @param records: Use compact records (for planned nodes).
+        @type records: boolean
         """
         self.resolver = NodeResolver(schema)
+        self.plans = plans
+        self.records = records
         
     def process(self, node, type):
         """
         Process an object graph representation of the xml L{node}.
+        When I{plans} are used and the type is specified, the node
+        is unmarshalled using the compiled L{Plan} for the type.
+        @param node: An XML tree.
+        @type node: L{sax.element.Element}
+        @param type: The I{optional} schema type.
+        @type type: L{xsd.sxbase.SchemaObject}
+        @return: A suds object.
+        @rtype: L{Object}
+        """
+        if self.plans is None or type is None:
+            return self.unmarshal(node, type)
+        plan = self.plans.get(type)
+        if plan is None:
+            plan = Plan(type)
+            self.plans[type] = plan
+        return plan.process(node, self)
+    
+    def unmarshal(self, node, type):
+        """
+        Process an object graph representation of the xml L{node}
+        without using a compiled plan.
         @param node: An XML tree.
         @type node: L{sax.element.Element}
         @param type: The I{optional} schema type.
@@ -160,14 +160,10 @@ class AttrQuery(Query):
     
     def __deepsearch(self, schema):
         from suds.xsd.sxbasic import Attribute
-        result = None
-        for e in schema.all:
-            result = e.find(self.ref, (Attribute,))
-            if self.filter(result):
-                result = None
-            else:
-                break
-        return result
+        for result in schema.search(self.ref, Attribute):
+            if not self.filter(result):
+                return result
+        return None
 
 
 class AttrGroupQuery(Query):
@@ -198,11 +194,7 @@ class ElementQuery(Query):
     
     def __deepsearch(self, schema):
         from suds.xsd.sxbasic import Element
-        result = None
-        for e in schema.all:
-            result = e.find(self.ref, (Element,))
-            if self.filter(result):
-                result = None
-            else:
-                break
-        return result
\ No newline at end of file
+        for result in schema.search(self.ref, Element):
+            if not self.filter(result):
+                return result
+        return None
\ No newline at end of file
@@ -24,6 +24,7 @@ tranparent referenced type resolution and targeted denormalization.
 
 
 import suds.metrics
+from threading import RLock
 from suds import *
 from suds.xsd import *
 from suds.xsd.sxbuiltin import *
@@ -183,12 +184,30 @@ class Schema:
     @type groups: [L{SchemaObject},...]
     @ivar agrps: A list of attribute group objects.
     @type agrps: [L{SchemaObject},...]
+    @ivar index: The (deep) index of objects contained in the I{all} top
+        level children by (qname, class), built when dereferenced.
+    @type index: {(qname, class):[L{SchemaObject},...]}
+    @ivar revision: The number of schemas merged in.  Used to
+        invalidate memoized type resolution.
+    @type revision: int
+    @ivar lazy: The contents of (top level) children are built
+        and dereferenced when first used.  See: L{expand()}.
+    @type lazy: bool
+    @cvar __mutex: The lock held while (lazy) children are expanded.
+        Shared by all schemas because expanding a child may expand
+        children of another (imported) schema.
+    @type __mutex: I{RLock}
+    @cvar __pending: The children being expanded, mapped to their
+        (raw) children until dereferenced.
+    @type __pending: {L{SchemaObject}:[L{SchemaObject},...]}
     @ivar form_qualified: The flag indicating:
         (@elementFormDefault).
     @type form_qualified: bool
     """
     
     Tag = 'schema'
+    __mutex = RLock()
+    __pending = {}
     
     def __init__(self, root, baseurl, options, container=None):
         """
@@ -214,6 +233,9 @@ class Schema:
         self.attributes = {}
         self.groups = {}
         self.agrps = {}
+        self.index = None
+        self.revision = 0
+        self.lazy = options.lazy
         if options.doctor is not None:
             options.doctor.examine(root)
         form = self.root.get('elementFormDefault')
@@ -247,7 +269,7 @@ class Schema:
             - Build the graph.
             - Collate the children.
         """
-        self.children = BasicFactory.build(self.root, self)
+        self.children = BasicFactory.build(self.root, self, lazy=self.lazy)
         collated = BasicFactory.collate(self.children)
         self.children = collated[0]
         self.attributes = collated[2]
@@ -270,26 +292,32 @@ class Schema:
                 continue
             self.all.append(item[1])
             self.attributes[item[0]] = item[1]
+            self.addindex(item[1])
         for item in schema.elements.items():
             if item[0] in self.elements:
                 continue
             self.all.append(item[1])
             self.elements[item[0]] = item[1]
+            self.addindex(item[1])
         for item in schema.types.items():
             if item[0] in self.types:
                 continue
             self.all.append(item[1])
             self.types[item[0]] = item[1]
+            self.addindex(item[1])
         for item in schema.groups.items():
             if item[0] in self.groups:
                 continue
             self.all.append(item[1])
             self.groups[item[0]] = item[1]
+            self.addindex(item[1])
         for item in schema.agrps.items():
             if item[0] in self.agrps:
                 continue
             self.all.append(item[1])
             self.agrps[item[0]] = item[1]
+            self.addindex(item[1])
+        self.revision += 1
         schema.merged = True
         return self
         
@@ -312,15 +340,70 @@ class Schema:
     def dereference(self):
         """
         Instruct all children to perform dereferencing.
+        When I{lazy}, only the (top level) children are qualified
+        and each is dereferenced when expanded.
         """
+        if self.lazy:
+            for child in self.children:
+                child.qualify()
+            return
         all = []
-        indexes = {}
         for child in self.children:
             child.content(all)
+        self.merge_dependencies(all)
+        self.index = {}
+        for x in self.all:
+            self.addindex(x)
+            
+    def expand(self, child):
+        """
+        Build and dereference the contents of a (top level) child
+        of a I{lazy} schema.  Children are expanded under the L{__mutex}
+        so a child first used by concurrent threads is expanded once.  The
+        I{rawchildren} are published only once dereferenced; while being
+        expanded, (cyclic) references by this thread are served from
+        L{__pending}.
+        @param child: A top level child.
+        @type child: L{SchemaObject}
+        @return: The child's (raw) children.
+        @rtype: [L{SchemaObject},...]
+        """
+        self.__mutex.acquire()
+        try:
+            if 'rawchildren' in child.__dict__:
+                return child.rawchildren
+            children = self.__pending.get(child)
+            if children is not None:
+                return children
+            log.debug('%s, expanding', child.id)
+            children = BasicFactory.build(child.root, self, child.childtags())
+            self.__pending[child] = children
+            try:
+                all = []
+                for c in children:
+                    c.content(all)
+                self.merge_dependencies(all)
+                child.rawchildren = children
+            finally:
+                del self.__pending[child]
+            return children
+        finally:
+            self.__mutex.release()
+    
+    def merge_dependencies(self, all):
+        """
+        Qualify the objects and merge in their dependencies.
+        Only objects with dependencies are (dependency) sorted.
+        @param all: The (flattened) objects.
+        @type all: [L{SchemaObject},...]
+        """
+        indexes = {}
         deplist = DepList()
         for x in all:
             x.qualify()
             midx, deps = x.dependencies()
+            if not len(deps):
+                continue
             item = (x, tuple(deps))
             deplist.add(item)
             indexes[x] = midx
@@ -330,6 +413,44 @@ class Schema:
             d = deps[midx]
             log.debug('(%s) merging %s <== %s', self.tns[1], Repr(x), Repr(d))
             x.merge(d)
+            
+    def addindex(self, child):
+        """
+        Add the objects contained in the (top level) I{child} to the
+        L{index}.  Only the first object (depth-first) in the child with a
+        given (qname, class) is indexed.  Nothing is indexed until the index
+        is built when dereferenced.
+        @param child: A top level child.
+        @type child: L{SchemaObject}
+        """
+        if self.index is None:
+            return
+        seen = set()
+        stack = [child]
+        while len(stack):
+            x = stack.pop()
+            key = (x.qname, x.__class__)
+            if key not in seen:
+                seen.add(key)
+                self.index.setdefault(key, []).append(x)
+            stack.extend(reversed(x.rawchildren))
+            
+    def search(self, qref, cls):
+        """
+        Search (deep) the I{all} top level children for the first object
+        of the specified class with the qname in each child.  Served by the
+        L{index} once built, else the children are searched.
+        @param qref: A qualified reference.
+        @type qref: qref
+        @param cls: The class of the object.
+        @type cls: I{class}
+        @return: The matched objects in the order of the I{all} children.
+        @rtype: iterable
+        """
+        if self.index is not None:
+            return self.index.get((qref, cls), ())
+        found = ( x.find(qref, (cls,)) for x in self.all )
+        return ( x for x in found if x is not None )
         
     def locate(self, ns):
         """
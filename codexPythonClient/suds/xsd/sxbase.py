@@ -44,7 +44,8 @@ class SchemaObject(object):
     @type nillable: boolean
     @ivar default: The default value.
     @type default: object
-    @ivar rawchildren: A list raw of all children.
+    @ivar rawchildren: A list raw of all children.  Built (expanded)
+        when first used for top level objects in I{lazy} schemas.
     @type rawchildren: [L{SchemaObject},...]
     """
 
@@ -60,11 +61,7 @@ class SchemaObject(object):
         @param filter: A filter that allows items to be prepended.
         @type filter: L{Filter}
         """
-        i = 0
-        for x in s:
-            if x in filter:
-                d.insert(i, x)
-                i += 1
+        d[0:0] = [x for x in s if x in filter]
     
     @classmethod
     def append(cls, d, s, filter=Filter()):
@@ -384,6 +381,7 @@ class SchemaObject(object):
         Merge another object as needed.
         """
         other.qualify()
+        self.cache.clear()
         for n in ('name',
                   'qname',
                   'min',
@@ -403,6 +401,9 @@ class SchemaObject(object):
     def content(self, collection=None, filter=Filter(), history=None):
         """
         Get a I{flattened} list of this nodes contents.
+        The contents are traversed (depth-first) iteratively and the
+        objects on the current path are tracked (by identity) to
+        prevent cyclic dependency.
         @param collection: A list to fill.
         @type collection: list
         @param filter: A filter used to constrain the result.
@@ -421,8 +422,22 @@ class SchemaObject(object):
         history.append(self)
         if self in filter:
             collection.append(self)
-        for c in self.rawchildren:
-            c.content(collection, filter, history[:])
+        path = set([id(x) for x in history])
+        nodes = [self]
+        stack = [iter(self.rawchildren)]
+        while len(stack):
+            for c in stack[-1]:
+                if id(c) in path:
+                    continue
+                if c in filter:
+                    collection.append(c)
+                path.add(id(c))
+                nodes.append(c)
+                stack.append(iter(c.rawchildren))
+                break
+            else:
+                stack.pop()
+                path.discard(id(nodes.pop()))
         return collection
     
     def str(self, indent=0, history=None):
@@ -489,6 +504,11 @@ class SchemaObject(object):
         myrep = ''.join(s)
         return myrep.encode('utf-8')
     
+    def __getattr__(self, name):
+        if name == 'rawchildren':
+            return self.schema.expand(self)
+        raise AttributeError(name)
+    
     def __len__(self):
         n = 0
         for x in self: n += 1
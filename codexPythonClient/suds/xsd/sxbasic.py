@@ -44,15 +44,22 @@ class RestrictionMatcher:
 class TypedContent(Content):
     """
     Represents any I{typed} content.
+    The resolved type is memoized (by I{nobuiltin}) until
+    another schema is merged into the object's schema.
     """
     def resolve(self, nobuiltin=False):
+        key = 'resolved:nb=%s' % nobuiltin
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] == self.schema.revision:
+            return cached[1]
+        result = self.__resolve(nobuiltin)
+        self.cache[key] = (self.schema.revision, result)
+        return result
+    
+    def __resolve(self, nobuiltin):
         qref = self.qref()
         if qref is None:
             return self
-        key = 'resolved:nb=%s' % nobuiltin
-        cached = self.cache.get(key)
-        if cached is not None:
-            return cached
         result = self
         query = TypeQuery(qref)
         query.history = [self]
@@ -61,7 +68,6 @@ class TypedContent(Content):
         if resolved is None:
             log.debug(self.schema)
             raise TypeNotFound(qref)
-        self.cache[key] = resolved
         if resolved.builtin():
             if nobuiltin:
                 result = self
@@ -758,13 +764,16 @@ class Factory:
             return None
 
     @classmethod
-    def build(cls, root, schema, filter=('*',)):
+    def build(cls, root, schema, filter=('*',), lazy=False):
         """
         Build an xsobject representation.
         @param root: An schema XML root.
         @type root: L{sax.element.Element}
         @param filter: A tag filter.
         @type filter: [str,...]
+        @param lazy: Build only the (top level) objects.  Their
+            contents are built when first used.
+        @type lazy: bool
         @return: A schema object graph.
         @rtype: L{sxbase.SchemaObject}
         """
@@ -775,6 +784,9 @@ class Factory:
                 if child is None:
                     continue
                 children.append(child)
+                if lazy:
+                    del child.rawchildren
+                    continue
                 c = cls.build(node, schema, child.childtags())
                 child.rawchildren = c
         return children
@@ -0,0 +1,176 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the (LGPL) GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Library Lesser General Public License for more details at
+# ( http://www.gnu.org/licenses/lgpl.html ).
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+# written by: Jeff Ortel ( jortel@redhat.com )
+
+"""
+A (threaded) loopback HTTP server for the transport tests.
+"""
+
+import re
+import time
+import threading
+import BaseHTTPServer
+import SocketServer
+from suds.benchmark import synthetic_build
+
+
+envelope = (
+    '<SOAP-ENV:Envelope'
+    ' xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/"'
+    ' xmlns:ns="urn:benchmark">'
+    '<SOAP-ENV:Body>%s</SOAP-ENV:Body>'
+    '</SOAP-ENV:Envelope>')
+
+fault = envelope % (
+    '<SOAP-ENV:Fault>'
+    '<faultcode>SOAP-ENV:Server</faultcode>'
+    '<faultstring>no such build</faultstring>'
+    '<detail><reason>missing</reason></detail>'
+    '</SOAP-ENV:Fault>')
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Replies to I{getBuild} with the requested build after the I{delay}
+    (seconds) requested for the id, else immediately.  Id 404 faults.
+    The connection is kept alive unless the server is I{dropping}.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    pattern = re.compile('<ns0:id>(\d+)</ns0:id>')
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.server.connected()
+
+    def finish(self):
+        try:
+            BaseHTTPServer.BaseHTTPRequestHandler.finish(self)
+        finally:
+            self.server.disconnected()
+
+    def do_POST(self):
+        n = int(self.headers.get('content-length', 0))
+        body = self.rfile.read(n)
+        id = int(self.pattern.search(body).group(1))
+        self.server.posted(id)
+        try:
+            self.reply(id)
+        finally:
+            self.server.replied()
+
+    def reply(self, id):
+        time.sleep(self.server.delays.get(id, 0))
+        if id == 404:
+            code = 500
+            data = fault
+        else:
+            code = 200
+            body = '<ns:getBuildResponse>%s</ns:getBuildResponse>'
+            data = envelope % (body % synthetic_build(id))
+        self.send_response(code)
+        self.send_header('Content-Type', 'text/xml')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        if self.server.dropping:
+            self.close_connection = 1
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """
+    The loopback server (on an unused port) served by a daemon thread.
+    @ivar url: The service url.
+    @type url: str
+    @ivar connections: The number of connections accepted.
+    @type connections: int
+    @ivar posts: The requested ids in the order received.
+    @type posts: [int,..]
+    @ivar open: The number of open connections.
+    @type open: int
+    @ivar busy: The number of requests being replied to.
+    @type busy: int
+    @ivar delays: The reply delay (seconds) by id.
+    @type delays: {int:float}
+    @ivar dropping: Close connections after replying (without
+        telling the client) so that pooled connections are stale.
+    @type dropping: bool
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:%d/codex' % self.server_address[1]
+        self.connections = 0
+        self.open = 0
+        self.posts = []
+        self.busy = 0
+        self.delays = {}
+        self.dropping = False
+        self.lock = threading.Lock()
+        thread = threading.Thread(target=self.serve_forever)
+        thread.setDaemon(True)
+        thread.start()
+
+    def connected(self):
+        self.lock.acquire()
+        try:
+            self.connections += 1
+            self.open += 1
+        finally:
+            self.lock.release()
+
+    def disconnected(self):
+        self.lock.acquire()
+        try:
+            self.open -= 1
+        finally:
+            self.lock.release()
+
+    def posted(self, id):
+        self.lock.acquire()
+        try:
+            self.posts.append(id)
+            self.busy += 1
+        finally:
+            self.lock.release()
+
+    def replied(self):
+        self.lock.acquire()
+        try:
+            self.busy -= 1
+        finally:
+            self.lock.release()
+
+    def handle_error(self, request, address):
+        # clients that time out (or drop) the connection are expected
+        pass
+
+    def stop(self):
+        """
+        Stop serving once the requests being replied to are done
+        and the (kept alive) connections have been closed by the clients.
+        """
+        self.shutdown()
+        self.server_close()
+        for i in range(100):
+            if not (self.busy or self.open):
+                break
+            time.sleep(0.05)
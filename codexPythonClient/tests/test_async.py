@@ -0,0 +1,129 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the (LGPL) GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Library Lesser General Public License for more details at
+# ( http://www.gnu.org/licenses/lgpl.html ).
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+# written by: Jeff Ortel ( jortel@redhat.com )
+
+"""
+Tests for the L{AsyncClient} and its L{Future}s.
+Run (in the codexPythonClient directory) as:
+python -m unittest discover -s tests
+"""
+
+import socket
+import unittest
+from httpserver import Server
+from suds import WebFault
+from suds.benchmark import Codex
+from suds.cache import NoCache
+from suds.client import AsyncClient
+
+
+class AsyncClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server()
+        self.codex = Codex()
+        self.client = AsyncClient(
+            self.codex.url,
+            cache=NoCache(),
+            location=self.server.url,
+            timeout=5)
+
+    def tearDown(self):
+        self.server.stop()
+        self.codex.cleanup()
+
+    def poll(self):
+        n = 0
+        while self.client.poll(1):
+            n += 1
+            self.assertTrue(n < 100)
+
+    def testPoll(self):
+        for id in range(4):
+            self.server.delays[id] = (4-id)*0.05
+        completed = []
+        futures = []
+        for id in range(4):
+            future = self.client.aservice.getBuild(id)
+            future.add_callback(completed.append)
+            futures.append(future)
+        self.assertEqual([f.done() for f in futures], [False]*4)
+        self.poll()
+        self.assertEqual([f.done() for f in futures], [True]*4)
+        self.assertEqual([f.result().id for f in futures], range(4))
+        self.assertEqual(len(completed), 4)
+        self.assertNotEqual(completed, futures)
+        for id, future in enumerate(futures):
+            self.assertEqual(future.error, None)
+            sent = future.last_sent().str()
+            self.assertTrue('<ns0:id>%d</ns0:id>' % id in sent)
+            received = future.last_received().str()
+            self.assertTrue('<ns:id>%d</ns:id>' % id in received)
+        self.assertEqual(self.client.poll(0), 0)
+
+    def testResult(self):
+        future = self.client.aservice.getBuild(7)
+        self.assertEqual(future.result().id, 7)
+        self.assertTrue(future.done())
+        called = []
+        future.add_callback(called.append)
+        self.assertEqual(called, [future])
+
+    def testWait(self):
+        self.server.delays[1] = 0.5
+        slow = self.client.aservice.getBuild(1)
+        fast = self.client.aservice.getBuild(2)
+        self.assertTrue(self.client.wait([fast]))
+        self.assertTrue(fast.done())
+        self.assertFalse(self.client.wait([slow], 0.01))
+        self.assertTrue(self.client.wait())
+        self.assertEqual(slow.result().id, 1)
+
+    def testFault(self):
+        future = self.client.aservice.getBuild(404)
+        other = self.client.aservice.getBuild(1)
+        self.poll()
+        self.assertTrue(isinstance(future.error, WebFault))
+        self.assertRaises(WebFault, future.result)
+        self.assertEqual(other.result().id, 1)
+
+    def testFaultsOff(self):
+        self.client.set_options(faults=False)
+        future = self.client.aservice.getBuild(404)
+        self.poll()
+        self.assertEqual(future.error, None)
+        status, detail = future.result()
+        self.assertEqual(status, 500)
+        self.assertEqual(detail.reason, 'missing')
+
+    def testTimeout(self):
+        self.server.delays[1] = 1
+        self.client.set_options(timeout=0.2)
+        future = self.client.aservice.getBuild(1)
+        self.poll()
+        self.assertTrue(isinstance(future.error, socket.timeout))
+        self.assertRaises(socket.timeout, future.result)
+
+    def testRefused(self):
+        url = self.server.url
+        self.server.stop()
+        self.client.set_options(location=url)
+        future = self.client.aservice.getBuild(1)
+        self.poll()
+        self.assertTrue(isinstance(future.error, socket.error))
+
+
+if __name__ == '__main__':
+    unittest.main()
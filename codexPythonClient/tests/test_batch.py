@@ -0,0 +1,147 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the (LGPL) GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Library Lesser General Public License for more details at
+# ( http://www.gnu.org/licenses/lgpl.html ).
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+# written by: Jeff Ortel ( jortel@redhat.com )
+
+"""
+Tests for the concurrent L{Batch} invocations.
+Run (in the codexPythonClient directory) as:
+python -m unittest discover -s tests
+"""
+
+import re
+import time
+import threading
+import unittest
+from cStringIO import StringIO
+from suds import WebFault
+from suds.benchmark import Codex, synthetic_build
+from suds.transport import Transport, TransportError, Reply
+
+
+envelope = (
+    '<SOAP-ENV:Envelope'
+    ' xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/"'
+    ' xmlns:ns="urn:benchmark">'
+    '<SOAP-ENV:Body>%s</SOAP-ENV:Body>'
+    '</SOAP-ENV:Envelope>')
+
+fault = envelope % (
+    '<SOAP-ENV:Fault>'
+    '<faultcode>SOAP-ENV:Server</faultcode>'
+    '<faultstring>no such build</faultstring>'
+    '<detail><reason>missing</reason></detail>'
+    '</SOAP-ENV:Fault>')
+
+
+class Echo(Transport):
+    """
+    A (loopback) transport that replies with the requested build.  The
+    lower the id, the longer the reply is delayed so that invocations
+    complete in reverse order.  Id 13 fails (raised) and id 404 faults.
+    @ivar completed: The ids in the order the replies were sent.
+    @type completed: [int,..]
+    """
+
+    pattern = re.compile('<ns0:id>(\d+)</ns0:id>')
+
+    def __init__(self):
+        Transport.__init__(self)
+        self.completed = []
+        self.lock = threading.Lock()
+
+    def send(self, request):
+        id = int(self.pattern.search(request.message).group(1))
+        time.sleep(max(0, 10-id)*0.01)
+        self.lock.acquire()
+        try:
+            self.completed.append(id)
+        finally:
+            self.lock.release()
+        if id == 13:
+            raise Exception('failed: %d' % id)
+        if id == 404:
+            raise TransportError('fault', 500, StringIO(fault))
+        body = '<ns:getBuildResponse>%s</ns:getBuildResponse>'
+        return Reply(200, {}, envelope % (body % synthetic_build(id)))
+
+
+class BatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.codex = Codex()
+        self.transport = Echo()
+        self.client = self.codex.client()
+        self.client.set_options(transport=self.transport)
+
+    def tearDown(self):
+        self.codex.cleanup()
+
+    def testOrder(self):
+        batch = self.client.batch(4)
+        for id in range(8):
+            batch.add('getBuild', id)
+        self.assertEqual(len(batch), 8)
+        invocations = batch.run()
+        self.assertEqual(len(batch), 0)
+        self.assertNotEqual(self.transport.completed, range(8))
+        self.assertEqual([i.result.id for i in invocations], range(8))
+        for id, invocation in enumerate(invocations):
+            self.assertTrue(invocation.succeeded())
+            self.assertEqual(invocation.args, (id,))
+            sent = invocation.last_sent().str()
+            self.assertTrue('<ns0:id>%d</ns0:id>' % id in sent)
+            received = invocation.last_received().str()
+            self.assertTrue('<ns:id>%d</ns:id>' % id in received)
+        self.assertEqual(self.client.last_sent(), None)
+        self.assertEqual(self.client.last_received(), None)
+
+    def testMap(self):
+        invocations = self.client.map('getBuild', [3, (2,), 1, 0], 2)
+        self.assertEqual([i.result.id for i in invocations], [3, 2, 1, 0])
+
+    def testErrors(self):
+        batch = self.client.batch(3)
+        for id in (1, 13, 2, 404, 3):
+            batch.add(self.client.service.getBuild, id)
+        invocations = batch.run()
+        self.assertEqual(
+            [i.succeeded() for i in invocations],
+            [True, False, True, False, True])
+        self.assertEqual([i.result.id for i in invocations[::2]], [1, 2, 3])
+        failed = invocations[1]
+        self.assertEqual(failed.result, None)
+        self.assertEqual(str(failed.error), 'failed: 13')
+        faulted = invocations[3]
+        self.assertTrue(isinstance(faulted.error, WebFault))
+        self.assertEqual(faulted.error.fault.faultstring, 'no such build')
+        self.assertTrue('(failed)' in str(faulted))
+
+    def testFaultsOff(self):
+        self.client.set_options(faults=False)
+        invocations = self.client.map('getBuild', [404, 1])
+        faulted = invocations[0]
+        self.assertTrue(faulted.succeeded())
+        self.assertEqual(faulted.result[0], 500)
+        self.assertEqual(faulted.result[1].reason, 'missing')
+        self.assertTrue('Fault' in faulted.last_received().str())
+        self.assertEqual(invocations[1].result[0], 200)
+        self.assertEqual(invocations[1].result[1].id, 1)
+
+    def testEmpty(self):
+        self.assertEqual(self.client.batch().run(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the (LGPL) GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Library Lesser General Public License for more details at
+# ( http://www.gnu.org/licenses/lgpl.html ).
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+# written by: Jeff Ortel ( jortel@redhat.com )
+
+"""
+Tests for shared client clones and the L{ClientPool}.
+Run (in the codexPythonClient directory) as:
+python -m unittest discover -s tests
+"""
+
+import unittest
+from suds.benchmark import Codex
+from suds.client import ClientPool
+from suds.sax.element import Element
+from suds.transport import Transport, Reply
+
+
+reply = (
+    '<SOAP-ENV:Envelope'
+    ' xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/"'
+    ' xmlns:ns="urn:benchmark">'
+    '<SOAP-ENV:Body><ns:getBuildResponse/></SOAP-ENV:Body>'
+    '</SOAP-ENV:Envelope>')
+
+
+class Recorder(Transport):
+    """
+    A (custom) transport that records the sent messages
+    and replies with a canned reply.
+    """
+
+    def __init__(self, sent):
+        Transport.__init__(self)
+        self.sent = sent
+
+    def send(self, request):
+        self.sent.append(str(request.message))
+        return Reply(200, {}, reply)
+
+
+class ClientPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.codex = Codex()
+        self.sent = []
+        self.client = self.codex.client()
+        self.client.set_options(
+            transport=Recorder(self.sent),
+            soapheaders=[Element('prototype')])
+        self.pool = ClientPool(self.client)
+
+    def tearDown(self):
+        self.codex.cleanup()
+
+    def testGet(self):
+        clone = self.pool.get()
+        transport = clone.options.transport
+        self.assertTrue(isinstance(transport, Recorder))
+        self.assertTrue(transport is not self.client.options.transport)
+        self.assertTrue(transport.sent is self.sent)
+        clone.service.getBuild(1)
+        self.assertEqual(len(self.sent), 1)
+
+    def testOptions(self):
+        clone = self.pool.get()
+        clone.set_options(timeout=3)
+        self.assertEqual(clone.options.transport.options.timeout, 3)
+        self.assertNotEqual(self.client.options.timeout, 3)
+        self.assertNotEqual(self.client.options.transport.options.timeout, 3)
+
+    def testSoapHeaders(self):
+        clone = self.pool.get()
+        clone.set_options(soapheaders=[Element('clone')])
+        clone.service.getBuild(1)
+        self.assertTrue('<clone' in self.sent[-1])
+        self.assertTrue('<prototype' not in self.sent[-1])
+        self.client.service.getBuild(1)
+        self.assertTrue('<prototype' in self.sent[-1])
+        self.assertTrue('<clone' not in self.sent[-1])
+
+    def testPut(self):
+        clone = self.pool.get()
+        clone.set_options(soapheaders=[Element('clone')], timeout=3)
+        self.pool.put(clone)
+        clone = self.pool.get()
+        self.assertEqual(clone.options.timeout, self.client.options.timeout)
+        clone.service.getBuild(1)
+        self.assertTrue('<prototype' in self.sent[-1])
+        self.assertTrue('<clone' not in self.sent[-1])
+
+    def testSoapHeadersInPlace(self):
+        clone = self.pool.get()
+        header = clone.options.soapheaders[0]
+        self.assertTrue(header is not self.client.options.soapheaders[0])
+        header.setText('changed')
+        header.set('mark', 'clone')
+        clone.service.getBuild(1)
+        self.assertTrue('changed' in self.sent[-1])
+        self.client.service.getBuild(1)
+        self.assertTrue('changed' not in self.sent[-1])
+        self.assertTrue('mark=' not in self.sent[-1])
+        self.pool.put(clone)
+        clone = self.pool.get()
+        clone.service.getBuild(1)
+        self.assertTrue('<prototype' in self.sent[-1])
+        self.assertTrue('changed' not in self.sent[-1])
+        self.assertTrue('mark=' not in self.sent[-1])
+
+    def testLocal(self):
+        clone = self.pool.local()
+        self.assertTrue(clone is self.pool.local())
+        clone.service.getBuild(1)
+        self.assertEqual(len(self.sent), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
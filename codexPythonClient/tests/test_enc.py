@@ -0,0 +1,118 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the (LGPL) GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Library Lesser General Public License for more details at
+# ( http://www.gnu.org/licenses/lgpl.html ).
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+# written by: Jeff Ortel ( jortel@redhat.com )
+
+"""
+Tests for the XML special character L{Encoder}.
+Run (in the codexPythonClient directory) as:
+python -m unittest discover -s tests
+"""
+
+import re
+import doctest
+import unittest
+from suds.sax import enc
+from suds.sax.enc import Encoder
+
+
+def reference(s):
+    """
+    The (unoptimized) encoding: each pattern applied in turn.
+    """
+    for x in Encoder.encodings:
+        s = re.sub(x[0], x[1], s)
+    return s
+
+
+class EncoderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.encoder = Encoder()
+
+    def testPlain(self):
+        s = 'no special characters'
+        self.assertTrue(self.encoder.encode(s) is s)
+        self.assertTrue(self.encoder.decode(s) is s)
+        self.assertFalse(self.encoder.needsEncoding(s))
+        self.assertEqual(self.encoder.encode(10), 10)
+
+    def testSpecial(self):
+        self.assertEqual(
+            self.encoder.encode('<a href="x">\'b\'</a>'),
+            '&lt;a href=&quot;x&quot;&gt;&apos;b&apos;&lt;/a&gt;')
+        for c in Encoder.special:
+            self.assertTrue(self.encoder.needsEncoding('a%sb' % c))
+
+    def testNamedEntities(self):
+        for e in ('&amp;', '&lt;', '&gt;', '&quot;', '&apos;'):
+            self.assertEqual(self.encoder.encode(e), e)
+            self.assertEqual(self.encoder.encode('x%sy' % e), 'x%sy' % e)
+
+    def testNumericEntity(self):
+        self.assertEqual(self.encoder.encode('&#38;'), '&amp;#38;')
+        self.assertEqual(self.encoder.encode('&#x26;'), '&amp;#x26;')
+
+    def testAmpersand(self):
+        self.assertEqual(self.encoder.encode('&'), '&amp;')
+        self.assertEqual(self.encoder.encode('a &'), 'a &amp;')
+        self.assertEqual(self.encoder.encode('a && b'), 'a &amp;&amp; b')
+        self.assertEqual(self.encoder.encode('&amp'), '&amp;amp')
+        self.assertEqual(self.encoder.encode('&ltx;'), '&amp;ltx;')
+
+    def testEncodedAmpersand(self):
+        self.assertEqual(self.encoder.encode('&amp;amp;'), '&amp;amp;')
+        self.assertEqual(self.encoder.decode('&amp;amp;'), '&amp;')
+
+    def testUnicode(self):
+        s = u'\xe9 & \xfc < 1'
+        self.assertEqual(self.encoder.encode(s), u'\xe9 &amp; \xfc &lt; 1')
+        self.assertTrue(isinstance(self.encoder.encode(s), unicode))
+
+    def testReference(self):
+        strings = (
+            '', '&', '&&', '&amp;', '&amp;amp;', '&#38;', 'a & b < c > d',
+            '"\'&quot;\'"', '&lt;&gt;&unknown;&', 'x&apos', '&;',
+            u'\xe9&\xe9',)
+        for s in strings:
+            self.assertEqual(self.encoder.encode(s), reference(s))
+
+    def testRoundTrip(self):
+        strings = (
+            'a & b', '<a href="x">&</a>', '& trailing &', "it's",
+            '&#38;', '&amp', '&&;;', u'\xe9 & <\xfc>',)
+        for s in strings:
+            encoded = self.encoder.encode(s)
+            self.assertEqual(self.encoder.decode(encoded), s)
+
+    def testRoundTripEntities(self):
+        # named entities are not encoded again so they are decoded
+        self.assertEqual(self.encoder.decode(self.encoder.encode('&lt;')), '<')
+        self.assertEqual(
+            self.encoder.decode(self.encoder.encode('&amp;amp;')), '&amp;')
+
+    def testDecode(self):
+        self.assertEqual(
+            self.encoder.decode('&lt;a href=&quot;x&quot;&gt; &amp;lt;'),
+            '<a href="x"> &lt;')
+        self.assertEqual(self.encoder.decode('&apos;&#38;'), "'&#38;")
+
+
+def load_tests(loader, tests, pattern):
+    tests.addTests(doctest.DocTestSuite(enc))
+    return tests
+
+
+if __name__ == '__main__':
+    unittest.main()
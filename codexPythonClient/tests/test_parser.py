@@ -0,0 +1,75 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the (LGPL) GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Library Lesser General Public License for more details at
+# ( http://www.gnu.org/licenses/lgpl.html ).
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+# written by: Jeff Ortel ( jortel@redhat.com )
+
+"""
+Tests for the (xml.sax and pyexpat) parser backends.
+Run (in the codexPythonClient directory) as:
+python -m unittest discover -s tests
+"""
+
+import unittest
+from suds.sax.parser import Parser
+
+
+document = (
+    '<?xml version="1.0"?>'
+    '<a xmlns="urn:a" xmlns:b="urn:b">'
+    '<b:item n="1">one</b:item>'
+    '<b:item n="2" %s>two</b:item>'
+    '<b:item n="3">three</b:item>'
+    '</a>')
+
+bound = document % ''
+unbound = document % 'x:odd="1"'
+
+
+class ParserTest(unittest.TestCase):
+
+    def parse(self, string, expat):
+        return Parser(expat).parse(string=string)
+
+    def stream(self, string, expat, size=0x10000):
+        root, nodes = Parser(expat).stream(string, 2, size)
+        items = []
+        for node in nodes:
+            items.append(node.str())
+            node.detach()
+        return (root, items)
+
+    def testParse(self):
+        for string in (bound, unbound):
+            expected = self.parse(string, False).str()
+            self.assertEqual(self.parse(string, True).str(), expected)
+
+    def testStream(self):
+        for string in (bound, unbound):
+            root, items = self.stream(string, False)
+            self.assertEqual(len(items), 3)
+            self.assertEqual(self.stream(string, True)[1], items)
+
+    def testStreamUnbound(self):
+        # expat rejects the prefix after the first item is generated
+        root, items = self.stream(unbound, True, 16)
+        self.assertEqual(len(items), 3)
+        self.assertTrue('x:odd="1"' in items[1])
+        a = root.getChild('a')
+        self.assertEqual(len(a.children), 0)
+        self.assertEqual(a.get('xmlns:b'), None)
+        self.assertEqual(a.resolvePrefix('b'), ('b', 'urn:b'))
+
+
+if __name__ == '__main__':
+    unittest.main()
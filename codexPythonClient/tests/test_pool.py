@@ -0,0 +1,121 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the (LGPL) GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Library Lesser General Public License for more details at
+# ( http://www.gnu.org/licenses/lgpl.html ).
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+# written by: Jeff Ortel ( jortel@redhat.com )
+
+"""
+Tests for the L{PooledHttpTransport} connection reuse.
+Run (in the codexPythonClient directory) as:
+python -m unittest discover -s tests
+"""
+
+import socket
+import threading
+import time
+import unittest
+from httpserver import Server
+from suds import WebFault
+from suds.benchmark import Codex
+from suds.cache import NoCache
+from suds.client import Client
+from suds.transport.pool import PooledHttpTransport
+
+
+class PoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = Server()
+        self.codex = Codex()
+        self.transports = []
+
+    def tearDown(self):
+        for transport in self.transports:
+            transport.pool.clear()
+        self.server.stop()
+        self.codex.cleanup()
+
+    def client(self, **kwargs):
+        kwargs.setdefault('timeout', 5)
+        transport = PooledHttpTransport(**kwargs)
+        self.transports.append(transport)
+        return Client(
+            self.codex.url,
+            cache=NoCache(),
+            transport=transport,
+            location=self.server.url)
+
+    def testReuse(self):
+        client = self.client()
+        for id in range(5):
+            self.assertEqual(client.service.getBuild(id).id, id)
+        self.assertEqual(self.server.posts, range(5))
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(len(client.options.transport.pool), 1)
+
+    def testFault(self):
+        client = self.client()
+        self.assertRaises(WebFault, client.service.getBuild, 404)
+        self.assertEqual(client.service.getBuild(1).id, 1)
+        self.assertEqual(self.server.connections, 1)
+
+    def testConcurrent(self):
+        client = self.client(poolsize=2)
+        results = []
+        def work(n):
+            for id in range(n*10, n*10+5):
+                results.append(client.service.getBuild(id).id)
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        expected = [id for n in range(6) for id in range(n*10, n*10+5)]
+        self.assertEqual(sorted(results), expected)
+        self.assertTrue(self.server.connections <= len(expected))
+        self.assertTrue(len(client.options.transport.pool) <= 2)
+
+    def testMaxRequests(self):
+        client = self.client(maxrequests=2)
+        for id in range(4):
+            client.service.getBuild(id)
+        self.assertEqual(self.server.connections, 2)
+
+    def testIdleTimeout(self):
+        client = self.client(idletimeout=0)
+        for id in range(3):
+            client.service.getBuild(id)
+            time.sleep(0.01)
+        self.assertEqual(self.server.connections, 3)
+
+    def testStale(self):
+        client = self.client()
+        self.server.dropping = True
+        self.assertEqual(client.service.getBuild(1).id, 1)
+        self.assertEqual(len(client.options.transport.pool), 1)
+        time.sleep(0.1)
+        self.assertEqual(client.service.getBuild(2).id, 2)
+        self.assertEqual(self.server.posts, [1, 2])
+        self.assertEqual(self.server.connections, 2)
+
+    def testTimeout(self):
+        client = self.client(timeout=0.2)
+        self.server.delays[2] = 1
+        client.service.getBuild(1)
+        self.assertRaises(socket.timeout, client.service.getBuild, 2)
+        self.assertEqual(self.server.posts, [1, 2])
+        self.assertEqual(len(client.options.transport.pool), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the (LGPL) GNU Lesser General Public License as
+# published by the Free Software Foundation; either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Library Lesser General Public License for more details at
+# ( http://www.gnu.org/licenses/lgpl.html ).
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA 02111-1307, USA.
+# written by: Jeff Ortel ( jortel@redhat.com )
+
+"""
+Tests for the compact L{Record} objects.
+Run (in the codexPythonClient directory) as:
+python -m unittest discover -s tests
+"""
+
+import pickle
+import unittest
+from suds.benchmark import Codex, Loopback, synthetic_reply
+from suds.sudsobject import Factory, Object, Record
+
+
+class RecordTest(unittest.TestCase):
+
+    def setUp(self):
+        self.Build = Factory.record(u'Build', ['id', 'name'])
+
+    def roundtrip(self, x):
+        for protocol in range(pickle.HIGHEST_PROTOCOL+1):
+            y = pickle.loads(pickle.dumps(x, protocol))
+            self.assertEqual(str(y), str(x))
+        return y
+
+    def testPickle(self):
+        build = self.Build()
+        build.id = 1
+        build.name = u'build-1'
+        y = self.roundtrip(build)
+        self.assertTrue(isinstance(y, Record))
+        self.assertTrue(isinstance(y, Object))
+        self.assertEqual(y.__class__.__name__, 'Build')
+        self.assertEqual(y.__keylist__, ['id', 'name'])
+        self.assertEqual(y.name, u'build-1')
+
+    def testPickleOrder(self):
+        build = self.Build()
+        build.name = 'build-1'
+        build.extra = [1, 2]
+        build.id = 1
+        y = self.roundtrip(build)
+        self.assertEqual(y.__keylist__, ['name', 'extra', 'id'])
+        self.assertEqual(y.extra, [1, 2])
+
+    def testPickleMetadata(self):
+        build = self.Build()
+        build.__metadata__.ordering = ['id', 'name']
+        y = self.roundtrip(build)
+        self.assertEqual(y.__metadata__.ordering, ['id', 'name'])
+
+    def testPickleClass(self):
+        a, b = pickle.loads(pickle.dumps([self.Build(), self.Build()], 2))
+        self.assertTrue(a.__class__ is b.__class__)
+
+    def testPickleReply(self):
+        codex = Codex()
+        try:
+            client = codex.client(records=True)
+            client.set_options(transport=Loopback(synthetic_reply(3)))
+            builds = client.service.queryBuilds('product', 10)
+            self.assertTrue(isinstance(builds[0], Record))
+            y = self.roundtrip(builds)
+            self.assertEqual(len(y), 3)
+            self.assertTrue(y[0].__metadata__.sxtype is not None)
+        finally:
+            codex.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main()